@@ -1,26 +1,206 @@
 """
 根据网格参数读取颜色信息（复用 image_point_color_check 的算法）。
 
-依赖：Pillow
-安装：pip install pillow
+依赖：Pillow、NumPy；直接识别 PDF 时还需要 PyMuPDF
+安装：pip install pillow numpy pymupdf
 
 坐标系说明：
 - 原点 (0, 0) 位于图像的左上角
 - X轴向右增加
 - Y轴向下增加
+
+两种运行方式：
+- batch_process_pdfs：直接把 PDF 首页渲染到内存（pixmap 原始像素）交给分类器，不产生中间 PNG
+  （SAVE_DEBUG_PNG=True 时才额外保存 PNG 便于调试）
+- batch_process_images：读取 pdf_first_page_to_png.py 导出的图片（旧流程；png / raw 等格式见 image_codec.py）
+
+每张图只转换一次为 (高, 宽, 3) 的 uint8 数组，网格取点与矩形统计均为 NumPy 向量化计算。
+RENDER_CLIP=True 时只渲染 classification_region() 覆盖的区域，数组左上角在整页中的像素坐标
+作为 offset 传给分类函数，网格参数仍按整页坐标填写。
+USE_PAGE_CACHE=True 时渲染结果按 PDF 哈希保存为 .npy（page_cache.py），调整参数重复识别时内存映射读取。
+
+CLASSIFIER_ENGINE="vector" 时改用 classify_pdf_vector：直接用 page.get_drawings() 的路径几何与
+填充/描边颜色，按绘制顺序模拟抗锯齿覆盖率，求出每个格点像素的颜色，不渲染网格区域；
+只有有色列数落在 3-5 时，才渲染矩形那一小条（含坐标轴文字）计算无色比例。
+格点附近有细于 1 个设备像素的描边时覆盖率无法准确模拟，该页回退到栅格引擎。
+判定规则两种引擎共用 is_excellent；compare_engines 用于检查两者是否一致。
+
+结果缓存：每个 PDF（或 PNG）的判定结果按“文件内容哈希 + 分类参数哈希”保存在数据集缓存目录的
+.cache/recognition_cache.json 中，重复运行只分类新增或内容变化的文件（文件大小与修改时间未变时不重新计算哈希）。
+文件签名统一记录在数据集的 PDF 内容索引中（pdf_index.py）；同一次运行中内容相同的多个路径只分类一次。
+“非常好”目录不再整体清空，而是按判定结果增量调整：只增删本脚本自己复制进去的文件，
+手动复制（例如分类工具复制）的文件不会被删除；本脚本复制后被手动删掉的文件也不会再被复制回来。
+
+特征表：每次批处理结束后把所有 PDF 的判定与特征写入数据集缓存目录的 .cache/recognition_scores.parquet
+（未安装 pyarrow 时为 recognition_scores.csv）：路径、每列最暗值（grid1_c00…）、矩形直方图、
+耗时与最终判定，下游可以直接重新判定、排序、审核，无需重新渲染（load_score_table 读取）。
+
+网格/矩形参数按 RENDER_DPI（200）填写，实际按 CLASSIFY_DPI 渲染：每个格点取其参考像素中心在低分辨率下
+所在的像素，矩形按覆盖范围换算；CLASSIFY_DPI=RENDER_DPI 时与原来逐位一致。
+低于 200 DPI 时取样点沾上的抗锯齿灰边不同，有色列数与矩形无色比例都会变化，判定随之改变
+（示例数据 100 DPI 时 22/48 页的有色列数不同）。因此 batch_process_pdfs 在 dpi < RENDER_DPI 时先用
+compare_dpi 抽查 DPI_CHECK_SAMPLE 个 PDF，与 RENDER_DPI 有任何不一致就改用 RENDER_DPI。
+GRID_CALIBRATION=True 时按每种页面尺寸检测一次坐标轴位置（grid_calibration.py），把网格映射到当前版面。
+
+part 目录的 PDF 列表来自 selection_manifest.list_part_pdfs：attract_pdf_good.py 写入的筛选清单
+（PDF 留在 damage_plots 中原地读取）加上目录中实际存在的 PDF。
 """
 
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Tuple
+from typing import Tuple, Union
+import hashlib
+import json
+import math
+import os
 import shutil
+import time
 
+import numpy as np
+import pandas as pd
 from PIL import Image
 
+import artifact_store
+import grid_calibration
+import image_codec
+import page_cache
+import pdf_index
+from file_ops import bulk_copy, bulk_delete, dataset_cache_dir, format_stats
+from selection_manifest import known_signatures, list_part_pdfs, part_pdf_map, resolve_part_pdf
+
+try:
+    import fitz  # PyMuPDF
+except Exception:
+    fitz = None
+
+try:
+    import pyarrow  # noqa: F401  仅用于判断能否写 Parquet
+    HAS_PARQUET = True
+except Exception:
+    HAS_PARQUET = False
+
+
+# ======== 配置区域（按需修改）========
+RENDER_DPI = 200  # 网格/矩形参数是 200 DPI 渲染下的整页像素坐标（= PDF 点坐标 × 200/72）
+CLASSIFY_DPI = 200  # 实际渲染分辨率：参数按 CLASSIFY_DPI / RENDER_DPI 自动换算，降低可减少渲染量
+# 注意：低于 200 会改变判定——一个像素覆盖的范围更大，贴近坐标轴的格点（第 0 行）会沾到轴线的抗锯齿灰边，
+# 矩形无色比例也会漂移（如 92.92 → 90.11，跨过 RECT_COLORLESS_MAX）。低于 RENDER_DPI 时运行前自动与 200 DPI 对比，
+# 不一致则改用 RENDER_DPI
+DPI_CHECK_SAMPLE = 50  # 上述对比抽查的 PDF 数量（按目录顺序取前 N 个；0 为全部）
+
+GRID_ORIGIN = (193.5, 568)
+GRID_STEP_X = 23.15
+GRID_STEP_Y = 20.0
+GRID_COLS = 25
+GRID_ROWS = 25
+GRID_X_START = 1
+GRID_Y_START = 0
+WHITE_THRESHOLD = 240
+
+GRID2_ENABLE = True
+GRID2_ORIGIN = (840, 568)
+GRID2_STEP_X = 23.15
+GRID2_STEP_Y = 20.0
+GRID2_COLS = 25
+GRID2_ROWS = 25
+GRID2_X_START = 1
+GRID2_Y_START = 0
+
+# 有色列数在 3-5 之间时，再检查该矩形区域的无色比例
+RECT_LEFT = 193
+RECT_TOP = 570
+RECT_RIGHT = 1400
+RECT_BOTTOM = 640
+
+EXCELLENT_MIN_COLORED = 6  # 有色列数 >= 6 直接判为非常好
+BAND_MIN_COLORED = 3  # 有色列数在 [3, 5] 时看矩形无色比例
+BAND_MAX_COLORED = 5
+RECT_COLORLESS_MAX = 93.7  # 矩形无色比例 <= 93.7% 判为非常好
+
+RENDER_FROM_PDF = True  # True: 直接渲染 PDF 识别（不需要先运行 pdf_first_page_to_png.py）
+CLASSIFIER_ENGINE = "raster"  # "raster": 渲染后取像素；"vector": 读取 PDF 矢量图形（不渲染网格）。改用 vector 前先用 compare_engines 确认 0 个不一致
+COMPARE_ENGINES = False  # True: 只对比两种引擎的判定结果，不复制文件
+RENDER_CLIP = True  # True: 只光栅化网格/矩形所在区域（坐标自动换算），结果与整页渲染一致
+CLIP_MARGIN = 2  # 裁剪区域四周额外保留的像素
+SAVE_DEBUG_PNG = False  # True: 直接识别时同时把渲染结果保存为图片（调试用）
+DEBUG_IMAGE_FORMAT = "png"  # 调试图片格式（image_codec.py）："png" / "raw" 无损，可再给 batch_process_images 使用；"jpeg" / "webp" 仅供查看
+DEBUG_PNG_COMPRESS_LEVEL = 1  # png 压缩级别 0-9（1 最快）
+USE_CACHE = True  # True: 复用 .recognition_cache.json 中的判定结果
+RESET_EXCELLENT = False  # True: 旧行为，先清空“非常好”再全部重新复制（手动复制的文件也会被删除）
+SCORE_TABLE_FORMAT = "auto"  # "auto": 有 pyarrow 时写 Parquet，否则 CSV；也可指定 "parquet" / "csv"
+USE_PAGE_CACHE = False  # True: 渲染结果按 PDF 哈希存为 .npy（page_cache.py），改参数重新识别时直接映射读取，不再渲染
+GRID_CALIBRATION = False  # True: 按坐标轴自动校准网格/矩形位置（grid_calibration.py），图版面移动或缩放后仍能取对位置
+CALIBRATION_REFERENCE_PDF = None  # 与上面网格参数对应的参考 PDF；None 时以第一个检测到坐标轴的版面为参考
+# =====================================
+
+ImageSource = Union[Path, str, Image.Image, np.ndarray]
+
+
+def load_rgb_array(image: ImageSource) -> np.ndarray:
+    """接受图片路径（含 .npy）、PIL 图像或 (高, 宽, 3) 数组，统一返回 RGB uint8 数组（已是数组时不复制）"""
+    if isinstance(image, np.ndarray):
+        return image
+    if not isinstance(image, Image.Image):
+        return image_codec.load_image(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return np.asarray(image)
+
+
+def _channel_min(pixels: np.ndarray) -> np.ndarray:
+    """逐像素取 R/G/B 最小值（比沿长度为 3 的末轴 min 快得多）"""
+    return np.minimum(np.minimum(pixels[..., 0], pixels[..., 1]), pixels[..., 2])
+
+
+def _scaled_index(values, scale: float) -> np.ndarray:
+    """RENDER_DPI 下的像素坐标取整后，换算为当前分辨率下包含该像素中心的像素下标（scale=1 时即 np.rint）"""
+    ref = np.rint(values)
+    if scale == 1:
+        return ref.astype(np.intp)
+    return np.floor((ref + 0.5) * scale).astype(np.intp)
+
+
+def _scaled_rect(rect, scale: float) -> Tuple[int, int, int, int]:
+    """RENDER_DPI 下的矩形 (left, top, right, bottom) 换算为当前分辨率下覆盖它的像素范围"""
+    if scale == 1:
+        return tuple(rect)
+    left, top, right, bottom = rect
+    return (math.floor(left * scale), math.floor(top * scale), math.ceil(right * scale), math.ceil(bottom * scale))
+
+
+def grid_column_mins(
+    image: ImageSource,
+    grid_origin: Tuple[float, float],
+    grid_step_x: float,
+    grid_step_y: float,
+    grid_cols: int,
+    grid_rows: int,
+    offset: Tuple[int, int] = (0, 0),
+    scale: float = 1.0,
+) -> np.ndarray:
+    """
+    返回每一列网格点上最暗通道的最小值（长度为 grid_cols 的数组）。
+    某列的值 < 白色阈值，等价于该列至少有一个格点不是白色。
+    取点规则与逐点实现一致：round() 取整（银行家舍入，np.rint 相同）后夹到图像范围内。
+    offset: 图像左上角在整页中的像素坐标（裁剪渲染时使用）；先按整页坐标取整再平移，
+    保证与整页渲染取到同一像素。
+    scale: 图像分辨率 / RENDER_DPI；网格参数仍按 RENDER_DPI 填写，取该像素中心在当前分辨率下所在的像素。
+    """
+    arr = load_rgb_array(image)
+    height, width = arr.shape[:2]
+    ox, oy = grid_origin
+    dx, dy = offset
+    xs = _scaled_index(ox + np.arange(grid_cols) * grid_step_x, scale) - dx
+    ys = _scaled_index(oy - np.arange(grid_rows) * grid_step_y, scale) - dy
+    xs = np.clip(xs, 0, width - 1)
+    ys = np.clip(ys, 0, height - 1)
+    points = arr[ys[:, None], xs[None, :]]  # (rows, cols, 3)
+    return _channel_min(points).min(axis=0)
+
 
 def read_grid_colors(
-    image_path: Path,
+    image_path: ImageSource,
     grid_origin: Tuple[float, float],
     grid_step_x: float,
     grid_step_y: float,
@@ -29,6 +209,7 @@ def read_grid_colors(
     grid_x_start: int,
     grid_y_start: int,
     white_threshold: int = 220,
+    offset: Tuple[int, int] = (0, 0),
 ) -> int:
     """
     按网格逐列扫描，统计有色格点数目。
@@ -41,44 +222,22 @@ def read_grid_colors(
     - grid_rows: 网格行数
     - grid_x_start: 网格坐标系的起始列号
     - grid_y_start: 网格坐标系的起始行号
+    - offset: 图像左上角在整页中的像素坐标（整页图像为 (0, 0)）
 
     返回值：有色格点的数目（整数）
     """
-    img = Image.open(image_path).convert("RGB")
-    pixels = img.load()
-    width, height = img.size
-    ox, oy = grid_origin
-
-    def get_pixel_color(x: float, y: float) -> Tuple[int, int, int]:
-        xi = round(x)
-        yi = round(y)
-        xi = max(0, min(xi, width - 1))
-        yi = max(0, min(yi, height - 1))
-        return pixels[xi, yi][:3]
-
-    def is_white(r: int, g: int, b: int) -> bool:
-        return r >= white_threshold and g >= white_threshold and b >= white_threshold
-
-    colored_count = 0
-    for col in range(grid_cols):
-        for row in range(grid_rows):
-            x = ox + col * grid_step_x
-            y = oy - row * grid_step_y
-            r, g, b = get_pixel_color(x, y)
-            if not is_white(r, g, b):
-                colored_count += 1
-                break
-
-    return colored_count
+    col_mins = grid_column_mins(image_path, grid_origin, grid_step_x, grid_step_y, grid_cols, grid_rows, offset)
+    return int(np.count_nonzero(col_mins < white_threshold))
 
 
 def calculate_colorless_percentage(
-    image_path: Path,
+    image_path: ImageSource,
     rect_left: int,
     rect_top: int,
     rect_right: int,
     rect_bottom: int,
     white_threshold: int = 220,
+    offset: Tuple[int, int] = (0, 0),
 ) -> float:
     """
     计算矩形区域内无色（白色）像素的百分比。
@@ -89,6 +248,7 @@ def calculate_colorless_percentage(
     - rect_right: 矩形右边界像素坐标（不包含）
     - rect_bottom: 矩形下边界像素坐标（不包含）
     - white_threshold: 白色判定阈值（默认220，RGB都大于等于此值认为是白色）
+    - offset: 图像左上角在整页中的像素坐标（整页图像为 (0, 0)）
 
     返回值：
     - 无色像素占整个矩形的百分比（0-100）
@@ -100,141 +260,979 @@ def calculate_colorless_percentage(
             rect_left=0, rect_top=0, rect_right=300, rect_bottom=300
         )
     """
-    img = Image.open(image_path).convert("RGB")
-    pixels = img.load()
-    width, height = img.size
+    hist = rect_histogram(image_path, rect_left, rect_top, rect_right, rect_bottom, offset)
+    return colorless_from_histogram(hist, white_threshold)
+
+
+def rect_histogram(
+    image: ImageSource,
+    rect_left: int,
+    rect_top: int,
+    rect_right: int,
+    rect_bottom: int,
+    offset: Tuple[int, int] = (0, 0),
+    scale: float = 1.0,
+) -> np.ndarray:
+    """
+    矩形区域内每个像素最暗通道值的 256 级直方图。
+    保存直方图后，任意白色阈值下的无色比例都可以直接算出（colorless_from_histogram），无需重新读图。
+    scale: 图像分辨率 / RENDER_DPI（矩形参数按 RENDER_DPI 填写）
+    """
+    arr = load_rgb_array(image)
+    height, width = arr.shape[:2]
+    rect_left, rect_top, rect_right, rect_bottom = _scaled_rect((rect_left, rect_top, rect_right, rect_bottom), scale)
 
-    # 边界处理
-    rect_left = max(0, rect_left)
-    rect_top = max(0, rect_top)
-    rect_right = min(width, rect_right)
-    rect_bottom = min(height, rect_bottom)
+    # 边界处理（先换算到图像自身坐标）
+    dx, dy = offset
+    rect_left = max(0, rect_left - dx)
+    rect_top = max(0, rect_top - dy)
+    rect_right = min(width, rect_right - dx)
+    rect_bottom = min(height, rect_bottom - dy)
 
     if rect_left >= rect_right or rect_top >= rect_bottom:
+        return np.zeros(256, dtype=np.int64)
+    region = arr[rect_top:rect_bottom, rect_left:rect_right]
+    return np.bincount(_channel_min(region).ravel(), minlength=256)
+
+
+def colorless_from_histogram(hist, white_threshold: int) -> float:
+    """无色（三个通道都 >= 阈值，即最暗通道 >= 阈值）像素百分比，保留两位小数；空区域为 0"""
+    hist = np.asarray(hist)
+    total = int(hist.sum())
+    if total == 0:
         return 0.0
+    percentage = (int(hist[white_threshold:].sum()) / total) * 100
+    return round(percentage, 2)
 
-    colorless_count = 0
-    total_count = 0
 
-    for y in range(rect_top, rect_bottom):
-        for x in range(rect_left, rect_right):
-            r, g, b = pixels[x, y][:3]
-            total_count += 1
-            # 判断是否为白色（无色）
-            if r >= white_threshold and g >= white_threshold and b >= white_threshold:
-                colorless_count += 1
+def is_excellent(total_colored: int, rect_colorless: float | None) -> bool:
+    """判定规则：有色列数 >= 6；或有色列数在 3-5 且矩形无色比例 <= 93.7%"""
+    if total_colored >= EXCELLENT_MIN_COLORED:
+        return True
+    if BAND_MIN_COLORED <= total_colored <= BAND_MAX_COLORED:
+        return rect_colorless is not None and rect_colorless <= RECT_COLORLESS_MAX
+    return False
 
-    if total_count == 0:
-        return 0.0
 
-    percentage = (colorless_count / total_count) * 100
-    return round(percentage, 2)
+def _enabled_grids() -> list[tuple[Tuple[float, float], float, float, int, int]]:
+    grids = [(GRID_ORIGIN, GRID_STEP_X, GRID_STEP_Y, GRID_COLS, GRID_ROWS)]
+    if GRID2_ENABLE:
+        grids.append((GRID2_ORIGIN, GRID2_STEP_X, GRID2_STEP_Y, GRID2_COLS, GRID2_ROWS))
+    return grids
+
+
+def default_layout() -> dict:
+    """配置中的网格与矩形：{'grids': [((ox, oy), step_x, step_y, cols, rows), ...], 'rect': (l, t, r, b)}"""
+    return {"grids": _enabled_grids(), "rect": (RECT_LEFT, RECT_TOP, RECT_RIGHT, RECT_BOTTOM)}
+
+
+def classification_region(margin: int = CLIP_MARGIN, layout: dict | None = None, scale: float = 1.0) -> Tuple[int, int, int, int]:
+    """
+    分类实际会读取的整页像素范围 (left, top, right, bottom)，right/bottom 不包含。
+    由网格参数与矩形参数（或校准后的 layout）计算，改配置后自动跟随；scale 为渲染分辨率 / RENDER_DPI。
+    """
+    layout = layout or default_layout()
+    rect_left, rect_top, rect_right, rect_bottom = layout["rect"]
+    xs = [rect_left, rect_right - 1]
+    ys = [rect_top, rect_bottom - 1]
+    for (ox, oy), step_x, step_y, cols, rows in layout["grids"]:
+        xs += [round(ox), round(ox + (cols - 1) * step_x)]
+        ys += [round(oy), round(oy - (rows - 1) * step_y)]
+    left, top, right, bottom = _scaled_rect((min(xs), min(ys), max(xs) + 1, max(ys) + 1), scale)
+    return (
+        max(0, left - margin),
+        max(0, top - margin),
+        right + margin,
+        bottom + margin,
+    )
+
+
+def classify_image(
+    image: ImageSource,
+    offset: Tuple[int, int] = (0, 0),
+    layout: dict | None = None,
+    scale: float = 1.0,
+) -> dict:
+    """
+    对一张首页图像执行完整的分类流程（图像只解码/转换一次）。
+    offset: 图像左上角在整页中的像素坐标（裁剪渲染时由 render_first_page 返回）。
+    layout: 网格与矩形（默认为配置参数，校准时见 grid_calibration.py）；
+    scale: 图像分辨率 / RENDER_DPI（默认 200 DPI 图像）。
+    返回：{'grid1', 'grid2', 'total', 'rect_colorless', 'excellent',
+           'grid1_colmins', 'grid2_colmins', 'rect_hist'}
+    （rect_colorless 仅在有色列数处于 3-5 时用于判定，否则为 None）
+    后三项是特征：每列最暗值与矩形直方图（稀疏字典 {灰度: 像素数}），
+    用于在不重新读图的情况下按其他阈值重新判定（见 score 表与 tune_recognition_thresholds.py）。
+    """
+    img = load_rgb_array(image)
+    layout = layout or default_layout()
+    col_mins = [
+        grid_column_mins(img, origin, step_x, step_y, cols, rows, offset, scale)
+        for origin, step_x, step_y, cols, rows in layout["grids"]
+    ]
+    counts = [int(np.count_nonzero(c < WHITE_THRESHOLD)) for c in col_mins]
+    grid1_colors = counts[0]
+    grid2_colors = counts[1] if GRID2_ENABLE else 0
+    total_colored = grid1_colors + grid2_colors
+    hist = rect_histogram(img, *layout["rect"], offset, scale)
+    rect_colorless = None
+    if BAND_MIN_COLORED <= total_colored <= BAND_MAX_COLORED:
+        rect_colorless = colorless_from_histogram(hist, WHITE_THRESHOLD)
+    return {
+        "grid1": grid1_colors,
+        "grid2": grid2_colors,
+        "total": total_colored,
+        "rect_colorless": rect_colorless,
+        "excellent": is_excellent(total_colored, rect_colorless),
+        "grid1_colmins": col_mins[0].tolist(),
+        "grid2_colmins": col_mins[1].tolist() if GRID2_ENABLE else [],
+        "rect_hist": _sparse_hist(hist),
+    }
+
+
+def _sparse_hist(hist: np.ndarray) -> dict:
+    return {str(value): int(count) for value, count in enumerate(hist) if count}
+
+
+def render_first_page(
+    pdf_path: Path,
+    dpi: int = RENDER_DPI,
+    region: Tuple[int, int, int, int] | None = None,
+) -> tuple[np.ndarray, Tuple[int, int]] | None:
+    """
+    将 PDF 第一页渲染到内存：直接把 pixmap 的原始 RGB 像素作为 (高, 宽, 3) 数组返回，
+    不经过 PNG 编码/解码。空 PDF 返回 None。
+    region: 只渲染该整页像素范围 (left, top, right, bottom)，换算为 PDF 点坐标后作为 clip 传给 PyMuPDF；
+    None 表示整页。
+    返回：(数组, 数组左上角在整页中的像素坐标)
+    """
+    if fitz is None:
+        raise RuntimeError("未安装 PyMuPDF，无法直接渲染 PDF（pip install pymupdf）")
+    with fitz.open(pdf_path) as doc:
+        if doc.page_count == 0:
+            return None
+        page = doc.load_page(0)
+        mat = fitz.Matrix(dpi / 72, dpi / 72)
+        clip = None
+        if region is not None:
+            scale = 72 / dpi
+            clip = fitz.Rect(*(v * scale for v in region)) & page.rect
+            if clip.is_empty:
+                clip = None
+        pix = page.get_pixmap(matrix=mat, alpha=False, colorspace=fitz.csRGB, clip=clip)
+        arr = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        # pix.x / pix.y 为裁剪后 pixmap 左上角在整页像素坐标系中的位置（整页时为 0）
+        return arr, (pix.x, pix.y)
+
+
+def page_layout(page, calibration: dict | None, source=None) -> dict:
+    """页面对应的网格/矩形：未启用校准（calibration 为 None）时为配置参数，否则按坐标轴校准"""
+    if calibration is None:
+        return default_layout()
+    return grid_calibration.layout_for_page(page, calibration, default_layout(), RENDER_DPI / 72, source)
+
+
+def pdf_layout(pdf_path: Path, calibration: dict | None) -> dict:
+    """同 page_layout，按路径打开 PDF 首页"""
+    if calibration is None:
+        return default_layout()
+    with fitz.open(pdf_path) as doc:
+        if doc.page_count == 0:
+            return default_layout()
+        return page_layout(doc.load_page(0), calibration, pdf_path)
+
+
+def classify_pdf_raster(
+    pdf_path: Path,
+    dpi: int = CLASSIFY_DPI,
+    clip: bool = RENDER_CLIP,
+    calibration: dict | None = None,
+) -> dict | None:
+    """栅格引擎：以 dpi 渲染（可裁剪）后按像素分类。空 PDF 返回 None。"""
+    scale = dpi / RENDER_DPI
+    layout = pdf_layout(pdf_path, calibration)
+    rendered = render_first_page(pdf_path, dpi, classification_region(layout=layout, scale=scale) if clip else None)
+    if rendered is None:
+        return None
+    img, offset = rendered
+    result = classify_image(img, offset, layout, scale)
+    result["engine"] = "raster"
+    return result
+
+
+# ---------- 矢量引擎 ----------
+
+BEZIER_STEPS = 8  # 曲线（圆形标记等）折线化的段数
+
+
+def _rgb255(color) -> np.ndarray | None:
+    """get_drawings 的颜色（0-1 浮点，灰度/RGB/CMYK）转为 0-255 的 RGB"""
+    if color is None:
+        return None
+    c = [float(v) for v in color]
+    if len(c) == 1:
+        c = c * 3
+    elif len(c) == 4:
+        cy, m, ye, k = c
+        c = [(1 - cy) * (1 - k), (1 - m) * (1 - k), (1 - ye) * (1 - k)]
+    return np.array(c[:3], dtype=np.float64) * 255
+
+
+def _path_segments(path: dict, scale: float, close: bool) -> np.ndarray:
+    """
+    将路径展平为线段数组 (M, 4)：x1, y1, x2, y2（像素坐标）。
+    close=True（填充）时每个子路径首尾自动闭合。
+    """
+    segs = []
+    start = end = None
+
+    def close_subpath():
+        if close and start is not None and end is not None and start != end:
+            segs.append((*end, *start))
+
+    for item in path["items"]:
+        kind = item[0]
+        if kind in ("re", "qu"):
+            close_subpath()
+            start = end = None
+            if kind == "re":
+                r = item[1]
+                corners = [(r.x0, r.y0), (r.x1, r.y0), (r.x1, r.y1), (r.x0, r.y1)]
+            else:
+                q = item[1]
+                corners = [(q.ul.x, q.ul.y), (q.ur.x, q.ur.y), (q.lr.x, q.lr.y), (q.ll.x, q.ll.y)]
+            for i in range(4):
+                segs.append((*corners[i], *corners[(i + 1) % 4]))
+            continue
+        p_first = (item[1].x, item[1].y)
+        if end is None or p_first != end:
+            close_subpath()
+            start = p_first
+        if kind == "l":
+            pts = [p_first, (item[2].x, item[2].y)]
+        elif kind == "c":
+            p0, p1, p2, p3 = (np.array([p.x, p.y]) for p in item[1:5])
+            t = np.linspace(0, 1, BEZIER_STEPS + 1)[:, None]
+            curve = (1 - t) ** 3 * p0 + 3 * (1 - t) ** 2 * t * p1 + 3 * (1 - t) * t ** 2 * p2 + t ** 3 * p3
+            pts = [tuple(p) for p in curve]
+        else:
+            continue
+        for a, b in zip(pts, pts[1:]):
+            segs.append((*a, *b))
+        end = pts[-1]
+    close_subpath()
+    if not segs:
+        return np.empty((0, 4))
+    return np.array(segs, dtype=np.float64) * scale
+
+
+def _distance_to_segments(px: np.ndarray, py: np.ndarray, segs: np.ndarray) -> np.ndarray:
+    """每个点到线段集合的最短距离"""
+    x1, y1, x2, y2 = (segs[:, i][None, :] for i in range(4))
+    dx, dy = x2 - x1, y2 - y1
+    length2 = dx * dx + dy * dy
+    t = np.where(length2 > 0, ((px[:, None] - x1) * dx + (py[:, None] - y1) * dy) / np.where(length2 > 0, length2, 1), 0)
+    t = np.clip(t, 0, 1)
+    return np.hypot(px[:, None] - (x1 + t * dx), py[:, None] - (y1 + t * dy)).min(axis=1)
+
+
+def _inside_segments(px: np.ndarray, py: np.ndarray, segs: np.ndarray) -> np.ndarray:
+    """射线法（奇偶规则）判断点是否在闭合折线围成的区域内"""
+    x1, y1, x2, y2 = (segs[:, i][None, :] for i in range(4))
+    crosses = (y1 > py[:, None]) != (y2 > py[:, None])
+    denom = np.where(y2 != y1, y2 - y1, 1)
+    x_at = x1 + (py[:, None] - y1) * (x2 - x1) / denom
+    return (crosses & (x_at > px[:, None])).sum(axis=1) % 2 == 1
+
+
+def paint_points_from_drawings(drawings: list[dict], px: np.ndarray, py: np.ndarray, scale: float) -> np.ndarray:
+    """
+    按绘制顺序（画家算法）估算一组像素中心点的最终 RGB 值，返回 (N, 3) 浮点数组。
+    覆盖率按抗锯齿近似：描边 clip(半线宽 + 0.5 - 距离, 0, 1)，填充 clip(0.5 ± 到边界距离, 0, 1)。
+    细于 1 个设备像素的描边按 1 像素计算，与 MuPDF 的实际覆盖率不符；classify_pdf_vector 遇到这类描边时回退到栅格引擎。
+    """
+    state = np.full((len(px), 3), 255.0)
+    for path in drawings:
+        fill = _rgb255(path.get("fill"))
+        stroke = _rgb255(path.get("color"))
+        half_width = max((path.get("width") or 0) * scale, 1.0) / 2
+        bbox = path["rect"]
+        pad = half_width + 1
+        near = (
+            (px >= bbox.x0 * scale - pad) & (px <= bbox.x1 * scale + pad)
+            & (py >= bbox.y0 * scale - pad) & (py <= bbox.y1 * scale + pad)
+        )
+        if not near.any():
+            continue
+        idx = np.flatnonzero(near)
+        qx, qy = px[idx], py[idx]
+        if fill is not None and "f" in path["type"]:
+            segs = _path_segments(path, scale, close=True)
+            if len(segs):
+                dist = _distance_to_segments(qx, qy, segs)
+                signed = np.where(_inside_segments(qx, qy, segs), dist, -dist)
+                alpha = np.clip(0.5 + signed, 0, 1) * (path.get("fill_opacity") or 1.0)
+                state[idx] = state[idx] * (1 - alpha[:, None]) + fill * alpha[:, None]
+        if stroke is not None and "s" in path["type"]:
+            segs = _path_segments(path, scale, close=bool(path.get("closePath")))
+            if len(segs):
+                dist = _distance_to_segments(qx, qy, segs)
+                alpha = np.clip(half_width + 0.5 - dist, 0, 1) * (path.get("stroke_opacity") or 1.0)
+                state[idx] = state[idx] * (1 - alpha[:, None]) + stroke * alpha[:, None]
+    return state
+
+
+def _has_thin_strokes(drawings: list[dict], px: np.ndarray, py: np.ndarray, scale: float) -> bool:
+    """格点附近是否有细于 1 个设备像素的描边（含 0 宽度的细线）"""
+    x0, x1, y0, y1 = px.min() - 2, px.max() + 2, py.min() - 2, py.max() + 2
+    for path in drawings:
+        if "s" not in path["type"] or path.get("color") is None:
+            continue
+        if (path.get("width") or 0) * scale >= 1.0:
+            continue
+        bbox = path["rect"]
+        if bbox.x1 * scale >= x0 and bbox.x0 * scale <= x1 and bbox.y1 * scale >= y0 and bbox.y0 * scale <= y1:
+            return True
+    return False
+
+
+def _grid_pixels(grid, page_size: Tuple[int, int], scale: float = 1.0) -> tuple[np.ndarray, np.ndarray]:
+    """网格全部格点在当前分辨率下的整页像素坐标（与栅格引擎的取整、夹取规则一致），形状 (rows, cols)"""
+    (ox, oy), step_x, step_y, cols, rows = grid
+    width, height = page_size
+    xs = np.clip(_scaled_index(ox + np.arange(cols) * step_x, scale), 0, width - 1)
+    ys = np.clip(_scaled_index(oy - np.arange(rows) * step_y, scale), 0, height - 1)
+    return np.meshgrid(xs, ys)
+
+
+def classify_pdf_vector(pdf_path: Path, dpi: int = CLASSIFY_DPI, calibration: dict | None = None) -> dict | None:
+    """
+    矢量引擎：从 PDF 第一页的绘图路径直接判断每个格点像素是否有色，判定规则同 classify_image。
+    页面含位图、有旋转、或格点附近有细于 1 个设备像素的描边时无法可靠推断，回退到栅格引擎。空 PDF 返回 None。
+    """
+    if fitz is None:
+        raise RuntimeError("未安装 PyMuPDF，无法读取 PDF（pip install pymupdf）")
+    with fitz.open(pdf_path) as doc:
+        if doc.page_count == 0:
+            return None
+        page = doc.load_page(0)
+        if page.rotation or page.get_images():
+            result = classify_pdf_raster(pdf_path, dpi, calibration=calibration)
+            result["engine"] = "raster(fallback)"
+            return result
+        layout = page_layout(page, calibration, pdf_path)
+        scale = dpi / 72
+        page_px = (page.rect * fitz.Matrix(scale, scale)).irect
+        drawings = page.get_drawings()
+
+    # 两个网格的格点合并后一次性按路径计算
+    grid_scale = dpi / RENDER_DPI
+    grids = [_grid_pixels(grid, (page_px.width, page_px.height), grid_scale) for grid in layout["grids"]]
+    px = np.concatenate([gx.ravel() for gx, _ in grids]) + 0.5
+    py = np.concatenate([gy.ravel() for _, gy in grids]) + 0.5
+    if _has_thin_strokes(drawings, px, py, scale):
+        result = classify_pdf_raster(pdf_path, dpi, calibration=calibration)
+        result["engine"] = "raster(fallback)"
+        return result
+    # 栅格像素为整数：四舍五入后 < 阈值即为有色
+    point_mins = np.rint(paint_points_from_drawings(drawings, px, py, scale).min(axis=1))
+    counts, all_col_mins = [], []
+    start = 0
+    for gx, _ in grids:
+        col_mins = point_mins[start:start + gx.size].reshape(gx.shape).min(axis=0).astype(int)
+        all_col_mins.append(col_mins.tolist())
+        counts.append(int(np.count_nonzero(col_mins < WHITE_THRESHOLD)))
+        start += gx.size
+    grid1_colors = counts[0]
+    grid2_colors = counts[1] if GRID2_ENABLE else 0
+    total_colored = grid1_colors + grid2_colors
+
+    rect_colorless = None
+    rect_hist = {}
+    if BAND_MIN_COLORED <= total_colored <= BAND_MAX_COLORED:
+        # 矩形区域含坐标轴文字，按矢量近似误差较大：只渲染这一小条
+        rendered = render_first_page(pdf_path, dpi, _scaled_rect(layout["rect"], grid_scale))
+        if rendered is not None:
+            img, offset = rendered
+            hist = rect_histogram(img, *layout["rect"], offset, grid_scale)
+            rect_colorless = colorless_from_histogram(hist, WHITE_THRESHOLD)
+            rect_hist = _sparse_hist(hist)
+    return {
+        "grid1": grid1_colors,
+        "grid2": grid2_colors,
+        "total": total_colored,
+        "rect_colorless": rect_colorless,
+        "excellent": is_excellent(total_colored, rect_colorless),
+        "grid1_colmins": all_col_mins[0],
+        "grid2_colmins": all_col_mins[1] if GRID2_ENABLE else [],
+        "rect_hist": rect_hist,  # 不在 3-5 区间时不渲染矩形，直方图为空
+        "engine": "vector",
+    }
+
+
+def classify_pdf(
+    pdf_path: Path,
+    engine: str = CLASSIFIER_ENGINE,
+    dpi: int = CLASSIFY_DPI,
+    calibration: dict | None = None,
+) -> dict | None:
+    """按引擎名称分类单个 PDF"""
+    if engine == "vector":
+        return classify_pdf_vector(pdf_path, dpi, calibration)
+    if engine == "raster":
+        return classify_pdf_raster(pdf_path, dpi, calibration=calibration)
+    raise ValueError(f"未知的分类引擎: {engine}")
+
+
+def compare_dpi(
+    base_path: Path,
+    dpi: int = CLASSIFY_DPI,
+    sample: int = DPI_CHECK_SAMPLE,
+    calibration: dict | None = None,
+) -> list[dict]:
+    """
+    降低分辨率的一致性检查：前 sample 个 PDF（0 为全部）分别按 dpi 与 RENDER_DPI 用栅格引擎识别，
+    返回有色列数或判定不一致的记录 [{'pdf', 'reference', 'lowered'}, ...]。
+    """
+    mismatches = []
+    checked = 0
+    for _, _, part_dir in _iter_part_dirs(base_path):
+        for pdf_path in list_part_pdfs(part_dir):
+            if sample and checked >= sample:
+                break
+            reference = classify_pdf_raster(pdf_path, RENDER_DPI, calibration=calibration)
+            lowered = classify_pdf_raster(pdf_path, dpi, calibration=calibration)
+            if reference is None or lowered is None:
+                continue
+            checked += 1
+            if (reference["grid1"], reference["grid2"], reference["excellent"]) != (lowered["grid1"], lowered["grid2"], lowered["excellent"]):
+                mismatches.append({"pdf": pdf_path, "reference": reference, "lowered": lowered})
+    if checked:
+        print(f"分辨率检查：{checked} 个 PDF，{dpi} DPI 与 {RENDER_DPI} DPI 不一致 {len(mismatches)} 个")
+    return mismatches
+
+
+def compare_engines(base_path: Path, dpi: int = CLASSIFY_DPI) -> list[dict]:
+    """
+    一致性检查：对所有 part 目录下的 PDF 同时运行两种引擎，返回判定或有色列数不一致的记录
+    [{'pdf', 'raster', 'vector'}, ...]，并打印一致率与两种引擎的耗时。
+    """
+    mismatches = []
+    checked = 0
+    timings = {"raster": 0.0, "vector": 0.0}
+    for _, _, part_dir in _iter_part_dirs(base_path):
+        for pdf_path in list_part_pdfs(part_dir):
+            results = {}
+            for engine in ("raster", "vector"):
+                start = time.perf_counter()
+                results[engine] = classify_pdf(pdf_path, engine, dpi)
+                timings[engine] += time.perf_counter() - start
+            raster, vector = results["raster"], results["vector"]
+            if raster is None or vector is None:
+                continue
+            checked += 1
+            if (raster["grid1"], raster["grid2"], raster["excellent"]) != (vector["grid1"], vector["grid2"], vector["excellent"]):
+                mismatches.append({"pdf": pdf_path, "raster": raster, "vector": vector})
+                print(f"  ⚠️ 不一致: {pdf_path}")
+                print(f"     raster: {raster['grid1']}+{raster['grid2']} -> {raster['excellent']}; "
+                      f"vector: {vector['grid1']}+{vector['grid2']} -> {vector['excellent']}")
+    if checked:
+        print(f"一致性检查：{checked} 个 PDF，不一致 {len(mismatches)} 个（一致率 {(checked - len(mismatches)) / checked:.1%}）")
+        print(f"平均耗时：raster {timings['raster'] / checked * 1000:.1f} ms，vector {timings['vector'] / checked * 1000:.1f} ms")
+    return mismatches
+
+
+def _print_result(result: dict) -> None:
+    print(f"  Grid 1 colored points: {result['grid1']}")
+    if GRID2_ENABLE:
+        print(f"  Grid 2 colored points: {result['grid2']}")
+    print(f"  Total colored points in both grids: {result['total']}")
+    if result["rect_colorless"] is not None:
+        print(f"  Rect colorless: {result['rect_colorless']}%")
+
+
+# ---------- 结果缓存与“非常好”目录同步 ----------
 
+CACHE_NAME = "recognition_cache.json"  # 位于数据集缓存目录（files_debug/.cache）下
+EXCELLENT_DIR = "非常好"
 
-def batch_process_images(base_path: Path):
-    GRID_ORIGIN = (193.5, 568)
-    GRID_STEP_X = 23.15
-    GRID_STEP_Y = 20.0
-    GRID_COLS = 25
-    GRID_ROWS = 25
-    GRID_X_START = 1
-    GRID_Y_START = 0
-    WHITE_THRESHOLD = 240
-
-    GRID2_ENABLE = True
-    GRID2_ORIGIN = (840, 568)
-    GRID2_STEP_X = 23.15
-    GRID2_STEP_Y = 20.0
-    GRID2_COLS = 25
-    GRID2_ROWS = 25
-    GRID2_X_START = 1
-    GRID2_Y_START = 0
+
+def classifier_params(engine: str, dpi: int, source: str = "pdf", calibration: dict | None = None) -> dict:
+    """影响判定结果的全部参数；任一参数变化都会使缓存失效"""
+    params = {
+        "version": 2,  # 结果字段变化时递增，使旧缓存失效
+        "source": source,
+        "engine": engine,
+        "dpi": dpi,
+        "grids": [[list(origin), step_x, step_y, cols, rows] for origin, step_x, step_y, cols, rows in _enabled_grids()],
+        "white_threshold": WHITE_THRESHOLD,
+        "rect": [RECT_LEFT, RECT_TOP, RECT_RIGHT, RECT_BOTTOM],
+        "rule": [EXCELLENT_MIN_COLORED, BAND_MIN_COLORED, BAND_MAX_COLORED, RECT_COLORLESS_MAX],
+    }
+    if calibration is not None:
+        # 参考版面变化后各版面的网格位置都会变化
+        params["calibration"] = (calibration["reference"] or {}).get("frames")
+    return params
+
+
+def params_key(params: dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _load_cache(base_path: Path) -> dict:
+    cache_path = dataset_cache_dir(base_path) / CACHE_NAME
+    cache = {}
+    if cache_path.exists():
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except Exception as e:
+            print(f"⚠️ 读取识别缓存失败，将重建: {cache_path} - {e}")
+            cache = {}
+    for key in ("files", "results", "auto_copied"):
+        cache.setdefault(key, {})
+    return cache
+
+
+def _save_cache(base_path: Path, cache: dict) -> None:
+    """先写临时文件再替换，中途中断也不会留下损坏的缓存"""
+    cache_path = dataset_cache_dir(base_path) / CACHE_NAME
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+
+def _prune_cache(cache: dict, seen_files: set[str], seen_parts: set[str], suffix: str | tuple[str, ...]) -> None:
+    """
+    整批运行结束后移除已不存在文件的签名、已不存在 part 的复制记录，以及不再被任何文件引用的判定结果。
+    只清理本次运行的输入类型（suffix，.pdf 或图片扩展名），两种流程共用一个缓存文件时互不影响。
+    """
+    cache["files"] = {
+        rel: sig for rel, sig in cache["files"].items() if rel in seen_files or not rel.endswith(suffix)
+    }
+    cache["auto_copied"] = {part: names for part, names in cache["auto_copied"].items() if part in seen_parts and names}
+    live = {sig["sha1"] for sig in cache["files"].values()}
+    cache["results"] = {key: res for key, res in cache["results"].items() if key.split(":", 1)[0] in live}
+
+
+def reconcile_excellent(
+    part_dir: Path,
+    excellent_pdfs: list[Path],
+    auto_copied: set[str],
+    undecided: set[str] = frozenset(),
+) -> set[str]:
+    """
+    按本次判定结果同步 part_dir/非常好，返回同步后由本脚本复制的文件名集合。
+    - 之前自动复制、现在不再是“非常好”的文件：删除
+    - undecided：本次无法判定（读取或分类失败）的文件名；之前自动复制的保持原样，不删除
+    - 新判为“非常好”且目录中没有同名文件：复制
+    - 自动复制过但源 PDF 内容已变化：重新复制
+    - 目录中的其他文件（手动复制）不动；自动复制后被手动删除的文件不再复制回来
+    复制与删除各自批量执行（file_ops），同一磁盘上复制为硬链接，不写入数据。
+    """
+    target_dir = part_dir / EXCELLENT_DIR
+    desired = {pdf.name: pdf for pdf in excellent_pdfs}
+    kept = set()
+    removals = []
+    for name in sorted(auto_copied):
+        target = target_dir / name
+        if name in undecided and name not in desired:
+            if target.exists():
+                kept.add(name)
+        elif name not in desired:
+            if target.exists():
+                removals.append(target)
+        elif target.exists():
+            kept.add(name)
+
+    copies, updates = [], set()
+    for name, pdf_path in desired.items():
+        target = target_dir / name
+        if name in kept:
+            src, dst = pdf_path.stat(), target.stat()
+            if (src.st_size, src.st_mtime_ns) != (dst.st_size, dst.st_mtime_ns):
+                copies.append((pdf_path, target))
+                updates.add(name)
+            continue
+        if name in auto_copied or target.exists():
+            continue
+        if pdf_path.exists():
+            copies.append((pdf_path, target))
+        else:
+            print(f"  ⚠️ PDF not found: {pdf_path}")
+
+    def report_removed(path, error):
+        if error is None:
+            print(f"  🗑️ Removed (no longer excellent): {path}")
+        else:
+            print(f"  ❌ 删除失败: {path} - {error}")
+
+    def report_copied(src, dst, method, error):
+        if error is not None:
+            print(f"  ❌ 复制失败: {src} - {error}")
+        elif dst.name in updates:
+            print(f"  🔄 Updated copy: {dst}")
+        else:
+            kept.add(dst.name)
+            print(f"  ✅ Copied PDF to: {dst}")
+
+    bulk_delete(removals, on_done=report_removed)
+    if copies:
+        target_dir.mkdir(parents=True, exist_ok=True)
+        stats = bulk_copy(copies, on_done=report_copied)
+        print(f"  📦 {format_stats(stats)}")
+    return kept
+
+
+def _iter_part_dirs(base_path: Path):
+    """遍历 number/category/partxx，返回 (number, category, part_dir)"""
     for number_dir in sorted(base_path.iterdir()):
-        if not number_dir.is_dir():
+        if not number_dir.is_dir() or number_dir.name.startswith("."):
             continue
         for category_dir in sorted(number_dir.iterdir()):
-            if not category_dir.is_dir():
+            if not category_dir.is_dir() or category_dir.name.startswith("."):
                 continue
             # 遍历所有 partxx 目录
             for part_dir in sorted(category_dir.iterdir()):
                 if not part_dir.is_dir() or not part_dir.name.startswith("part"):
                     continue
-                # 构建 part_dir / number_category_partxx_img 目录路径
-                number = number_dir.name
-                category = category_dir.name
-                img_subdir = base_path/number/category/part_dir.name / f"{number}_{category}_{part_dir.name}_img"
-                #清空非常好文件夹
-                target_dir = part_dir / "非常好"
-                if target_dir.exists():
-                    shutil.rmtree(target_dir)
-                if not img_subdir.exists():
-                    continue
-                for img_file in sorted(img_subdir.glob("*.png")):
-                    print(f"Processing image: {img_file}")
-                    grid1_colors = read_grid_colors(
-                        img_file,
-                        GRID_ORIGIN,
-                        GRID_STEP_X,
-                        GRID_STEP_Y,
-                        GRID_COLS,
-                        GRID_ROWS,
-                        GRID_X_START,
-                        GRID_Y_START,
-                        white_threshold=WHITE_THRESHOLD,
-                    )
-                    print(f"  Grid 1 colored points: {grid1_colors}")
-
-                    grid2_colors = 0
-                    if GRID2_ENABLE:
-                        grid2_colors = read_grid_colors(
-                            img_file,
-                            GRID2_ORIGIN,
-                            GRID2_STEP_X,
-                            GRID2_STEP_Y,
-                            GRID2_COLS,
-                            GRID2_ROWS,
-                            GRID2_X_START,
-                            GRID2_Y_START,
-                            white_threshold=WHITE_THRESHOLD,
-                        )
-                        print(f"  Grid 2 colored points: {grid2_colors}")
-
-                    total_colored = grid1_colors + grid2_colors
-                    print(f"  Total colored points in both grids: {total_colored}")
-                    if total_colored >= 6:
-                        # 复制同名PDF到“非常好”文件夹
-                        target_dir = part_dir / "非常好"
-                        target_dir.mkdir(parents=True, exist_ok=True)
-                        pdf_path = part_dir / (img_file.stem + ".pdf")
-                        if pdf_path.exists():
-                            shutil.copy2(pdf_path, target_dir / pdf_path.name)
-                            print(f"  ✅ Copied PDF to: {target_dir / pdf_path.name}")
-                        else:
-                            print(f"  ⚠️ PDF not found for image: {pdf_path}")
-                    if total_colored <= 2:
-                        continue
-                    if total_colored <= 5 and total_colored >= 3:
-                        rect_colorless = calculate_colorless_percentage(
-                            img_file,
-                            rect_left=193,
-                            rect_top=570,
-                            rect_right=1400,
-                            rect_bottom=640,
-                            white_threshold=WHITE_THRESHOLD,
-                        )
-                        if rect_colorless <= 93.7:
-                            # 复制同名PDF到“非常好”文件夹
-                            target_dir = part_dir / "非常好"
-                            target_dir.mkdir(parents=True, exist_ok=True)
-                            pdf_path = part_dir / (img_file.stem + ".pdf")
-                            if pdf_path.exists():
-                                shutil.copy2(pdf_path, target_dir / pdf_path.name)
-                                print(f"  ✅ Copied PDF to: {target_dir / pdf_path.name}")
-                            else:
-                                print(f"  ⚠️ PDF not found for image: {pdf_path}")
-                         
+                yield number_dir.name, category_dir.name, part_dir
+
+
+# ---------- 特征表 ----------
+
+SCORE_TABLE_NAME = "recognition_scores"  # 位于数据集缓存目录（.cache），扩展名 .parquet 或 .csv
+
+
+def score_row(base_path: Path, input_path: Path, pdf_path: Path, signature: dict, result: dict, cached: bool) -> dict:
+    """单个 PDF 的特征表行：路径与样本信息、判定、耗时、每列最暗值（展开为列）、矩形直方图（JSON）"""
+    part_dir = pdf_path.parent
+    row = {
+        "pdf": pdf_path.relative_to(base_path).as_posix(),
+        "input": input_path.relative_to(base_path).as_posix(),
+        "sample": part_dir.parent.parent.name,
+        "category": part_dir.parent.name,
+        "part": part_dir.name,
+        "sha1": signature["sha1"],
+        "engine": result.get("engine", "raster"),
+        "grid1": result["grid1"],
+        "grid2": result["grid2"],
+        "total": result["total"],
+        "rect_colorless": result["rect_colorless"],
+        "excellent": result["excellent"],
+        "render_ms": result.get("render_ms"),
+        "elapsed_ms": result.get("elapsed_ms"),
+        "cached": cached,
+    }
+    for grid in ("grid1", "grid2"):
+        for i, value in enumerate(result.get(f"{grid}_colmins", [])):
+            row[f"{grid}_c{i:02d}"] = value
+    row["rect_hist"] = json.dumps(result.get("rect_hist", {}))
+    return row
+
+
+def write_score_table(base_path: Path, rows: list[dict], fmt: str = SCORE_TABLE_FORMAT) -> Path | None:
+    """写出特征表（先写临时文件再替换），返回文件路径；没有任何行时不写"""
+    if not rows:
+        return None
+    if fmt == "auto":
+        fmt = "parquet" if HAS_PARQUET else "csv"
+    path = dataset_cache_dir(base_path) / f"{SCORE_TABLE_NAME}.{fmt}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    df = pd.DataFrame(rows)
+    if fmt == "parquet":
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_csv(tmp_path, index=False, encoding="utf-8-sig")
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_score_table(base_path: Path) -> pd.DataFrame:
+    """读取特征表（Parquet 与 CSV 同时存在时取较新的一个）"""
+    candidates = [dataset_cache_dir(base_path) / f"{SCORE_TABLE_NAME}.{ext}" for ext in ("parquet", "csv")]
+    candidates = [p for p in candidates if p.exists()]
+    if not candidates:
+        raise FileNotFoundError(f"未找到特征表，请先运行识别: {dataset_cache_dir(base_path) / SCORE_TABLE_NAME}.*")
+    path = max(candidates, key=lambda p: p.stat().st_mtime_ns)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path, encoding="utf-8-sig")
+
+
+def _img_subdir(part_dir: Path) -> Path:
+    """part_dir / number_category_partxx_img（pdf_first_page_to_png.py 的输出目录）"""
+    return image_codec.first_page_image_dir(part_dir)
+
+
+def _process_part(
+    base_path: Path,
+    part_dir: Path,
+    sources: list[tuple[Path, Path]],
+    classify,
+    cache: dict,
+    pkey: str,
+    use_cache: bool,
+    reset: bool,
+    seen_files: set[str],
+    score_rows: list[dict],
+    signatures: dict[Path, dict],
+    run_results: dict | None,
+) -> None:
+    """
+    分类一个 part 目录下的输入文件并同步“非常好”目录，特征表行追加到 score_rows。
+    sources: [(被分类的文件, 对应的 PDF), ...]；classify(被分类的文件, 文件签名) -> 结果字典或 None
+    signatures: 由 pdf_index 预先算好的文件签名（缺失表示无法读取）
+    run_results: 本次运行已分类的结果 {结果键: (结果, 文件)}，内容相同的文件直接复用；None 表示不复用
+    """
+    part_key = part_dir.relative_to(base_path).as_posix()
+    if reset:
+        #清空非常好文件夹
+        target_dir = part_dir / EXCELLENT_DIR
+        if target_dir.exists():
+            shutil.rmtree(target_dir)
+        cache["auto_copied"].pop(part_key, None)
+
+    excellent = []
+    undecided = set()  # 本次读取或分类失败的 PDF：保留之前的“非常好”副本
+    for input_path, pdf_path in sources:
+        rel = input_path.relative_to(base_path).as_posix()
+        seen_files.add(rel)
+        signature = signatures.get(input_path)
+        if signature is None:
+            undecided.add(pdf_path.name)
+            continue
+        cache["files"][rel] = signature
+        result_key = f"{signature['sha1']}:{pkey}"
+        duplicate = run_results.get(result_key) if run_results is not None else None
+        result = cache["results"].get(result_key) if use_cache else None
+        cached = result is not None
+        if duplicate is not None:
+            result, first_path = duplicate
+            cached = True
+            print(f"Duplicate: {input_path} -> same content as {first_path}, excellent={result['excellent']}")
+        elif cached:
+            print(f"Cached: {input_path} -> total {result['total']}, excellent={result['excellent']}")
+        else:
+            print(f"Processing: {input_path}")
+            start = time.perf_counter()
+            try:
+                result = classify(input_path, signature)
+            except Exception as e:
+                print(f"  ❌ Failed to classify {input_path}: {e}")
+                undecided.add(pdf_path.name)
+                continue
+            if result is None:
+                print("  ⚠️ Empty PDF, skipped")
+                continue
+            result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            _print_result(result)
+            cache["results"][result_key] = result
+        if run_results is not None:
+            run_results.setdefault(result_key, (result, input_path))
+        score_rows.append(score_row(base_path, input_path, pdf_path, signature, result, cached))
+        if result["excellent"]:
+            if pdf_path.exists():
+                excellent.append(pdf_path)
+            else:
+                print(f"  ⚠️ PDF not found: {pdf_path}")
+
+    auto_copied = set(cache["auto_copied"].get(part_key, []))
+    cache["auto_copied"][part_key] = sorted(reconcile_excellent(part_dir, excellent, auto_copied, undecided))
+
+
+def _index_sources(base_path: Path, parts: list[tuple[Path, list]], cache: dict) -> dict[Path, dict]:
+    """
+    一次性计算全部输入文件的签名并写入 pdf_index（线程池并行；大小与修改时间未变的文件不读内容）。
+    索引中没有记录时沿用识别缓存或筛选清单中的签名。
+    """
+    known = {}
+    for part_dir, sources in parts:
+        known.update(known_signatures(part_dir))  # attract_pdf_good 写清单时已算过的哈希
+        for input_path, _ in sources:
+            rel = input_path.relative_to(base_path).as_posix()
+            if rel in cache["files"]:
+                known[input_path] = cache["files"][rel]
+    inputs = [input_path for _, sources in parts for input_path, _ in sources]
+    conn = pdf_index.open_index(base_path)
+    try:
+        signatures = pdf_index.index_files(conn, base_path, inputs, known)
+        pdf_index.prune(conn, base_path)
+    finally:
+        conn.close()
+    unique = len({sig["sha1"] for sig in signatures.values()})
+    if unique < len(signatures):
+        print(f"🔁 {len(signatures)} 个文件中有 {len(signatures) - unique} 个与其他路径内容相同，只分类 {unique} 个不同文件")
+    return signatures
+
+
+def _run_batch(
+    base_path: Path,
+    collect_sources,
+    classify,
+    params: dict,
+    use_cache: bool,
+    reset: bool,
+    dedupe: bool = True,
+) -> None:
+    """
+    遍历所有 part 目录；缓存在每个 part 处理完后落盘，整批结束时清理失效条目。
+    dedupe=True 时内容相同的文件（damage_plots 原件、part 副本、重复交付……）本次运行只分类一次，
+    结果分发给所有路径（即使不使用结果缓存）。
+    """
+    suffix = ".pdf" if params["source"] == "pdf" else image_codec.IMAGE_SUFFIXES
+    cache = _load_cache(base_path)
+    pkey = params_key(params)
+    seen_files, seen_parts = set(), set()
+    score_rows = []
+    parts = []
+    for number, category, part_dir in _iter_part_dirs(base_path):
+        seen_parts.add(part_dir.relative_to(base_path).as_posix())
+        parts.append((part_dir, collect_sources(number, category, part_dir)))
+    signatures = _index_sources(base_path, parts, cache)
+    run_results = {} if dedupe else None
+    for part_dir, sources in parts:
+        _process_part(
+            base_path, part_dir, sources, classify, cache, pkey, use_cache, reset, seen_files, score_rows,
+            signatures, run_results,
+        )
+        _save_cache(base_path, cache)
+    _prune_cache(cache, seen_files, seen_parts, suffix)
+    _save_cache(base_path, cache)
+    score_path = write_score_table(base_path, score_rows)
+    if score_path is not None:
+        print(f"📊 特征表已写入: {score_path}（{len(score_rows)} 行）")
+
+
+def _set_calibration_reference(calibration: dict, pdf_path) -> bool:
+    with fitz.open(pdf_path) as doc:
+        if doc.page_count == 0:
+            return False
+        return grid_calibration.set_reference(calibration, doc.load_page(0), pdf_path)
+
+
+def _ensure_calibration_reference(base_path: Path, calibration: dict) -> None:
+    """批处理开始前确定参考版面（它是缓存参数的一部分，不能在处理过程中才确定）"""
+    for _, _, part_dir in _iter_part_dirs(base_path):
+        for pdf_path in list_part_pdfs(part_dir):
+            if calibration["reference"] is not None:
+                return
+            pdf_layout(pdf_path, calibration)
+
+
+def batch_process_pdfs(
+    base_path: Path,
+    dpi: int = CLASSIFY_DPI,
+    save_png: bool = SAVE_DEBUG_PNG,
+    clip: bool = RENDER_CLIP,
+    engine: str = CLASSIFIER_ENGINE,
+    use_cache: bool = USE_CACHE,
+    reset: bool = RESET_EXCELLENT,
+    page_cache_dir: Path | None = None,
+    calibrate: bool = GRID_CALIBRATION,
+):
+    """
+    直接识别 part 目录下的 PDF：渲染首页到内存后立即分类，不读写中间 PNG。
+    clip=True 时只渲染分类所需区域；engine="vector" 时改用矢量引擎（不渲染网格区域）。
+    save_png=True 时把整页渲染结果保存到 <number>_<category>_<part>_img 目录（调试用，此时不裁剪、
+    不使用缓存，保存的 PNG 可直接给 batch_process_images 使用）。
+    page_cache_dir 不为 None 时（USE_PAGE_CACHE=True 默认为 <base_path>/.cache/page_cache），渲染结果按
+    PDF 哈希保存为 .npy，之后改阈值等参数重新识别时直接内存映射读取。
+    dpi 低于 RENDER_DPI 时网格参数自动换算（保存的调试 PNG 也是该分辨率，只有 dpi=RENDER_DPI 时可给
+    batch_process_images 使用）。dpi < RENDER_DPI 时先用 compare_dpi 抽查，判定有任何不一致就改用 RENDER_DPI。
+    calibrate=True 时按坐标轴校准每种版面的网格位置，校准结果保存在 <base_path>/.cache/grid_calibration.json。
+    """
+    base_path = Path(base_path)
+    if dpi <= 0:
+        raise ValueError(f"无效的分辨率: {dpi}")
+    calibration = None
+    if calibrate:
+        calibration = grid_calibration.load_calibration(base_path)
+        if CALIBRATION_REFERENCE_PDF is not None and not _set_calibration_reference(calibration, CALIBRATION_REFERENCE_PDF):
+            print(f"⚠️ 参考 PDF 中没有检测到坐标轴，改为自动选择参考版面: {CALIBRATION_REFERENCE_PDF}")
+        _ensure_calibration_reference(base_path, calibration)
+    if dpi < RENDER_DPI and compare_dpi(base_path, dpi, calibration=calibration):
+        print(f"⚠️ {dpi} DPI 的判定与 {RENDER_DPI} DPI 不一致，改用 {RENDER_DPI} DPI")
+        dpi = RENDER_DPI
+    scale = dpi / RENDER_DPI
+    if page_cache_dir is None and USE_PAGE_CACHE:
+        page_cache_dir = page_cache.default_cache_dir(base_path)
+
+    png_dirs = {}  # PDF -> 调试 PNG 目录（清单中的 PDF 位于 damage_plots，不能按 PDF 所在目录推断）
+
+    def collect_sources(number, category, part_dir):
+        pdfs = list_part_pdfs(part_dir)
+        png_dirs.update((pdf_path, _img_subdir(part_dir)) for pdf_path in pdfs)
+        return [(pdf_path, pdf_path) for pdf_path in pdfs]
+
+    def classify(pdf_path, signature):
+        if engine == "vector" and not save_png:
+            return classify_pdf_vector(pdf_path, dpi, calibration)
+        layout = pdf_layout(pdf_path, calibration)
+        region = classification_region(layout=layout, scale=scale) if clip and not save_png else None
+        start = time.perf_counter()
+        if page_cache_dir is not None:
+            rendered = page_cache.cached_render(render_first_page, pdf_path, signature["sha1"], dpi, region, page_cache_dir)
+        else:
+            rendered = render_first_page(pdf_path, dpi, region)
+        if rendered is None:
+            return None
+        render_ms = round((time.perf_counter() - start) * 1000, 3)
+        img, offset = rendered
+        if save_png:
+            img_subdir = png_dirs[pdf_path]
+            img_subdir.mkdir(parents=True, exist_ok=True)
+            debug_path = image_codec.output_path(img_subdir, pdf_path.stem, DEBUG_IMAGE_FORMAT)
+            image_codec.encode_image(img, debug_path, DEBUG_IMAGE_FORMAT, compress_level=DEBUG_PNG_COMPRESS_LEVEL)
+            image_codec.remove_other_formats(debug_path)
+            artifact_store.register(debug_path, base_path, "image")
+        result = classify_image(img, offset, layout, scale)
+        result["render_ms"] = render_ms
+        return result
+
+    params = classifier_params(engine, dpi, calibration=calibration)
+    # 保存调试 PNG 时每个路径都要各自输出一张，不复用
+    _run_batch(base_path, collect_sources, classify, params, use_cache and not save_png, reset, dedupe=not save_png)
+    if calibration is not None:
+        grid_calibration.save_calibration(base_path, calibration)
+
+
+def batch_process_images(base_path: Path, use_cache: bool = USE_CACHE, reset: bool = RESET_EXCELLENT):
+    """
+    读取 pdf_first_page_to_png.py 导出的图片进行识别（缓存按图片内容哈希）。
+    同名的多种格式同时存在时取最新的一个；有损格式（jpeg / webp）的结果可能与直接识别 PDF 不同。
+    """
+    base_path = Path(base_path)
+
+    def collect_sources(number, category, part_dir):
+        img_subdir = _img_subdir(part_dir)
+        if not img_subdir.exists():
+            return []
+        latest = {}
+        for img_file in img_subdir.iterdir():
+            if img_file.suffix.lower() in image_codec.IMAGE_SUFFIXES and img_file.is_file():
+                current = latest.get(img_file.stem)
+                if current is None or img_file.stat().st_mtime_ns > current.stat().st_mtime_ns:
+                    latest[img_file.stem] = img_file
+        artifact_store.touch_many(latest.values())  # 用到的图片不会被按 LRU 优先清理
+        pdfs = part_pdf_map(part_dir)
+        return [(latest[stem], resolve_part_pdf(part_dir, stem + ".pdf", pdfs)) for stem in sorted(latest)]
+
+    def classify(img_file, signature):
+        return classify_image(img_file)
+
+    _run_batch(base_path, collect_sources, classify, classifier_params("raster", RENDER_DPI, "png"), use_cache, reset)
+
+
 if __name__ == "__main__":
     # 示例：按需替换为自己的参数（与 image_point_color_check 一致）
     BASE_PATH = Path("files_debug")
-    batch_process_images(BASE_PATH)
-
+    if COMPARE_ENGINES:
+        compare_engines(BASE_PATH)
+    elif RENDER_FROM_PDF:
+        batch_process_pdfs(BASE_PATH)
+    else:
+        batch_process_images(BASE_PATH)
@@ -0,0 +1,261 @@
+"""
+临时产物登记与清理（磁盘预算 + LRU）
+
+渲染产生的临时文件（首页图片 *_img/、渲染缓存 .cache/page_cache/ 及其 .json 附属文件、预览缓存 .cache/preview_cache/）在生成时登记到
+一个 SQLite 登记表（默认为运行目录下的 .artifact_store.sqlite），记录所属数据集、类型、大小、
+最后访问时间；读取时更新访问时间。清理时只查登记表，不需要遍历整个目录树：
+- enforce_budget(预算)：总大小超过预算时，按最后访问时间从旧到新删除（LRU）
+- purge(数据集, 类型)：删除某个数据集（或某一类）的全部产物
+- adopt(数据集)：登记表建立之前已存在的产物只需扫描一次（每个数据集只扫描一次）
+
+类型：image（pdf_first_page_to_png / 识别调试图片）、page_cache（.npy，附属 .json 一并删除）、
+preview（分类工具的预览 JPEG）
+
+登记失败（例如数据库被锁）只输出警告，不影响渲染本身。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from file_ops import bulk_delete
+from image_codec import IMAGE_SUFFIXES
+
+
+# ======== 配置区域（按需修改）========
+REGISTRY_PATH = Path(".artifact_store.sqlite")  # 与 files_debug 等数据集目录同级（在项目根目录运行）
+IMG_SUBDIR_SUFFIX = "_img"  # 首页图片目录：{number}_{category}_{part}_img
+# =====================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    path TEXT PRIMARY KEY,
+    dataset TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    sidecars TEXT,
+    created_ns INTEGER NOT NULL,
+    last_access_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_access ON artifacts (last_access_ns);
+CREATE INDEX IF NOT EXISTS artifacts_dataset ON artifacts (dataset, kind);
+CREATE TABLE IF NOT EXISTS adopted (dataset TEXT PRIMARY KEY, adopted_ns INTEGER NOT NULL);
+"""
+
+_local = threading.local()  # 每个线程各自的连接（预览预取线程、Streamlit 脚本线程也会登记）
+_warned = False
+
+
+def _key(path) -> str:
+    return os.path.abspath(path)
+
+
+def _connection() -> sqlite3.Connection:
+    """当前线程的登记表连接（sqlite3 连接不能跨线程使用；进程池中的每个子进程也各自打开）"""
+    path = _key(REGISTRY_PATH)
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != path:
+        conn = sqlite3.connect(path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        _local.conn, _local.path = conn, path
+    return conn
+
+
+def _warn(e: Exception) -> None:
+    global _warned
+    if not _warned:
+        print(f"  ⚠️ 临时产物登记失败（不影响结果）: {e}")
+        _warned = True
+
+
+def register_many(items, dataset, kind: str) -> None:
+    """
+    登记新生成（或覆盖）的产物。
+    items: [路径, ...] 或 [(路径, [附属文件, ...]), ...]；附属文件计入大小并随主文件一起删除。
+    """
+    now = time.time_ns()
+    rows = []
+    for item in items:
+        path, sidecars = (item, []) if isinstance(item, (str, os.PathLike)) else item
+        try:
+            size = os.stat(path).st_size + sum(os.stat(s).st_size for s in sidecars)
+        except OSError:
+            continue
+        rows.append((_key(path), _key(dataset), kind, size, json.dumps([_key(s) for s in sidecars]) if sidecars else None, now, now))
+    if not rows:
+        return
+    try:
+        conn = _connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO artifacts (path, dataset, kind, size, sidecars, created_ns, last_access_ns) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+    except sqlite3.Error as e:
+        _warn(e)
+
+
+def register(path, dataset, kind: str, sidecars=()) -> None:
+    register_many([(path, list(sidecars))], dataset, kind)
+
+
+def touch_many(paths) -> None:
+    """更新最后访问时间（未登记的路径忽略）"""
+    now = time.time_ns()
+    rows = [(now, _key(p)) for p in paths]
+    if not rows:
+        return
+    try:
+        conn = _connection()
+        with conn:
+            conn.executemany("UPDATE artifacts SET last_access_ns = ? WHERE path = ?", rows)
+    except sqlite3.Error as e:
+        _warn(e)
+
+
+def touch(path) -> None:
+    touch_many([path])
+
+
+def usage(dataset=None) -> dict:
+    """{(数据集, 类型): {'files', 'bytes'}}"""
+    query = "SELECT dataset, kind, COUNT(*), SUM(size) FROM artifacts"
+    args = ()
+    if dataset is not None:
+        query += " WHERE dataset = ?"
+        args = (_key(dataset),)
+    query += " GROUP BY dataset, kind ORDER BY dataset, kind"
+    return {(ds, kind): {"files": n, "bytes": total or 0} for ds, kind, n, total in _connection().execute(query, args)}
+
+
+def _delete_rows(rows) -> dict:
+    """删除登记的产物（先删附属文件，再删主文件），返回 bulk_delete 的统计；成功的记录从登记表移除"""
+    sidecars, mains = [], []
+    for path, extra in rows:
+        sidecars.extend(json.loads(extra) if extra else [])
+        mains.append(path)
+    sidecar_stats = bulk_delete(sidecars)
+    failed = set()
+
+    def report(path, error):
+        if error is not None:
+            failed.add(str(path))
+            print(f"  ❌ 删除失败: {path} - {error}")
+
+    stats = bulk_delete(mains, on_done=report)
+    stats["bytes_freed"] += sidecar_stats["bytes_freed"]
+    conn = _connection()
+    with conn:
+        conn.executemany("DELETE FROM artifacts WHERE path = ?", [(p,) for p in mains if p not in failed])
+    _remove_empty_dirs(mains)
+    return stats
+
+
+def _remove_empty_dirs(paths) -> None:
+    """图片删完后删除空的 *_img 目录"""
+    for parent in sorted({Path(p).parent for p in paths}):
+        if parent.name.endswith(IMG_SUBDIR_SUFFIX):
+            try:
+                parent.rmdir()
+                print(f"  🗑️ 目录已删除: {parent}")
+            except OSError:
+                pass
+
+
+def enforce_budget(budget_bytes: int, kinds=None) -> dict:
+    """
+    登记的产物总大小超过预算时，按最后访问时间从旧到新删除，直到不超过预算。
+    kinds 为 None 时所有类型共用一个预算。返回统计（含 'bytes_before'、'bytes_after'）。
+    """
+    where, args = "", ()
+    if kinds:
+        where = f" WHERE kind IN ({','.join('?' * len(kinds))})"
+        args = tuple(kinds)
+    conn = _connection()
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts" + where, args).fetchone()[0]
+    victims = []
+    remaining = total
+    if total > budget_bytes:
+        for path, extra, size in conn.execute(f"SELECT path, sidecars, size FROM artifacts{where} ORDER BY last_access_ns", args):
+            if remaining <= budget_bytes:
+                break
+            victims.append((path, extra))
+            remaining -= size
+    stats = _delete_rows(victims)
+    stats["bytes_before"], stats["bytes_after"] = total, remaining
+    return stats
+
+
+def purge(dataset, kinds=None) -> dict:
+    """删除某个数据集的全部登记产物（kinds 限定类型），返回统计"""
+    query = "SELECT path, sidecars FROM artifacts WHERE dataset = ?"
+    args = (_key(dataset),)
+    if kinds:
+        query += f" AND kind IN ({','.join('?' * len(kinds))})"
+        args += tuple(kinds)
+    return _delete_rows(_connection().execute(query, args).fetchall())
+
+
+def forget_missing() -> int:
+    """移除文件已被外部删除的登记记录，返回移除数（只检查登记过的路径）"""
+    conn = _connection()
+    missing = [(path,) for (path,) in conn.execute("SELECT path FROM artifacts") if not os.path.exists(path)]
+    with conn:
+        conn.executemany("DELETE FROM artifacts WHERE path = ?", missing)
+    return len(missing)
+
+
+def adopt(dataset) -> int:
+    """
+    登记该数据集中已存在但未登记的产物（*_img 目录中的图片、page_cache / preview_cache 中的条目，
+    包括旧版本放在数据集根目录的 .page_cache / .preview_cache），返回新登记数。
+    需要遍历目录树，因此每个数据集只执行一次；访问时间取文件的修改时间。
+    """
+    dataset = Path(dataset)
+    conn = _connection()
+    if not dataset.exists() or conn.execute("SELECT 1 FROM adopted WHERE dataset = ?", (_key(dataset),)).fetchone():
+        return 0
+    known = {path for (path,) in conn.execute("SELECT path FROM artifacts WHERE dataset = ?", (_key(dataset),))}
+    rows = []
+
+    def add(path: Path, kind: str, sidecars=()):
+        if _key(path) in known:
+            return
+        st = path.stat()
+        size = st.st_size + sum(s.stat().st_size for s in sidecars)
+        extra = json.dumps([_key(s) for s in sidecars]) if sidecars else None
+        rows.append((_key(path), _key(dataset), kind, size, extra, st.st_mtime_ns, st.st_mtime_ns))
+
+    for root, dirs, files in os.walk(dataset):
+        root_path = Path(root)
+        if root_path.name in ("page_cache", ".page_cache"):
+            for name in files:
+                if name.endswith(".npy"):
+                    meta = (root_path / name).with_suffix(".json")
+                    add(root_path / name, "page_cache", [meta] if meta.exists() else [])
+            dirs[:] = []
+        elif root_path.name in ("preview_cache", ".preview_cache"):
+            for name in files:
+                if name.endswith(".jpg"):
+                    add(root_path / name, "preview")
+            dirs[:] = []
+        elif root_path.name.endswith(IMG_SUBDIR_SUFFIX):
+            for name in files:
+                if Path(name).suffix.lower() in IMAGE_SUFFIXES:
+                    add(root_path / name, "image")
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO artifacts (path, dataset, kind, size, sidecars, created_ns, last_access_ns) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute("INSERT OR REPLACE INTO adopted (dataset, adopted_ns) VALUES (?, ?)", (_key(dataset), time.time_ns()))
+    return len(rows)
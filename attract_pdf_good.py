@@ -1,15 +1,110 @@
 #读取某个xlsx的某一列单元格值作为参考数据
 #从某个目录下所有pdf文件中筛选出文件名包含参考数据的pdf文件
+from __future__ import annotations
+
 import pandas as pd
 import os
 from pathlib import Path
-import shutil
+
+from file_ops import bulk_copy, format_stats
+from selection_manifest import manifest_path, write_manifest
+
+# ======== 配置区域（按需修改）========
+# "substring": 文件名包含参考值即匹配（原有语义，Aho-Corasick 自动机一次扫描完成）
+# "genus": 文件名 <sample>.<category>.<part>.<genus> 的属字段与参考值完全相等才匹配（哈希查找）
+MATCH_MODE = "substring"
+# 选中的 PDF 默认只写入 part 目录的筛选清单（.selection.json），下游脚本按清单原地读取 damage_plots；
+# True 时同时把 PDF 复制到 part 目录（旧行为；也可以之后运行 selection_manifest.py 统一导出）
+MATERIALIZE_SELECTION = False
+# =====================================
+
+
+class AhoCorasick:
+    """
+    多模式子串匹配：把所有参考值编译成一个自动机，
+    每个文件名只需扫描一遍（与参考值个数无关），结果与逐个 `ref in name` 相同。
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [False]
+        self.match_all = False  # 空字符串是任何文件名的子串
+        for pattern in patterns:
+            if pattern == "":
+                self.match_all = True
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(False)
+                node = nxt
+            self.out[node] = True
+        self._build_fail_links()
+
+    def _build_fail_links(self):
+        queue = list(self.goto[0].values())
+        for node in queue:  # 按层（BFS）顺序，父节点的失败指针先于子节点算好
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(ch, 0)
+                # 后缀是某个参考值时，到达该节点也算命中
+                self.out[child] = self.out[child] or self.out[self.fail[child]]
+
+    def search(self, text: str) -> bool:
+        """text 是否包含任一参考值"""
+        if self.match_all:
+            return True
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                return True
+        return False
+
+
+def genus_of(pdf_name: str) -> str | None:
+    """<sample>.<category>.<part>.<genus> 中的属字段（属名本身可含“.”）；不符合命名规则时返回 None"""
+    fields = pdf_name.split(".", 3)
+    return fields[3] if len(fields) == 4 else None
+
+
+def build_matcher(reference_values, mode: str = MATCH_MODE):
+    """
+    返回 match(pdf_name) -> bool。
+    genus 模式下不符合命名规则的文件名回退到子串匹配。
+    """
+    automaton = AhoCorasick(reference_values)
+    if mode == "substring":
+        return automaton.search
+    if mode != "genus":
+        raise ValueError(f"未知的匹配模式: {mode}")
+    genus_set = set(reference_values)
+
+    def match(pdf_name: str) -> bool:
+        genus = genus_of(pdf_name)
+        return genus in genus_set if genus is not None else automaton.search(pdf_name)
+
+    return match
+
+
 def attract_pdf_good(file_path, pdf_dir, output_dir, target_col):
     """
     从指定目录下筛选出文件名包含Excel文件中某一列单元格值的PDF文件
     file_path: Excel文件路径
     pdf_dir: PDF文件目录
-    output_dir: 筛选后PDF文件输出目录
+    output_dir: 筛选清单（及可选的PDF副本）输出目录，即 part 目录
     target_col: 参考数据所在列名
     """
     print(f"Processing: {file_path}")
@@ -29,29 +124,39 @@ def attract_pdf_good(file_path, pdf_dir, output_dir, target_col):
     # 确保输出目录存在
     os.makedirs(output_dir, exist_ok=True)
     
-    # 遍历PDF目录，筛选符合条件的PDF文件
-    for pdf_file in Path(pdf_dir).glob("*.pdf"):
-        pdf_name = pdf_file.stem  # 获取不带扩展名的文件名
-        for ref_value in reference_values:
-            if ref_value in pdf_name:
-                # 复制符合条件的PDF文件到输出目录
-                shutil.copy(pdf_file, Path(output_dir) / pdf_file.name)
-                print(f"  Copied: {pdf_file.name}")
-                break  # 找到匹配后跳出内层循环
-    
+    # 遍历PDF目录，筛选符合条件的PDF文件（每个文件名只扫描一遍，与参考值个数无关）
+    match = build_matcher(reference_values)
+    matched = [pdf_file for pdf_file in Path(pdf_dir).glob("*.pdf") if match(pdf_file.stem)]
+
+    # 写入筛选清单（路径 + 哈希），下游脚本据此读取，无需复制
+    write_manifest(output_dir, matched, reference=file_path)
+    print(f"  Selected {len(matched)} PDFs -> {manifest_path(output_dir)}")
+    if not MATERIALIZE_SELECTION:
+        return True
+
+    # 复制符合条件的PDF文件到输出目录（同一磁盘上为硬链接，只写目录项）
+    def report(src, dst, method, error):
+        if error is None:
+            print(f"  Copied: {src.name}")
+        else:
+            print(f"  Error copying {src.name}: {error}")
+
+    stats = bulk_copy([(pdf_file, Path(output_dir) / pdf_file.name) for pdf_file in matched], on_done=report)
+    if matched:
+        print(f"  {format_stats(stats)}")
     return True
 def batch_attract_pdf_in_directory(base_path, target_col, success=0, fail=0):
     """
-    批量筛选指定目录下所有Excel文件中的某一列单元格值，复制符合条件的PDF文件到输出目录
+    批量筛选指定目录下所有Excel文件中的某一列单元格值，为每个 part 写入符合条件的PDF清单
     base_path: 基础路径
     target_col: 参考数据所在列名
     """
     # 遍历所有类别目录 (xxxx)
     for number_dir in sorted(base_path.iterdir()):
-        if not number_dir.is_dir():
+        if not number_dir.is_dir() or number_dir.name.startswith("."):
             continue
         for category_dir in sorted(number_dir.iterdir()):
-            if not category_dir.is_dir():
+            if not category_dir.is_dir() or category_dir.name.startswith("."):
                 continue
             # 遍历所有 partxx 目录
             for part_dir in sorted(category_dir.iterdir()):
@@ -6,16 +6,45 @@
 - 源文件与汇总文件有相同表头，只保留一个表头
 - 如果指定列的单元格为红色（ff0000），则跳过该行
 
+提供函数 `stream_xlsx_to_summary`：
+- 一次性将多个源 `.xlsx` 流式写入汇总文件（源 read_only 逐行读取，汇总 write_only 逐行写出），内存占用恒定
+- 单个工作表达到 xlsx 行数上限（1,048,576 行）时自动续写到新工作表，也可直接输出为 CSV
+- 汇总流程（`build_category_summary` / 增量更新）中主工作表不续写：后续的属聚合、颜色排序、翻译脚本
+  只读取第一个工作表，超过上限时报错，提示改用 output_format='csv'（“明细”工作表仍可续写）
+- 每行末尾追加“来源”列（number/category/part），记录数据来自哪个 part
+
+增量模式（`incremental_update_summaries`）：
+- 汇总文件额外保存一个“明细”工作表（未聚合的原始行 + 来源）
+- 通过 number 目录下的 `.summary_manifest.json` 记录各 part 源表的修改时间与大小
+- 某个 part 变化时只替换该 part 在明细中的行，并只重新聚合受影响的属，其余汇总文件不动
+
 使用示例：
     from create_excel_sum import append_xlsx_to_summary
     append_xlsx_to_summary('src.xlsx', 'summary.xlsx', check_col='C')
+
+    from create_excel_sum import stream_xlsx_to_summary
+    stream_xlsx_to_summary(['a.xlsx', 'b.xlsx'], 'summary.xlsx', check_col='F')
 """
 
+import csv
+import json
 import os
 from copy import copy
 from pathlib import Path
 from openpyxl import load_workbook, Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import column_index_from_string
+from pool_utils import run_in_pool
+
+# xlsx 单个工作表的最大行数
+XLSX_MAX_ROWS = 1048576
+
+# 来源列表头（值为 number/category/part）
+PROVENANCE_HEADER = "来源"
+# 增量模式下保存未聚合原始行的工作表名称
+DETAIL_SHEET = "明细"
+# 增量模式下记录各 part 源表状态的清单文件（位于 number 目录）
+MANIFEST_NAME = ".summary_manifest.json"
 
 def append_xlsx_to_summary(src_path, summary_path, check_col, header_rows=1, sheet_name=None, red_hex='FF0000'):
     """
@@ -116,24 +145,518 @@ def append_xlsx_to_summary(src_path, summary_path, check_col, header_rows=1, she
         dest_row += 1
 
     sum_wb.save(summary_path)
-def batch_append_to_summary(base_path, check_col):
+
+
+def _fill_is_red(cell, red_hex):
+    """判断单元格填充色是否为指定红色（支持 ARGB 或 RGB 表示；read_only 模式下的空单元格视为无色）"""
+    try:
+        fg = getattr(getattr(cell, 'fill', None), 'fgColor', None)
+        if fg is None:
+            return False
+        rgb = getattr(fg, 'rgb', None)
+        if not rgb or not isinstance(rgb, str):
+            return False
+        return rgb.upper().endswith(red_hex)
+    except Exception:
+        return False
+
+
+def _write_only_cell(ws, src_cell):
+    """按源单元格（值 + 常见样式）创建 write_only 工作表使用的 WriteOnlyCell"""
+    tgt = WriteOnlyCell(ws, value=src_cell.value)
+    if getattr(src_cell, 'has_style', False):
+        try:
+            tgt.font = copy(src_cell.font)
+            tgt.border = copy(src_cell.border)
+            tgt.fill = copy(src_cell.fill)
+            tgt.number_format = src_cell.number_format
+            tgt.protection = copy(src_cell.protection)
+            tgt.alignment = copy(src_cell.alignment)
+        except Exception:
+            # 忽略不能复制的样式
+            pass
+    return tgt
+
+
+class _SummarySheetWriter:
+    """
+    write_only 汇总工作表写入器。
+    - 单个工作表写满 max_rows 行后自动新建工作表（<title>_2、<title>_3 …）继续写入
+    - 新工作表会重复写入表头，便于单独查看
+    - rollover=False 时不续写，超过 max_rows 行抛出 ValueError
+    """
+
+    def __init__(self, wb, title, max_rows=XLSX_MAX_ROWS, rollover=True):
+        self.wb = wb
+        self.title = title
+        self.max_rows = max_rows
+        self.rollover = rollover
+        self.header = []  # 首次写入的表头行（WriteOnlyCell 列表）
+        self.sheet_count = 0
+        self.rows_in_sheet = 0
+        self.ws = None
+        self._new_sheet()
+
+    def _new_sheet(self):
+        if self.ws is not None and not self.rollover:
+            raise ValueError(
+                f"工作表 {self.title} 超过 {self.max_rows} 行。process_sum_excel_sum / sort_sum_excel_color / "
+                f"translate_sum_genus_from_mapping 只读取第一个工作表，续写的行会被忽略；请改用 output_format='csv'"
+            )
+        self.sheet_count += 1
+        title = self.title if self.sheet_count == 1 else f"{self.title}_{self.sheet_count}"
+        self.ws = self.wb.create_sheet(title)
+        self.rows_in_sheet = 0
+        for header_row in self.header:
+            self.ws.append([_write_only_cell(self.ws, c) for c in header_row])
+            self.rows_in_sheet += 1
+        if self.sheet_count > 1:
+            print(f"  ⚠️ 工作表行数达到上限 {self.max_rows}，续写到新工作表: {title}")
+
+    def append(self, src_row, is_header=False, extra_values=()):
+        """写入一行：src_row 为源单元格（保留样式），extra_values 为追加在行尾的纯值（如来源）"""
+        if self.rows_in_sheet >= self.max_rows:
+            self._new_sheet()
+        cells = [_write_only_cell(self.ws, c) for c in src_row]
+        cells.extend(WriteOnlyCell(self.ws, value=v) for v in extra_values)
+        if is_header and self.sheet_count == 1:
+            self.header.append(cells)
+        self.ws.append(cells)
+        self.rows_in_sheet += 1
+
+    def append_values(self, values, fills=None):
+        """写入一行纯值；fills 为 {0-based 列索引: 填充样式}"""
+        if self.rows_in_sheet >= self.max_rows:
+            self._new_sheet()
+        cells = [WriteOnlyCell(self.ws, value=v) for v in values]
+        for idx, fill in (fills or {}).items():
+            if fill is not None and idx < len(cells):
+                cells[idx].fill = copy(fill)
+        self.ws.append(cells)
+        self.rows_in_sheet += 1
+
+
+class _SummaryCsvWriter:
+    """CSV 汇总写入器（仅保留单元格值，无行数上限）"""
+
+    def __init__(self, csv_path):
+        # utf-8-sig 便于 Excel 直接打开中文内容
+        self.f = open(csv_path, 'w', encoding='utf-8-sig', newline='')
+        self.writer = csv.writer(self.f)
+
+    def append(self, src_row, is_header=False, extra_values=()):
+        self.writer.writerow(["" if c.value is None else c.value for c in src_row] + list(extra_values))
+
+    def close(self):
+        self.f.close()
+
+
+def stream_xlsx_to_summary(src_paths, summary_path, check_col, header_rows=1, sheet_name=None,
+                           red_hex='FF0000', output_format='xlsx', max_rows=XLSX_MAX_ROWS,
+                           provenances=None, detail_sheet=None, rollover=True):
+    """
+    将多个源 xlsx 流式写入同一个汇总文件（覆盖已有汇总），内存占用与数据量无关。
+    参数：
+    - src_paths: 源 xlsx 文件路径列表（按顺序写入）
+    - summary_path: 汇总文件路径；output_format='csv' 时输出为同名 .csv
+    - check_col: 要检查红色的列，可以是列字母（如 'C'）或 1-based 列索引（如 3）
+    - header_rows: 表头行数（默认 1），相同表头只保留一次
+    - sheet_name: 指定的 sheet 名称（默认使用第一个 sheet；也作为汇总工作表名称）
+    - red_hex: 红色的十六进制值（不区分大小写，默认 'FF0000'）
+    - output_format: 'xlsx'（保留样式，超过 max_rows 行时续写到新工作表）或 'csv'（仅保留值）
+    - max_rows: 单个工作表的最大行数（默认 xlsx 上限 1,048,576）
+    - provenances: 与 src_paths 一一对应的来源字符串列表（如 '1_3_fastp/Bacteria/part01'）；
+                   提供时在每行末尾追加“来源”列
+    - detail_sheet: 若指定（仅 xlsx），同时把相同的行写入该名称的明细工作表，供增量模式使用
+    - rollover: 主工作表超过 max_rows 行时是否续写到新工作表；False 时抛出 ValueError，不保存汇总文件
+    行为与 `append_xlsx_to_summary` 一致：
+    - 源表头与首个表头不同时重新写入表头
+    - 若 check_col 对应单元格的填充色为 red_hex，则跳过该行
+    返回值：写入的数据行数（不含表头）
+    """
+    if isinstance(check_col, str):
+        check_col_idx = column_index_from_string(check_col)
+    else:
+        check_col_idx = int(check_col)
+
+    red_hex = red_hex.strip().upper()
+
+    if output_format == 'csv':
+        summary_path = Path(summary_path).with_suffix('.csv')
+        writer = _SummaryCsvWriter(summary_path)
+        sum_wb = None
+    elif output_format == 'xlsx':
+        sum_wb = Workbook(write_only=True)
+        writer = _SummarySheetWriter(sum_wb, sheet_name or "Sheet", max_rows=max_rows, rollover=rollover)
+    else:
+        raise ValueError(f"不支持的输出格式: {output_format}")
+    writers = [writer]
+    if detail_sheet and sum_wb is not None:
+        writers.append(_SummarySheetWriter(sum_wb, detail_sheet, max_rows=max_rows))
+
+    first_header = None
+    data_rows = 0
+    completed = False
+    try:
+        for src_idx, src_path in enumerate(src_paths):
+            extra = [provenances[src_idx]] if provenances else []
+            extra_header = [PROVENANCE_HEADER] if provenances else []
+            src_wb = load_workbook(src_path, read_only=True)
+            try:
+                src_ws = src_wb[sheet_name] if sheet_name and sheet_name in src_wb.sheetnames else src_wb.active
+                for r_idx, row in enumerate(src_ws.iter_rows(), start=1):
+                    if r_idx <= header_rows:
+                        src_header = ["" if c.value is None else str(c.value) for c in row]
+                        if r_idx == 1:
+                            write_header = first_header is None or src_header != first_header
+                            if first_header is None:
+                                first_header = src_header
+                        if write_header:
+                            for w in writers:
+                                w.append(row, is_header=True, extra_values=extra_header if r_idx == 1 else ())
+                        continue
+                    if check_col_idx <= len(row) and _fill_is_red(row[check_col_idx - 1], red_hex):
+                        continue
+                    for w in writers:
+                        w.append(row, extra_values=extra)
+                    data_rows += 1
+            finally:
+                src_wb.close()
+        completed = True
+    finally:
+        if sum_wb is None:
+            writer.close()
+        elif completed:
+            sum_wb.save(summary_path)
+        else:
+            # 出错时不写入不完整的汇总，保留原文件；关闭 write_only 工作表的临时文件
+            for ws in sum_wb.worksheets:
+                ws.close()
+    return data_rows
+
+
+def part_provenance(number_dir, category_dir, part_dir):
+    """来源列的值：number/category/part"""
+    return f"{Path(number_dir).name}/{Path(category_dir).name}/{Path(part_dir).name}"
+
+
+def _part_table_files(part_dir):
+    """part 目录下 species_taxonomy_table 中的所有 xlsx（排序后）"""
+    table_dir = Path(part_dir) / "species_taxonomy_table"
+    if not table_dir.exists():
+        return []
+    return sorted(table_dir.glob("*.xlsx"))
+
+
+def _category_part_dirs(category_dir):
+    return [d for d in sorted(Path(category_dir).iterdir()) if d.is_dir() and d.name.startswith("part")]
+
+
+def build_category_summary(number_dir, category_dir, check_col, output_format='xlsx', detail=False):
+    """
+    流式生成单个类别的汇总文件 `<number>_<category>_summary.xlsx`（各类别互相独立，可并行调用）
+    number_dir: 样本目录
+    category_dir: 类别目录
+    check_col: 要检查红色的列，可以是列字母（如 'C'）或 1-based 列索引（如 3）
+    output_format: 输出格式，'xlsx' 或 'csv'（xlsx 主工作表超过行数上限时抛出 ValueError，不续写）
+    detail: 是否同时写入“明细”工作表（增量模式需要）
+    返回值：写入的数据行数；类别下没有任何源表时返回 None
+    """
+    number_dir = Path(number_dir)
+    category_dir = Path(category_dir)
+    summary_path = number_dir / (number_dir.name + '_' + category_dir.name + "_summary.xlsx")
+    src_files = []
+    provenances = []
+    for part_dir in _category_part_dirs(category_dir):
+        for xlsx_file in _part_table_files(part_dir):
+            src_files.append(xlsx_file)
+            provenances.append(part_provenance(number_dir, category_dir, part_dir))
+    if not src_files:
+        return None
+    print(f"{number_dir.name}/{category_dir.name}: {len(src_files)} 个源文件")
+    return stream_xlsx_to_summary(src_files, summary_path, check_col, output_format=output_format,
+                                  provenances=provenances, detail_sheet=DETAIL_SHEET if detail else None,
+                                  rollover=False)
+
+
+def _to_float(value):
+    try:
+        return float(value) if value is not None else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def _sheet_data_rows(wb, titles, header_rows=1):
+    """依次遍历多个工作表（续写表也带表头）的数据行"""
+    for title in titles:
+        for r_idx, row in enumerate(wb[title].iter_rows(), start=1):
+            if r_idx > header_rows:
+                yield row
+
+
+def replace_part_in_summary(summary_path, number_dir, category_dir, part_dir, check_col,
+                            header_rows=1, red_hex='FF0000'):
+    """
+    增量更新：用 part 当前的源表替换汇总“明细”中该 part 的行，并只重新聚合受影响的属。
+    - 明细中其他 part 的行原样保留；新行写在该 part 原来所在的位置（原来没有则追加到末尾）
+    - 主工作表中不受影响的行原样保留（颜色、顺序、翻译列等均不变）
+    - 受影响的属按 reads 求和重新生成一行（与 process_sum_excel_sum 的规则一致：取首行的值，
+      属列保留首行颜色，来源列合并为 'a;b'），写在原位置；新出现的属追加到末尾
+    返回值：True 表示已更新；False 表示汇总缺少明细/必要列，需要整体重建
+    """
+    if isinstance(check_col, str):
+        check_col_idx = column_index_from_string(check_col)
+    else:
+        check_col_idx = int(check_col)
+    red_hex = red_hex.strip().upper()
+    summary_path = Path(summary_path)
+    prov = part_provenance(number_dir, category_dir, part_dir)
+
+    old_wb = load_workbook(summary_path, read_only=True)
+    try:
+        detail_titles = [t for t in old_wb.sheetnames if t == DETAIL_SHEET or t.startswith(DETAIL_SHEET + "_")]
+        main_titles = [t for t in old_wb.sheetnames if t not in detail_titles]
+        if not detail_titles or not main_titles:
+            return False
+        detail_header_row = next(old_wb[detail_titles[0]].iter_rows(max_row=1), ())
+        main_header_row = next(old_wb[main_titles[0]].iter_rows(max_row=1), ())
+        detail_header = ["" if c.value is None else str(c.value) for c in detail_header_row]
+        main_header = ["" if c.value is None else str(c.value) for c in main_header_row]
+        for name in ('属', 'reads', PROVENANCE_HEADER):
+            if name not in detail_header or name not in main_header:
+                return False
+        genus_idx = detail_header.index('属')
+        reads_idx = detail_header.index('reads')
+        prov_idx = detail_header.index(PROVENANCE_HEADER)
+        main_genus_idx = main_header.index('属')
+
+        def cell_value(row, idx):
+            return row[idx].value if idx < len(row) else None
+
+        def new_part_rows():
+            for src_path in _part_table_files(part_dir):
+                src_wb = load_workbook(src_path, read_only=True)
+                try:
+                    for r_idx, row in enumerate(src_wb.active.iter_rows(), start=1):
+                        if r_idx <= header_rows:
+                            continue
+                        if check_col_idx <= len(row) and _fill_is_red(row[check_col_idx - 1], red_hex):
+                            continue
+                        yield row
+                finally:
+                    src_wb.close()
+
+        # 第一遍：收集受影响的属（旧明细中该 part 的属 + 新源表中的属）
+        affected = set()
+        for row in _sheet_data_rows(old_wb, detail_titles, header_rows):
+            if cell_value(row, prov_idx) == prov:
+                affected.add(cell_value(row, genus_idx))
+        for row in new_part_rows():
+            affected.add(cell_value(row, genus_idx))
+        affected.discard(None)
+
+        # 第二遍：写新明细，同时累计受影响属的聚合值
+        new_wb = Workbook(write_only=True)
+        main_writer = _SummarySheetWriter(new_wb, main_titles[0], rollover=False)
+        detail_writer = _SummarySheetWriter(new_wb, DETAIL_SHEET)
+        detail_writer.append(detail_header_row, is_header=True)
+        aggregates = {}  # 属 -> {'values', 'fill', 'sum', 'provs'}
+
+        def accumulate(values, genus_fill):
+            genus = values[genus_idx] if genus_idx < len(values) else None
+            if genus is None or str(genus).strip() == '' or genus not in affected:
+                return
+            reads = _to_float(values[reads_idx] if reads_idx < len(values) else None)
+            if genus not in aggregates:
+                aggregates[genus] = {'values': values, 'fill': genus_fill, 'sum': reads, 'provs': []}
+            else:
+                aggregates[genus]['sum'] += reads
+            row_prov = values[prov_idx] if prov_idx < len(values) else None
+            if row_prov and row_prov not in aggregates[genus]['provs']:
+                aggregates[genus]['provs'].append(row_prov)
+
+        def write_new_part_rows():
+            count = 0
+            for row in new_part_rows():
+                # 源表列与明细列一致（明细多一个来源列），不足的列补空
+                cells = list(row[:prov_idx])
+                padding = [None] * (prov_idx - len(cells))
+                detail_writer.append(cells, extra_values=padding + [prov])
+                accumulate([c.value for c in cells] + padding + [prov],
+                           getattr(row[genus_idx], 'fill', None) if genus_idx < len(row) else None)
+                count += 1
+            return count
+
+        new_rows = None
+        for row in _sheet_data_rows(old_wb, detail_titles, header_rows):
+            if cell_value(row, prov_idx) == prov:
+                if new_rows is None:
+                    new_rows = write_new_part_rows()
+                continue
+            detail_writer.append(row)
+            accumulate([c.value for c in row], getattr(row[genus_idx], 'fill', None) if genus_idx < len(row) else None)
+        if new_rows is None:
+            new_rows = write_new_part_rows()
+
+        def aggregate_values(genus, old_row=None):
+            info = aggregates[genus]
+            values = list(info['values'])
+            values[reads_idx] = info['sum']
+            values[prov_idx] = ";".join(info['provs'])
+            # 主表中明细之外的列（如“中文属名”）沿用原行的值
+            if old_row is not None and len(old_row) > len(values):
+                values += [c.value for c in old_row[len(values):]]
+            return values
+
+        # 主工作表：不受影响的行原样复制，受影响的属在首次出现的位置写入重新聚合的行
+        main_writer.append(main_header_row, is_header=True)
+        emitted = set()
+        for row in _sheet_data_rows(old_wb, main_titles, header_rows):
+            genus = cell_value(row, main_genus_idx)
+            if genus not in affected:
+                main_writer.append(row)
+                continue
+            if genus in emitted or genus not in aggregates:
+                continue
+            main_writer.append_values(aggregate_values(genus, row), fills={genus_idx: aggregates[genus]['fill']})
+            emitted.add(genus)
+        for genus in aggregates:
+            if genus not in emitted:
+                main_writer.append_values(aggregate_values(genus), fills={genus_idx: aggregates[genus]['fill']})
+    finally:
+        old_wb.close()
+
+    tmp_path = summary_path.with_name(summary_path.stem + ".tmp.xlsx")
+    new_wb.save(tmp_path)
+    os.replace(tmp_path, summary_path)
+    print(f"  🔁 {prov}: 替换为 {new_rows} 行，重新聚合 {len(affected)} 个属")
+    return True
+
+
+def _load_manifest(number_dir):
+    manifest_path = Path(number_dir) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"  ⚠️ 读取清单失败，将重建: {manifest_path} - {e}")
+        return {}
+
+
+def _save_manifest(number_dir, manifest):
+    with open(Path(number_dir) / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def _part_signature(part_dir):
+    """part 源表的状态签名：[[文件名, 修改时间(ns), 大小], ...]"""
+    signature = []
+    for xlsx_file in _part_table_files(part_dir):
+        st = xlsx_file.stat()
+        signature.append([xlsx_file.name, st.st_mtime_ns, st.st_size])
+    return signature
+
+
+def incremental_update_category(number_dir, category_dir, check_col, old_signatures):
+    """
+    增量更新单个类别的汇总：只处理源表发生变化（新增/修改/删除）的 part。
+    old_signatures: 上次运行记录的 {part 名: 签名}；None 表示没有记录（整体重建）
+    返回值：(本次的 {part 名: 签名}, 实际处理的 part 列表；整体重建时为 ['*'])
+    """
+    number_dir = Path(number_dir)
+    category_dir = Path(category_dir)
+    summary_path = number_dir / (number_dir.name + '_' + category_dir.name + "_summary.xlsx")
+    part_dirs = _category_part_dirs(category_dir)
+    current = {d.name: _part_signature(d) for d in part_dirs}
+    current = {name: sig for name, sig in current.items() if sig}
+
+    if old_signatures is None or not summary_path.exists():
+        build_category_summary(number_dir, category_dir, check_col, detail=True)
+        return current, ['*']
+
+    changed = sorted(name for name in set(current) | set(old_signatures)
+                     if current.get(name) != old_signatures.get(name))
+    for name in changed:
+        if not replace_part_in_summary(summary_path, number_dir, category_dir, category_dir / name, check_col):
+            print(f"  ⚠️ {summary_path.name} 缺少明细工作表或必要列，整体重建")
+            build_category_summary(number_dir, category_dir, check_col, detail=True)
+            return current, ['*']
+    return current, changed
+
+
+def incremental_update_summaries(base_path, check_col, jobs=None):
+    """
+    增量模式批量更新汇总：不删除已有汇总，只替换源表发生变化的 part。
+    首次运行（或汇总缺少明细工作表）时整体重建该类别并记录清单。
+    base_path: 基础路径
+    check_col: 要检查红色的列
+    jobs: 并行进程数（各类别互相独立）
+    """
+    base_path = Path(base_path)
+    manifests = {}
+    category_tasks = []
+    for number_dir in sorted(base_path.iterdir()):
+        if not number_dir.is_dir() or number_dir.name.startswith("."):
+            continue
+        manifests[number_dir] = _load_manifest(number_dir)
+        for category_dir in sorted(number_dir.iterdir()):
+            if not category_dir.is_dir() or category_dir.name.startswith("."):
+                continue
+            summary_name = number_dir.name + '_' + category_dir.name + "_summary.xlsx"
+            category_tasks.append((number_dir, category_dir, check_col, manifests[number_dir].get(summary_name)))
+
+    for task, result, error, elapsed, output in run_in_pool(incremental_update_category, category_tasks, jobs=jobs):
+        number_dir, category_dir = task[0], task[1]
+        summary_name = number_dir.name + '_' + category_dir.name + "_summary.xlsx"
+        print(output, end="")
+        if error:
+            print(f"  ❌ {summary_name} 增量更新失败: {error}")
+            manifests[number_dir].pop(summary_name, None)
+            continue
+        signatures, changed = result
+        if not signatures:
+            continue
+        manifests[number_dir][summary_name] = signatures
+        if changed == ['*']:
+            print(f"  📊 {summary_name}: 整体重建 ({elapsed:.2f}s)")
+        elif changed:
+            print(f"  🔁 {summary_name}: 更新 {', '.join(changed)} ({elapsed:.2f}s)")
+        else:
+            print(f"  ✔️ {summary_name}: 无变化")
+
+    for number_dir, manifest in manifests.items():
+        _save_manifest(number_dir, manifest)
+
+
+def batch_append_to_summary(base_path, check_col, streaming=True, output_format='xlsx', jobs=None):
     """
     批量将指定目录下所有Excel文件的内容追加到汇总文件中
     base_path: 基础路径
     check_col: 要检查红色的列，可以是列字母（如 'C'）或 1-based 列索引（如 3）
     summary_name: 汇总文件名称（默认 'summary.xlsx'）
+    streaming: 是否使用流式汇总（默认 True，每个类别一次性生成汇总，内存恒定）；
+               False 时沿用逐个文件追加的 `append_xlsx_to_summary`
+    output_format: 流式汇总的输出格式，'xlsx' 或 'csv'
+    jobs: 流式汇总的并行进程数（None 表示 CPU 核数 - 1，1 表示串行）
+    返回值：流式汇总时返回 [{'summary', 'rows', 'error', 'seconds'}, ...]（按类别目录顺序）
     """
     base_path = Path(base_path)
+    category_tasks = []
     # 遍历所有类别目录 (xxxx)
     for number_dir in sorted(base_path.iterdir()):
-        if not number_dir.is_dir():
+        if not number_dir.is_dir() or number_dir.name.startswith("."):
             continue
         for category_dir in sorted(number_dir.iterdir()):
-            if not category_dir.is_dir():
+            if not category_dir.is_dir() or category_dir.name.startswith("."):
                 continue
             # 构建汇总文件路径
             summary_name = number_dir.name + '_' + category_dir.name + "_summary.xlsx"
             summary_path = number_dir / summary_name
+            if streaming:
+                category_tasks.append((number_dir, category_dir, check_col, output_format))
+                continue
             # 遍历所有 partxx 目录
             for part_dir in sorted(category_dir.iterdir()):
                 if not part_dir.is_dir() or not part_dir.name.startswith("part"):
@@ -152,6 +675,27 @@ def batch_append_to_summary(base_path, check_col):
                         print(f"  Appended data from '{xlsx_file}' to summary.")
                     except Exception as e:
                         print(f"  Error processing file: {e}")
+
+    if not streaming:
+        return []
+
+    # 各类别汇总互相独立：进程池并行构建，结果按类别目录顺序输出
+    results = []
+    for task, rows, error, elapsed, output in run_in_pool(build_category_summary, category_tasks, jobs=jobs):
+        number_dir, category_dir = task[0], task[1]
+        summary_name = number_dir.name + '_' + category_dir.name + "_summary.xlsx"
+        if rows is None and error is None:
+            print(output, end="")
+            continue
+        print(f"\n{'=' * 60}")
+        print(f"{number_dir.name}/{category_dir.name}")
+        print(output, end="")
+        if error:
+            print(f"  Error building summary: {error} ({elapsed:.2f}s)")
+        else:
+            print(f"  Wrote {rows} rows to '{summary_name}' ({elapsed:.2f}s)")
+        results.append({'summary': str(number_dir / summary_name), 'rows': rows, 'error': error, 'seconds': elapsed})
+    return results
 def delete_xlsx_file(target_dir):
     """
     删除指定目录下所有的.xlsx格式文件
@@ -197,7 +741,13 @@ if __name__ == "__main__":
     base_path = "files_debug"
     check_col = "F"  # 检查红色的列，可以是列字母或1-based索引
     #summary_name = "summary.xlsx"  # 可自定义
-    for number_dir in sorted(Path(base_path).iterdir()):
-        delete_xlsx_file(number_dir)
-    batch_append_to_summary(base_path, check_col)
+    incremental = False  # True: 增量模式，只更新源表有变化的 part（首次运行会整体重建并记录清单）
+    if incremental:
+        incremental_update_summaries(base_path, check_col)
+    else:
+        for number_dir in sorted(Path(base_path).iterdir()):
+            if not number_dir.is_dir() or number_dir.name.startswith("."):
+                continue
+            delete_xlsx_file(number_dir)
+        batch_append_to_summary(base_path, check_col)
     print("\n" + "=" * 60)
\ No newline at end of file
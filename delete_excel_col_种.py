@@ -38,10 +38,10 @@ def batch_delete_column_in_directory(base_path, col_name, success=0, fail=0):
     
     # 遍历所有类别目录 (xxxx)
     for number_dir in sorted(base_path.iterdir()):
-        if not number_dir.is_dir():
+        if not number_dir.is_dir() or number_dir.name.startswith("."):
             continue
         for category_dir in sorted(number_dir.iterdir()):
-            if not category_dir.is_dir():
+            if not category_dir.is_dir() or category_dir.name.startswith("."):
                 continue
             # 遍历所有 partxx 目录
             for part_dir in sorted(category_dir.iterdir()):
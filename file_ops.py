@@ -0,0 +1,240 @@
+"""
+批量文件操作工具
+
+提供函数：
+- `link_or_copy(src, dst)`：同一文件系统上优先创建硬链接（只写目录项，不复制数据），
+  不支持时依次尝试 reflink（写时复制克隆，Linux btrfs/xfs 等）、`os.copy_file_range`（内核内复制），
+  最后回退到 `shutil.copy2`。目标已存在时覆盖（先写临时文件再替换，不会出现半个文件）
+- `bulk_copy(pairs)` / `bulk_delete(paths)`：在线程池中批量执行，返回统计信息（包括实际复制/释放的字节数）
+- `file_hash(path, known)`：文件签名（大小、修改时间、sha1），未变化时沿用上次的哈希
+- `dataset_cache_dir(base_dir)` / `cache_owner(path)`：数据集的缓存与索引目录（<数据集>/.cache），
+  及缓存中的路径所属的数据集；遍历数据集的脚本跳过以 . 开头的目录，缓存不会被当作样本目录
+
+注意：硬链接与源文件共用同一份数据，只适用于复制后不会被原地修改的文件（如 PDF 图表）。
+删除任一方不影响另一方；需要独立副本时使用 mode="copy"。
+
+使用示例：
+    from file_ops import bulk_copy
+    stats = bulk_copy([(src, target_dir / src.name) for src in pdfs])
+    print(format_stats(stats))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+# ======== 配置区域（按需修改）========
+LINK_MODE = "auto"  # "auto": 硬链接 → reflink → copy_file_range → copy2；"copy": 始终完整复制
+DATASET_CACHE_DIR = ".cache"  # 识别缓存、特征表、渲染/预览缓存、PDF 索引、表格数据库都放在 <数据集>/.cache 下
+# =====================================
+
+FICLONE = 0x40049409  # Linux ioctl：克隆整个文件（reflink）
+
+
+def default_io_jobs():
+    """文件操作以等待磁盘为主，线程数可多于 CPU 核数"""
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def dataset_cache_dir(base_dir) -> Path:
+    return Path(base_dir) / DATASET_CACHE_DIR
+
+
+def cache_owner(path) -> Path:
+    """缓存目录中的路径所属的数据集（.cache 的上一级）；不在 .cache 下时为 path 的上一级"""
+    path = Path(path)
+    for parent in path.parents:
+        if parent.name == DATASET_CACHE_DIR:
+            return parent.parent
+    return path.parent
+
+
+def _tmp_path(dst: Path) -> Path:
+    return dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+
+
+def _try_reflink(src: Path, tmp: Path) -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+
+    try:
+        with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        return False
+
+
+def _try_copy_file_range(src: Path, tmp: Path, size: int) -> bool:
+    if not hasattr(os, "copy_file_range"):
+        return False
+    try:
+        with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+            remaining = size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        if remaining > 0:
+            raise OSError("copy_file_range 提前结束")
+        return True
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        return False
+
+
+def link_or_copy(src, dst, mode: str = LINK_MODE) -> tuple[str, int]:
+    """
+    将 src 放到 dst（同名覆盖）。
+    返回 (方式, 实际复制的字节数)：方式为 hardlink / reflink / copy_file_range / copy / same；
+    硬链接和 reflink 只写元数据，字节数为 0。
+    """
+    src, dst = Path(src), Path(dst)
+    st = src.stat()
+    if dst.exists() and os.path.samefile(src, dst):
+        return "same", 0
+    tmp = _tmp_path(dst)
+    tmp.unlink(missing_ok=True)
+    try:
+        if mode == "auto":
+            try:
+                os.link(src, tmp)
+                os.replace(tmp, dst)
+                return "hardlink", 0
+            except OSError:
+                tmp.unlink(missing_ok=True)
+            if _try_reflink(src, tmp):
+                shutil.copystat(src, tmp)
+                os.replace(tmp, dst)
+                return "reflink", 0
+            if _try_copy_file_range(src, tmp, st.st_size):
+                shutil.copystat(src, tmp)
+                os.replace(tmp, dst)
+                return "copy_file_range", st.st_size
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+        return "copy", st.st_size
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def file_hash(path: Path, known: dict | None = None) -> dict:
+    """
+    返回文件签名 {'size', 'mtime_ns', 'sha1'}。
+    known 为上次记录的签名：大小与修改时间都未变时直接沿用其中的哈希，不再读取文件内容。
+    """
+    st = Path(path).stat()
+    if known and known.get("size") == st.st_size and known.get("mtime_ns") == st.st_mtime_ns and known.get("sha1"):
+        return known
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": digest.hexdigest()}
+
+
+def _copy_task(pair, mode):
+    src, dst = pair
+    try:
+        method, moved = link_or_copy(src, dst, mode)
+        return src, dst, method, moved, None
+    except Exception as e:
+        return src, dst, None, 0, f"{type(e).__name__}: {e}"
+
+
+def bulk_copy(pairs, jobs: int | None = None, mode: str = LINK_MODE, on_done=None) -> dict:
+    """
+    批量执行 link_or_copy。
+    - pairs: [(源文件, 目标文件), ...]
+    - on_done(src, dst, method, error): 每个文件完成后的回调（按提交顺序调用，可用于输出日志）
+    返回：{'files', 'failed', 'bytes_total', 'bytes_moved', 'methods': {方式: 数量}, 'errors': [(src, dst, 错误)]}
+    """
+    pairs = list(pairs)
+    stats = {"files": 0, "failed": 0, "bytes_total": 0, "bytes_moved": 0, "methods": Counter(), "errors": []}
+    if not pairs:
+        return stats
+    jobs = jobs or default_io_jobs()
+    with ThreadPoolExecutor(max_workers=min(jobs, len(pairs))) as executor:
+        for src, dst, method, moved, error in executor.map(lambda p: _copy_task(p, mode), pairs):
+            if error is None:
+                stats["files"] += 1
+                stats["bytes_moved"] += moved
+                stats["bytes_total"] += Path(dst).stat().st_size
+                stats["methods"][method] += 1
+            else:
+                stats["failed"] += 1
+                stats["errors"].append((src, dst, error))
+            if on_done is not None:
+                on_done(src, dst, method, error)
+    return stats
+
+
+def _delete_task(path):
+    path = Path(path)
+    try:
+        st = path.stat()
+        path.unlink()
+        # 仍有其他硬链接时数据不会被释放
+        return path, (st.st_size if st.st_nlink <= 1 else 0), None
+    except FileNotFoundError:
+        return path, 0, None
+    except Exception as e:
+        return path, 0, f"{type(e).__name__}: {e}"
+
+
+def bulk_delete(paths, jobs: int | None = None, on_done=None) -> dict:
+    """
+    批量删除文件（不存在的文件视为已删除）。
+    - on_done(path, error): 每个文件完成后的回调（按提交顺序调用）
+    返回：{'files', 'failed', 'bytes_freed', 'errors': [(path, 错误)]}
+    """
+    paths = list(paths)
+    stats = {"files": 0, "failed": 0, "bytes_freed": 0, "errors": []}
+    if not paths:
+        return stats
+    jobs = jobs or default_io_jobs()
+    with ThreadPoolExecutor(max_workers=min(jobs, len(paths))) as executor:
+        for path, freed, error in executor.map(_delete_task, paths):
+            if error is None:
+                stats["files"] += 1
+                stats["bytes_freed"] += freed
+            else:
+                stats["failed"] += 1
+                stats["errors"].append((path, error))
+            if on_done is not None:
+                on_done(path, error)
+    return stats
+
+
+def format_bytes(size: int) -> str:
+    size = float(size)
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def format_stats(stats: dict) -> str:
+    """统计信息的一行摘要"""
+    if "bytes_moved" in stats:
+        methods = "，".join(f"{k} {v}" for k, v in sorted(stats["methods"].items()))
+        text = (f"复制 {stats['files']} 个文件（{format_bytes(stats['bytes_total'])}，"
+                f"实际写入 {format_bytes(stats['bytes_moved'])}）")
+        if methods:
+            text += f"，方式：{methods}"
+    else:
+        text = f"删除 {stats['files']} 个文件（释放 {format_bytes(stats['bytes_freed'])}）"
+    if stats["failed"]:
+        text += f"，失败 {stats['failed']} 个"
+    return text
@@ -0,0 +1,171 @@
+"""
+网格版面自动校准
+
+识别脚本的网格/矩形参数是按某一种图版面（参考版面）在 200 DPI 下量出来的像素坐标。
+图的版面移动或缩放（换了页面尺寸、边距、坐标轴长度）后，固定坐标就会取错位置。
+本模块从 PDF 的矢量绘图中检测每个子图的坐标轴框（左纵轴 + 底横轴），
+把参考版面上的网格参数按坐标轴框映射到当前版面：
+- 每个网格对应一个坐标轴框（从左到右），按该框的平移和缩放换算原点与步长
+- 矩形（横轴下方的文字条）按第一个框的纵向缩放、全部框的横向范围换算
+
+每种页面尺寸只检测一次，结果保存在数据集缓存目录的 .cache/grid_calibration.json：
+    {"reference": {"page_size", "frames", "source"}, "templates": {页面尺寸: {"frames", "source"}}}
+参考版面可以指定一个已知与配置参数相符的 PDF；未指定时以第一个检测到坐标轴的版面为参考。
+版面与参考版面完全相同时直接使用配置参数（结果与不校准时逐位一致）。
+
+坐标：frames 为 PDF 点坐标 (left, top, right, bottom)；网格参数为整页参考像素坐标
+（PDF 点 × units，units = 参考 DPI / 72）。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from file_ops import dataset_cache_dir
+
+
+# ======== 配置区域（按需修改）========
+CALIBRATION_NAME = "grid_calibration.json"  # 位于数据集缓存目录（.cache）下
+AXIS_MIN_FRACTION = 0.2  # 坐标轴线段长度至少为页面宽（横轴）/高（纵轴）的比例
+CORNER_TOLERANCE = 2.0  # 横轴左端与纵轴下端的最大距离（点）
+# =====================================
+
+
+def page_size_key(rect) -> str:
+    return f"{rect.width:.1f}x{rect.height:.1f}"
+
+
+def _axis_segments(drawings, page_rect):
+    """描边路径中足够长的水平线段 (x0, x1, y) 与竖直线段 (x, y0, y1)"""
+    min_h = page_rect.width * AXIS_MIN_FRACTION
+    min_v = page_rect.height * AXIS_MIN_FRACTION
+    horizontals, verticals = [], []
+
+    def add(x1, y1, x2, y2):
+        if abs(y1 - y2) < 0.01 and abs(x2 - x1) >= min_h:
+            horizontals.append((min(x1, x2), max(x1, x2), y1))
+        elif abs(x1 - x2) < 0.01 and abs(y2 - y1) >= min_v:
+            verticals.append((x1, min(y1, y2), max(y1, y2)))
+
+    for path in drawings:
+        if "s" not in path.get("type", "") or path.get("color") is None:
+            continue
+        for item in path["items"]:
+            if item[0] == "l":
+                add(item[1].x, item[1].y, item[2].x, item[2].y)
+            elif item[0] == "re":
+                r = item[1]
+                add(r.x0, r.y1, r.x1, r.y1)  # 底边
+                add(r.x0, r.y0, r.x0, r.y1)  # 左边
+    return horizontals, verticals
+
+
+def detect_frames(page) -> list[list[float]]:
+    """检测坐标轴框：横轴左端与纵轴下端相交处即为一个子图，按从左到右、从上到下排序"""
+    horizontals, verticals = _axis_segments(page.get_drawings(), page.rect)
+    frames = set()
+    for hx0, hx1, hy in horizontals:
+        for vx, vy0, vy1 in verticals:
+            if abs(vx - hx0) <= CORNER_TOLERANCE and abs(vy1 - hy) <= CORNER_TOLERANCE:
+                frames.add((round(hx0, 2), round(vy0, 2), round(hx1, 2), round(hy, 2)))
+    return [list(f) for f in sorted(frames)]
+
+
+def load_calibration(base_path) -> dict:
+    path = dataset_cache_dir(base_path) / CALIBRATION_NAME
+    calibration = {}
+    if path.exists():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                calibration = json.load(f)
+        except Exception as e:
+            print(f"⚠️ 校准文件无法读取，将重新检测: {e}")
+    calibration.setdefault("reference", None)
+    calibration.setdefault("templates", {})
+    return calibration
+
+
+def save_calibration(base_path, calibration: dict) -> None:
+    path = dataset_cache_dir(base_path) / CALIBRATION_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(calibration, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def set_reference(calibration: dict, page, source) -> bool:
+    """以该页面的版面为参考版面（即配置参数所对应的版面）；检测不到坐标轴时返回 False"""
+    frames = detect_frames(page)
+    if not frames:
+        return False
+    calibration["reference"] = {"page_size": page_size_key(page.rect), "frames": frames, "source": str(source)}
+    return True
+
+
+def template_frames(page, calibration: dict, source=None) -> list:
+    """该页面尺寸的坐标轴框（每种页面尺寸只检测一次）"""
+    key = page_size_key(page.rect)
+    template = calibration["templates"].get(key)
+    if template is None:
+        frames = detect_frames(page)
+        template = {"frames": frames, "source": str(source) if source else None}
+        calibration["templates"][key] = template
+        print(f"  📐 新版面 {key}：检测到 {len(frames)} 个坐标轴框（{source}）")
+    if calibration["reference"] is None and template["frames"]:
+        calibration["reference"] = {"page_size": key, "frames": template["frames"], "source": template["source"]}
+        print(f"  📐 以版面 {key} 作为参考版面（配置中的网格参数应与它对应）")
+    return template["frames"]
+
+
+def _axis_map(ref_frame, frame, units):
+    """参考框 -> 当前框的 (x 缩放, x 平移, y 缩放, y 平移)，单位为参考像素；y 以横轴为锚点"""
+    rx0, ry0, rx1, ry1 = (v * units for v in ref_frame)
+    x0, y0, x1, y1 = (v * units for v in frame)
+    ax = (x1 - x0) / (rx1 - rx0)
+    ay = (y1 - y0) / (ry1 - ry0)
+    return ax, x0 - rx0 * ax, ay, y1 - ry1 * ay
+
+
+def fit_layout(base_layout: dict, ref_frames: list, frames: list, units: float) -> dict | None:
+    """
+    把参考版面上的网格/矩形映射到当前版面。
+    base_layout: {'grids': [((ox, oy), step_x, step_y, cols, rows), ...], 'rect': (l, t, r, b)}
+    框数与参考版面不同或少于网格数时无法对应，返回 None。
+    """
+    if frames == ref_frames:
+        return base_layout
+    grids = base_layout["grids"]
+    if len(frames) != len(ref_frames) or len(frames) < len(grids):
+        return None
+    mapped = []
+    for grid, ref_frame, frame in zip(grids, ref_frames, frames):
+        (ox, oy), step_x, step_y, cols, rows = grid
+        ax, bx, ay, by = _axis_map(ref_frame, frame, units)
+        mapped.append(((ox * ax + bx, oy * ay + by), step_x * ax, step_y * ay, cols, rows))
+    # 矩形横跨所有子图：横向按最左/最右框的范围，纵向按第一个框
+    span_ref = [ref_frames[0][0], ref_frames[0][1], ref_frames[-1][2], ref_frames[0][3]]
+    span = [frames[0][0], frames[0][1], frames[-1][2], frames[0][3]]
+    ax, bx, ay, by = _axis_map(span_ref, span, units)
+    left, top, right, bottom = base_layout["rect"]
+    rect = (round(left * ax + bx), round(top * ay + by), round(right * ax + bx), round(bottom * ay + by))
+    return {"grids": mapped, "rect": rect}
+
+
+def layout_for_page(page, calibration: dict, base_layout: dict, units: float, source=None) -> dict:
+    """页面对应的网格/矩形；检测不到坐标轴或无法与参考版面对应时使用配置参数"""
+    frames = template_frames(page, calibration, source)
+    reference = calibration["reference"]
+    if reference is None or not frames:
+        return base_layout
+    layout = fit_layout(base_layout, reference["frames"], frames, units)
+    if layout is None:
+        key = page_size_key(page.rect)
+        template = calibration["templates"][key]
+        if not template.get("warned"):
+            print(f"  ⚠️ 版面 {key} 的坐标轴框数（{len(frames)}）与参考版面（{len(reference['frames'])}）不一致，使用配置参数")
+            template["warned"] = True
+        return base_layout
+    return layout
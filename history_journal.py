@@ -0,0 +1,88 @@
+"""
+PDF 分类工具的历史记录（快照 + 追加式操作日志）
+
+recognition_pdf_excellent_streamlit.py 每次归类 / 跳过都要持久化进度。以前每次点击都把整个会话状态
+（全部历史记录、日志、PDF 列表、任务列表）重写进 .history.json，会话越长每次写得越多。现在分为两部分：
+- 快照 .history.json：完整状态，在目录切换、撤销、重开等低频操作时写入（先写临时文件再替换），
+  写入后清空操作日志
+- 操作日志 .history.jsonl：每次归类 / 跳过追加一行，写入量与会话长度无关；
+  累计 COMPACT_EVERY 条后由调用方写一次快照（合并）
+
+读取时取快照，再按顺序重放操作日志中序号大于快照 journal_seq 的条目。
+写快照与清空日志之间中断时，日志中已包含在快照里的条目按序号跳过，不会重复；
+日志末尾写了一半的行（程序在写入时被终止）被忽略。
+
+操作日志每行：{"seq", "record": [操作, 文件名, 源路径, 目标路径, source_dir, target_dir], "log", "current_index", "processed_pdfs"}
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+
+# ======== 配置区域（按需修改）========
+HISTORY_FILE = Path(".history.json")  # 快照（位于运行目录）；操作日志为同名的 .jsonl
+COMPACT_EVERY = 200  # 操作日志累计多少条后合并为快照
+# =====================================
+
+
+def journal_path(history_path=HISTORY_FILE) -> Path:
+    return Path(history_path).with_suffix(".jsonl")
+
+
+def write_snapshot(state: dict, history_path=HISTORY_FILE) -> None:
+    """写入完整快照（state 中应包含 journal_seq），然后清空操作日志"""
+    history_path = Path(history_path)
+    tmp = history_path.with_name(history_path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, history_path)
+    # 快照已包含日志中的全部条目；这里中断时，加载会按序号跳过它们
+    open(journal_path(history_path), "w", encoding="utf-8").close()
+
+
+def append_action(entry: dict, history_path=HISTORY_FILE) -> None:
+    """在操作日志末尾追加一条（一行 JSON）"""
+    with open(journal_path(history_path), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def _apply(state: dict, entry: dict) -> None:
+    state.setdefault("global_history", []).append(entry["record"])
+    if entry.get("log"):
+        state.setdefault("log_messages", []).append(entry["log"])
+    state["current_index"] = entry["current_index"]
+    state["processed_pdfs"] = entry["processed_pdfs"]
+    state["journal_seq"] = entry["seq"]
+
+
+def load_history(history_path=HISTORY_FILE) -> dict | None:
+    """快照 + 重放操作日志后的状态（键与快照相同）；两者都不存在时返回 None"""
+    history_path = Path(history_path)
+    journal = journal_path(history_path)
+    if not history_path.exists() and not journal.exists():
+        return None
+    state = {}
+    if history_path.exists():
+        with open(history_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    seq = state.setdefault("journal_seq", 0)
+    if journal.exists():
+        with open(journal, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 写了一半的行
+                if entry["seq"] > seq:
+                    _apply(state, entry)
+                    seq = entry["seq"]
+    return state
+
+
+def clear_history(history_path=HISTORY_FILE) -> None:
+    """删除快照与操作日志"""
+    Path(history_path).unlink(missing_ok=True)
+    journal_path(history_path).unlink(missing_ok=True)
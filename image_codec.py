@@ -0,0 +1,189 @@
+"""
+渲染图片的编码格式
+
+pdf_first_page_to_png.py 与自动识别的调试输出共用。每个调用方在自己的配置区域选择格式：
+- "png"：无损，compress_level 0-9（0 不压缩、1 最快；PyMuPDF pix.save 的默认压缩最慢）
+- "jpeg" / "webp"：有损，quality 1-100，文件最小；像素与渲染结果不完全一致，不适合做像素级识别
+- "raw"：.npy 未压缩数组，不编码，读取时可内存映射；体积最大
+
+直接运行本脚本对 BASE_DIR 中的部分 PDF 做编码基准测试（编码耗时、解码耗时、文件大小）。
+
+依赖：NumPy、Pillow（raw 格式只需要 NumPy）；基准测试还需要 PyMuPDF
+"""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+# ======== 配置区域（按需修改）========
+BASE_DIR = Path("files_debug")
+BENCHMARK_FILES = 20  # 基准测试使用的 PDF 数量
+BENCHMARK_DPI = 200
+# =====================================
+
+FORMAT_SUFFIXES = {"png": ".png", "jpeg": ".jpg", "webp": ".webp", "raw": ".npy"}
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".webp", ".npy")  # 读取时识别的扩展名
+LOSSLESS_FORMATS = {"png", "raw"}
+DEFAULT_COMPRESS_LEVEL = 1
+DEFAULT_QUALITY = 90
+
+
+def first_page_image_dir(part_dir) -> Path:
+    """part 目录的首页图片目录：part_dir / {number}_{category}_{part}_img"""
+    part_dir = Path(part_dir)
+    category_dir = part_dir.parent
+    return part_dir / f"{category_dir.parent.name}_{category_dir.name}_{part_dir.name}_img"
+
+
+def find_image(image_dir, stem: str, not_older_than_ns: int = 0) -> Path | None:
+    """image_dir 中名为 stem 的图片（任一支持的格式，多个时取最新）；修改时间早于 not_older_than_ns 的不算"""
+    best, best_mtime = None, not_older_than_ns - 1
+    for suffix in IMAGE_SUFFIXES:
+        path = Path(image_dir) / f"{stem}{suffix}"
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            continue
+        if mtime > best_mtime:
+            best, best_mtime = path, mtime
+    return best
+
+
+def output_path(output_dir, stem: str, fmt: str) -> Path:
+    if fmt not in FORMAT_SUFFIXES:
+        raise ValueError(f"不支持的图片格式: {fmt}（可选 {', '.join(FORMAT_SUFFIXES)}）")
+    return Path(output_dir) / f"{stem}{FORMAT_SUFFIXES[fmt]}"
+
+
+def remove_other_formats(path: Path) -> None:
+    """删除同名的其他格式文件（换格式重新导出后，同一页不会留下两张图）"""
+    for suffix in IMAGE_SUFFIXES:
+        other = path.with_suffix(suffix)
+        if other != path:
+            other.unlink(missing_ok=True)
+
+
+def encode_image(
+    arr: np.ndarray,
+    path,
+    fmt: str = "png",
+    quality: int = DEFAULT_QUALITY,
+    compress_level: int = DEFAULT_COMPRESS_LEVEL,
+) -> int:
+    """把 (高, 宽, 3) uint8 数组按格式写入 path，返回文件字节数"""
+    path = Path(path)
+    if fmt == "raw":
+        with open(path, "wb") as f:
+            np.save(f, np.ascontiguousarray(arr, dtype=np.uint8))
+        return path.stat().st_size
+    if Image is None:
+        raise RuntimeError("未安装 Pillow，只能使用 raw 格式（pip install pillow）")
+    img = Image.fromarray(np.asarray(arr))
+    if fmt == "png":
+        img.save(path, format="PNG", compress_level=compress_level)
+    elif fmt == "jpeg":
+        img.save(path, format="JPEG", quality=quality)
+    elif fmt == "webp":
+        img.save(path, format="WEBP", quality=quality, method=0)  # method 0：编码最快
+    else:
+        raise ValueError(f"不支持的图片格式: {fmt}（可选 {', '.join(FORMAT_SUFFIXES)}）")
+    return path.stat().st_size
+
+
+def load_image(path) -> np.ndarray:
+    """读取图片为 RGB uint8 数组；.npy 为只读内存映射，不复制数据"""
+    path = Path(path)
+    if path.suffix.lower() == ".npy":
+        return np.load(path, mmap_mode="r")
+    image = Image.open(path)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return np.asarray(image)
+
+
+def benchmark(pdf_paths, dpi: int = BENCHMARK_DPI, out_dir=None) -> list[dict]:
+    """
+    对 PDF 首页渲染结果逐一编码/解码，返回每种设置的统计：
+    [{'setting', 'files', 'encode_ms', 'decode_ms', 'bytes', 'exact'}, ...]（耗时为单张平均）
+    """
+    import tempfile
+
+    import fitz  # PyMuPDF
+
+    arrays, pixmaps = [], []
+    for pdf_path in pdf_paths:
+        with fitz.open(pdf_path) as doc:
+            if doc.page_count == 0:
+                continue
+            pix = doc.load_page(0).get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72), alpha=False, colorspace=fitz.csRGB)
+        pixmaps.append(pix)
+        arrays.append(np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n))
+    if not arrays:
+        return []
+
+    settings = [("png (pix.save)", "fitz", {})]
+    settings += [(f"png level {level}", "png", {"compress_level": level}) for level in (0, 1, 6, 9)]
+    settings += [(f"jpeg q{q}", "jpeg", {"quality": q}) for q in (95, 85)]
+    settings += [(f"webp q{q}", "webp", {"quality": q}) for q in (90, 75)]
+    settings += [("raw (.npy)", "raw", {})]
+
+    rows = []
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmp:
+        for name, fmt, kwargs in settings:
+            encode = decode = 0.0
+            size = 0
+            exact = True
+            for i, (arr, pix) in enumerate(zip(arrays, pixmaps)):
+                path = output_path(tmp, f"p{i}", "png" if fmt == "fitz" else fmt)
+                start = time.perf_counter()
+                if fmt == "fitz":
+                    pix.save(path.as_posix())
+                else:
+                    encode_image(arr, path, fmt, **kwargs)
+                encode += time.perf_counter() - start
+                size += path.stat().st_size
+                start = time.perf_counter()
+                decoded = np.array(load_image(path))
+                decode += time.perf_counter() - start
+                exact = exact and np.array_equal(decoded, arr)
+                path.unlink()
+            n = len(arrays)
+            rows.append({
+                "setting": name,
+                "files": n,
+                "encode_ms": round(encode * 1000 / n, 2),
+                "decode_ms": round(decode * 1000 / n, 2),
+                "bytes": size // n,
+                "exact": exact,
+            })
+    return rows
+
+
+def main():
+    from file_ops import format_bytes
+
+    pdfs = sorted(p for p in BASE_DIR.rglob("*.pdf") if not any(part.startswith(".") for part in p.parts))
+    pdfs = pdfs[:BENCHMARK_FILES]
+    print("=" * 60)
+    print(f"⏱️ 图片编码基准测试: {len(pdfs)} 个 PDF，{BENCHMARK_DPI} DPI")
+    rows = benchmark(pdfs, BENCHMARK_DPI)
+    if not rows:
+        print("ℹ️ 没有可用的 PDF")
+        return
+    print(f"{'设置':<16}{'编码 ms':>10}{'解码 ms':>10}{'单张大小':>12}  无损")
+    for row in rows:
+        print(f"{row['setting']:<16}{row['encode_ms']:>10}{row['decode_ms']:>10}{format_bytes(row['bytes']):>12}  "
+              f"{'✓' if row['exact'] else '✗'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+表格入库脚本（SQLite）
+
+功能：
+- 将所有 part 表（species_taxonomy_table/*.xlsx）、分类结果表（*.分类结果.xlsx）和汇总表（*_summary.xlsx）
+  读入一个带索引的 SQLite 数据库，便于跨样本查询，例如：
+  “哪些样本含有属 X，且 reads > N，且被标成橙色”
+- 按文件修改时间与大小增量入库：未变化的文件直接跳过，变化的文件整体替换，已删除的文件从库中移除
+- 索引覆盖 属(genus)、样本(sample)、类别(category)、颜色标签(label)
+
+依赖：openpyxl（sqlite3 为标准库）
+安装：pip install openpyxl
+
+查询：main_gui.py 中的“🔎 数据查询”页面，或调用 `query_rows`
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from file_ops import dataset_cache_dir
+
+
+# ======== 配置区域（按需修改）========
+BASE_DIR = Path("files_debug")
+DB_NAME = "tables.sqlite3"  # 数据库文件（位于 BASE_DIR/.cache 下）
+GENUS_HEADER = "属"
+READS_HEADER = "reads"
+DETAIL_SHEET = "明细"  # 汇总表的增量明细工作表不入库（与主表重复）
+
+# 属列填充色 -> 颜色标签
+LABEL_BY_COLOR = {
+    "FF7F00": "orange",  # mark_excel_ff7f00 标橙（极好）
+    "FFA500": "orange",
+    "FFFF00": "yellow",
+    "00FF00": "green",
+    "FF0000": "red",
+}
+# =====================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    sample TEXT,
+    category TEXT,
+    part TEXT,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    headers TEXT
+);
+CREATE TABLE IF NOT EXISTS rows (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    row_no INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    sample TEXT,
+    category TEXT,
+    part TEXT,
+    genus TEXT,
+    reads REAL,
+    label TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_rows_genus ON rows(genus);
+CREATE INDEX IF NOT EXISTS idx_rows_sample ON rows(sample);
+CREATE INDEX IF NOT EXISTS idx_rows_category ON rows(category);
+CREATE INDEX IF NOT EXISTS idx_rows_label ON rows(label);
+CREATE INDEX IF NOT EXISTS idx_rows_file ON rows(file_id);
+"""
+
+# 查询页面可用的表类型
+KINDS = {
+    "part": "part表",
+    "classification": "分类结果",
+    "summary": "汇总表",
+}
+
+
+def default_db_path(base_dir: Path = BASE_DIR) -> Path:
+    return dataset_cache_dir(base_dir) / DB_NAME
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _color_label(cell) -> str:
+    """将属列单元格填充色转换为颜色标签（无色为 'none'，未知颜色保留 RGB）"""
+    fill = getattr(cell, "fill", None)
+    fg = getattr(fill, "fgColor", None)
+    rgb = getattr(fg, "rgb", None)
+    if getattr(fill, "fill_type", None) is None or not isinstance(rgb, str):
+        return "none"
+    rgb = rgb.upper()[-6:]
+    if rgb == "000000":
+        return "none"
+    return LABEL_BY_COLOR.get(rgb, rgb)
+
+
+def _to_float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def find_table_files(base_dir: Path) -> list[tuple[Path, str, str, str | None, str | None]]:
+    """
+    列出需要入库的表格：[(路径, 类型, 样本, 类别, part), ...]
+    只按固定目录结构查找，不做整树遍历。
+    """
+    found = []
+    for number_dir in sorted(Path(base_dir).iterdir()):
+        if not number_dir.is_dir() or number_dir.name.startswith("."):
+            continue
+        sample = number_dir.name
+        for summary in sorted(number_dir.glob("*_summary.xlsx")):
+            category = summary.name[len(sample) + 1:-len("_summary.xlsx")] if summary.name.startswith(sample + "_") else None
+            found.append((summary, "summary", sample, category, None))
+        for category_dir in sorted(number_dir.iterdir()):
+            if not category_dir.is_dir() or category_dir.name.startswith("."):
+                continue
+            for part_dir in sorted(category_dir.iterdir()):
+                if not part_dir.is_dir() or not part_dir.name.startswith("part"):
+                    continue
+                classification = part_dir / f"{sample}.{category_dir.name}.{part_dir.name}.分类结果.xlsx"
+                if classification.exists():
+                    found.append((classification, "classification", sample, category_dir.name, part_dir.name))
+                table_dir = part_dir / "species_taxonomy_table"
+                if table_dir.exists():
+                    for xlsx_file in sorted(table_dir.glob("*.xlsx")):
+                        found.append((xlsx_file, "part", sample, category_dir.name, part_dir.name))
+    return found
+
+
+def _read_table(path: Path):
+    """read_only 模式读取第一个（主）工作表：返回 (表头, [(行号, 值列表, 属列单元格)])"""
+    wb = load_workbook(path, read_only=True)
+    try:
+        titles = [t for t in wb.sheetnames if not (t == DETAIL_SHEET or t.startswith(DETAIL_SHEET + "_"))]
+        ws = wb[titles[0]] if titles else wb.active
+        rows = ws.iter_rows()
+        header_row = next(rows, ())
+        headers = ["" if c.value is None else str(c.value) for c in header_row]
+        genus_idx = headers.index(GENUS_HEADER) if GENUS_HEADER in headers else None
+        data = []
+        for row_no, row in enumerate(rows, start=2):
+            values = [c.value for c in row]
+            if all(v is None for v in values):
+                continue
+            genus_cell = row[genus_idx] if genus_idx is not None and genus_idx < len(row) else None
+            data.append((row_no, values, genus_cell))
+        return headers, data
+    finally:
+        wb.close()
+
+
+def ingest_file(conn, path: Path, kind: str, sample: str, category: str | None, part: str | None) -> int:
+    """将单个表格（整体替换）写入数据库，返回入库行数"""
+    st = path.stat()
+    headers, data = _read_table(path)
+    genus_idx = headers.index(GENUS_HEADER) if GENUS_HEADER in headers else None
+    reads_idx = headers.index(READS_HEADER) if READS_HEADER in headers else None
+
+    conn.execute("DELETE FROM files WHERE path = ?", (str(path),))
+    cur = conn.execute(
+        "INSERT INTO files (path, kind, sample, category, part, mtime_ns, size, headers) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (str(path), kind, sample, category, part, st.st_mtime_ns, st.st_size, json.dumps(headers, ensure_ascii=False)),
+    )
+    file_id = cur.lastrowid
+
+    records = []
+    for row_no, values, genus_cell in data:
+        genus = values[genus_idx] if genus_idx is not None and genus_idx < len(values) else None
+        reads = values[reads_idx] if reads_idx is not None and reads_idx < len(values) else None
+        records.append((
+            file_id,
+            row_no,
+            kind,
+            sample,
+            category,
+            part,
+            str(genus).strip() if genus is not None else None,
+            _to_float(reads),
+            _color_label(genus_cell) if genus_cell is not None else None,
+            json.dumps(values, ensure_ascii=False, default=str),
+        ))
+    conn.executemany(
+        "INSERT INTO rows (file_id, row_no, kind, sample, category, part, genus, reads, label, data) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        records,
+    )
+    return len(records)
+
+
+def ingest_directory(base_dir: Path = BASE_DIR, db_path: Path | None = None) -> dict:
+    """
+    增量入库：只重新读取修改时间或大小发生变化的表格，并移除已不存在的表格。
+    返回统计：{'ingested', 'skipped', 'removed', 'failed', 'rows'}
+    """
+    base_dir = Path(base_dir)
+    db_path = Path(db_path) if db_path else default_db_path(base_dir)
+    stats = {"ingested": 0, "skipped": 0, "removed": 0, "failed": 0, "rows": 0}
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = connect(db_path)
+    try:
+        known = {path: (mtime_ns, size) for path, mtime_ns, size in conn.execute("SELECT path, mtime_ns, size FROM files")}
+        seen = set()
+        for path, kind, sample, category, part in find_table_files(base_dir):
+            key = str(path)
+            seen.add(key)
+            try:
+                st = path.stat()
+                if known.get(key) == (st.st_mtime_ns, st.st_size):
+                    stats["skipped"] += 1
+                    continue
+                with conn:
+                    stats["rows"] += ingest_file(conn, path, kind, sample, category, part)
+                stats["ingested"] += 1
+                print(f"  ✅ 入库: {path}")
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"  ❌ 入库失败: {path} - {e}")
+        removed = [p for p in known if p not in seen]
+        with conn:
+            conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in removed])
+        stats["removed"] = len(removed)
+    finally:
+        conn.close()
+    return stats
+
+
+def distinct_values(db_path: Path, column: str) -> list[str]:
+    """files 表中某列（sample / category）的所有取值，用于查询页面的下拉框"""
+    if column not in ("sample", "category", "kind"):
+        raise ValueError(f"不支持的列: {column}")
+    conn = connect(db_path)
+    try:
+        return [r[0] for r in conn.execute(f"SELECT DISTINCT {column} FROM files WHERE {column} IS NOT NULL ORDER BY {column}")]
+    finally:
+        conn.close()
+
+
+def _filter_sql(genus=None, sample=None, category=None, label=None, kind=None, min_reads=None):
+    """筛选条件 -> (WHERE 子句, 参数)"""
+    where, params = [], []
+    for column, value in (("r.genus", genus), ("r.sample", sample), ("r.category", category),
+                          ("r.label", label), ("r.kind", kind)):
+        if value not in (None, ""):
+            where.append(f"{column} = ?")
+            params.append(value)
+    if min_reads is not None:
+        where.append("r.reads > ?")
+        params.append(min_reads)
+    return ("WHERE " + " AND ".join(where)) if where else "", params
+
+
+def count_rows(db_path: Path, **filters) -> int:
+    """符合筛选条件的总行数（筛选参数同 query_rows），用于先确定页数再分页查询"""
+    where_sql, params = _filter_sql(**filters)
+    conn = connect(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM rows r {where_sql}", params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def query_rows(db_path: Path, genus=None, sample=None, category=None, label=None, kind=None,
+               min_reads=None, limit=50, offset=0):
+    """
+    分页查询（筛选与分页均在 SQLite 中完成）。
+    返回：(总行数, [{'path', 'kind', 'sample', 'category', 'part', 'row_no', 'genus', 'reads', 'label', 'data'}, ...])
+    """
+    where_sql, params = _filter_sql(genus, sample, category, label, kind, min_reads)
+
+    conn = connect(db_path)
+    try:
+        total = conn.execute(f"SELECT COUNT(*) FROM rows r {where_sql}", params).fetchone()[0]
+        cur = conn.execute(
+            f"SELECT f.path, r.kind, r.sample, r.category, r.part, r.row_no, r.genus, r.reads, r.label, r.data "
+            f"FROM rows r JOIN files f ON f.id = r.file_id {where_sql} "
+            # 按入库顺序（rowid）分页，无需对结果集整体排序
+            f"ORDER BY r.rowid LIMIT ? OFFSET ?",
+            params + [int(limit), int(offset)],
+        )
+        columns = [d[0] for d in cur.description]
+        return total, [dict(zip(columns, row)) for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def main():
+    print("=" * 60)
+    print(f"🗄️ 表格入库: {BASE_DIR} -> {default_db_path(BASE_DIR)}")
+    if not BASE_DIR.exists():
+        print(f"⚠️ 目录不存在: {BASE_DIR}")
+        return
+    stats = ingest_directory(BASE_DIR)
+    print("\n" + "=" * 60)
+    print(f"入库文件: {stats['ingested']}（{stats['rows']} 行），未变化跳过: {stats['skipped']}，"
+          f"移除: {stats['removed']}，失败: {stats['failed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import subprocess
 import os
 import json
 from pathlib import Path
+import ingest_excel_db
 
 
 # 页面配置
@@ -23,6 +24,7 @@ CONFIG_FILE = "scripts_config.json"
 DEFAULT_SCRIPTS = [
     {"file": "add_excel_title.py", "name": "添加Excel标题(属)", "icon": "📝", "type": "script"},
     {"file": "attract_pdf_good.py", "name": "提取PDF（优质）", "icon": "📄", "type": "script"},
+    {"file": "selection_manifest.py", "name": "导出筛选PDF", "icon": "📤", "type": "script"},
     {"file": "check_excel_null.py", "name": "检查Excel空值", "icon": "🔍", "type": "script"},
     {"file": "create_excel_sum.py", "name": "创建Excel汇总", "icon": "📊", "type": "script"},
     {"file": "delete_excel_col_种.py", "name": "删除Excel列（种）", "icon": "🗑️", "type": "script"},
@@ -38,7 +40,10 @@ DEFAULT_SCRIPTS = [
     {"file": "translate_sum_genus_from_mapping.py", "name": "属名翻译（汇总）", "icon": "🈶", "type": "script"},
     {"file": "pdf_first_page_to_png.py", "name": "PDF首页转PNG", "icon": "🖼️", "type": "script"},
     {"file": "Recognition_PDF_automatically.py", "name": "PDF自动识别", "icon": "🤖", "type": "script"},
+    {"file": "pdf_index.py", "name": "PDF内容索引", "icon": "🗂️", "type": "script"},
+    {"file": "tune_recognition_thresholds.py", "name": "识别阈值调优", "icon": "📈", "type": "script"},
     {"file": "clean_temp_images.py", "name": "清理临时图片", "icon": "🧹", "type": "script"},
+    {"file": "ingest_excel_db.py", "name": "表格入库（SQLite）", "icon": "🗄️", "type": "script"},
     {"file": "recognition_pdf_excellent.py", "name": "PDF分类工具（旧版）", "icon": "🎯", "type": "script"},
     {"file": "recognition_pdf_excellent_streamlit.py", "name": "PDF分类工具（Streamlit）", "icon": "🎯", "type": "streamlit"},
 ]
@@ -170,8 +175,7 @@ DEFAULT_BATCH_QUEUE_3 = [
     "rename_excel_cell.py",
     "mark_excel_cell.py",
     "attract_pdf_good.py",
-    "pdf_first_page_to_png.py",
-    "Recognition_PDF_automatically.py",
+    "Recognition_PDF_automatically.py",  # 直接渲染 PDF 识别，不再需要先导出 PNG
     "mark_excel_ff7f00.py",
     "create_excel_sum.py",
     "process_sum_excel_sum.py",
@@ -323,6 +327,81 @@ st.info("💡 点击对应按钮即可运行相应的Python脚本。Streamlit应
 
 st.markdown("---")
 
+# ============= 数据查询窗口 =============
+st.subheader("🔎 数据查询")
+
+DB_PATH = ingest_excel_db.default_db_path()
+LABEL_OPTIONS = {"全部": None, "橙色": "orange", "黄色": "yellow", "绿色": "green", "红色": "red", "无色": "none"}
+KIND_OPTIONS = {"全部": None, **{name: kind for kind, name in ingest_excel_db.KINDS.items()}}
+
+col_db_info, col_db_ingest = st.columns([4, 1])
+with col_db_ingest:
+    if st.button("🗄️ 更新数据库", use_container_width=True, key="db_ingest"):
+        if not ingest_excel_db.BASE_DIR.exists():
+            st.error(f"❌ 目录不存在: {ingest_excel_db.BASE_DIR}")
+        else:
+            with st.spinner("正在增量入库..."):
+                stats = ingest_excel_db.ingest_directory()
+            st.success(f"✅ 入库 {stats['ingested']} 个文件（{stats['rows']} 行），跳过 {stats['skipped']}，移除 {stats['removed']}，失败 {stats['failed']}")
+with col_db_info:
+    if DB_PATH.exists():
+        st.caption(f"数据库: {DB_PATH}")
+    else:
+        st.caption("数据库尚未建立，请先点击“更新数据库”或运行“表格入库（SQLite）”脚本")
+
+if DB_PATH.exists():
+    q1, q2, q3, q4, q5, q6 = st.columns([2, 2, 2, 1, 1, 1])
+    with q1:
+        q_genus = st.text_input("属（精确匹配）", key="q_genus").strip()
+    with q2:
+        q_sample = st.selectbox("样本", ["全部"] + ingest_excel_db.distinct_values(DB_PATH, "sample"), key="q_sample")
+    with q3:
+        q_category = st.selectbox("类别", ["全部"] + ingest_excel_db.distinct_values(DB_PATH, "category"), key="q_category")
+    with q4:
+        q_label = st.selectbox("颜色", list(LABEL_OPTIONS), key="q_label")
+    with q5:
+        q_kind = st.selectbox("表类型", list(KIND_OPTIONS), key="q_kind")
+    with q6:
+        q_min_reads = st.number_input("reads >", min_value=0.0, value=0.0, step=1.0, key="q_min_reads")
+
+    filters = dict(
+        genus=q_genus or None,
+        sample=None if q_sample == "全部" else q_sample,
+        category=None if q_category == "全部" else q_category,
+        label=LABEL_OPTIONS[q_label],
+        kind=KIND_OPTIONS[q_kind],
+        min_reads=q_min_reads if q_min_reads > 0 else None,
+    )
+    p1, p2, _ = st.columns([1, 1, 4])
+    with p1:
+        page_size = st.selectbox("每页行数", [50, 100, 200, 500], key="q_page_size")
+    # 先统计总行数确定页数：筛选条件变化后行数变少时，把页码收回到最后一页，避免越界查到空页
+    total = ingest_excel_db.count_rows(DB_PATH, **filters)
+    page_count = max(1, (total + page_size - 1) // page_size)
+    if st.session_state.get("q_page_no", 1) > page_count:
+        st.session_state["q_page_no"] = page_count
+    with p2:
+        page_no = st.number_input("页码", min_value=1, max_value=page_count, value=1, step=1, key="q_page_no")
+    page_no = min(int(page_no), page_count)
+
+    total, records = ingest_excel_db.query_rows(
+        DB_PATH,
+        **filters,
+        limit=page_size,
+        offset=(page_no - 1) * page_size,
+    )
+    st.markdown(f"**共 {total} 行，第 {page_no}/{page_count} 页**")
+    if records:
+        st.dataframe(
+            [{k: v for k, v in r.items() if k != "data"} for r in records],
+            use_container_width=True,
+            hide_index=True,
+        )
+    else:
+        st.info("没有符合条件的数据")
+
+st.markdown("---")
+
 # 显示 README
 st.subheader("📖 项目说明")
 
@@ -1,9 +1,17 @@
 #从某个文件夹中提取pdf名字，并将xlsx涂色'#ff7f00'
+#索引模式：每个 part 的“极好属名”集合缓存在 .excellent_genera.json 中（非常好目录未变化时不再重新扫描），
+#先以 read_only 方式只扫描目标列找出需要标橙的行，没有匹配时完全不改写文件
 import pandas as pd
+import json
 import os
 from pathlib import Path
 import openpyxl
-from openpyxl.utils import get_column_letter
+from openpyxl.styles import PatternFill
+from openpyxl.utils import get_column_letter, column_index_from_string
+
+# 每个 part 目录下的极好属名清单
+EXCELLENT_MANIFEST = ".excellent_genera.json"
+YELLOW_COLORS = {'FFFF00', '00FFFF00', 'FFFFFF00'}
 def extract_keyword_from_pdf_name(pdf_name):
     """
     从PDF文件名中提取属名关键字
@@ -84,6 +92,123 @@ def mark_excel_cells(xlsx_path, keywords, col):
     wb.save(xlsx_path)
     wb.close()
 
+def load_excellent_genera(part_dir):
+    """
+    读取 part 目录“非常好”子目录中 PDF 对应的属名集合。
+    结果连同“非常好”目录的修改时间保存在 part_dir/.excellent_genera.json；
+    目录未变化（未增删文件）时直接使用清单，不再列目录、拆分文件名。
+    """
+    part_dir = Path(part_dir)
+    pdf_dir = part_dir / "非常好"
+    if not pdf_dir.is_dir():
+        return set()
+    dir_mtime = pdf_dir.stat().st_mtime_ns
+    manifest_path = part_dir / EXCELLENT_MANIFEST
+    if manifest_path.exists():
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get("dir_mtime_ns") == dir_mtime:
+                return set(manifest.get("genera", []))
+        except Exception:
+            pass
+
+    genera = set()
+    with os.scandir(pdf_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(".pdf"):
+                keyword = extract_keyword_from_pdf_name(entry.name)
+                if keyword:
+                    genera.add(keyword)
+    try:
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump({"dir_mtime_ns": dir_mtime, "genera": sorted(genera)}, f, ensure_ascii=False)
+    except Exception as e:
+        print(f"  ⚠️ 无法写入清单 {manifest_path}: {e}")
+    return genera
+
+
+def find_rows_to_mark(xlsx_path, keyword_set, col):
+    """
+    read_only 模式只扫描 col 列，返回“黄色且内容属于 keyword_set”的行号列表。
+    """
+    col_idx = column_index_from_string(col)
+    rows = []
+    wb = openpyxl.load_workbook(xlsx_path, read_only=True)
+    try:
+        ws = wb.active
+        for row_idx, (cell,) in enumerate(ws.iter_rows(min_col=col_idx, max_col=col_idx), start=1):
+            if cell.value is None:
+                continue
+            fill = getattr(cell, 'fill', None)
+            if not fill or not fill.start_color or fill.start_color.rgb not in YELLOW_COLORS:
+                continue
+            if str(cell.value).strip() in keyword_set:
+                rows.append(row_idx)
+    finally:
+        wb.close()
+    return rows
+
+
+def mark_excel_cells_indexed(xlsx_path, keyword_set, col, fill_color='FF7F00'):
+    """
+    只修改需要标橙的单元格：先 read_only 扫描 col 列，没有匹配时不打开、不保存文件。
+    返回值：标橙的单元格数量
+    """
+    if not keyword_set:
+        return 0
+    rows = find_rows_to_mark(xlsx_path, keyword_set, col)
+    if not rows:
+        return 0
+    wb = openpyxl.load_workbook(xlsx_path)
+    ws = wb.active
+    fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
+    for row_idx in rows:
+        ws[f"{col}{row_idx}"].fill = fill
+    wb.save(xlsx_path)
+    wb.close()
+    return len(rows)
+
+
+def batch_mark_excel_cells_indexed(base_dir, excel_col, fill_color='FF7F00'):
+    """
+    索引版批量标橙：处理每个 part 的 species_taxonomy_table 目录中的所有 .xlsx。
+    极好属名来自 `load_excellent_genera` 的清单。
+    """
+    base_path = Path(base_dir)
+    success = 0
+    fail = 0
+    for number_dir in sorted(base_path.iterdir()):
+        if not number_dir.is_dir() or number_dir.name.startswith("."):
+            continue
+        for category_dir in sorted(number_dir.iterdir()):
+            if not category_dir.is_dir() or category_dir.name.startswith("."):
+                continue
+            for part_dir in sorted(category_dir.iterdir()):
+                if not part_dir.is_dir():
+                    continue
+                table_dir = part_dir / "species_taxonomy_table"
+                xlsx_files = sorted(table_dir.glob("*.xlsx")) if table_dir.is_dir() else []
+                if not xlsx_files:
+                    print(f"  No .xlsx files found in {part_dir}, skipping...")
+                    continue
+                try:
+                    keyword_set = load_excellent_genera(part_dir)
+                except Exception as e:
+                    print(f"  Error reading excellent PDFs in {part_dir}: {e}")
+                    fail += len(xlsx_files)
+                    continue
+                for xlsx_file in xlsx_files:
+                    try:
+                        marked = mark_excel_cells_indexed(xlsx_file, keyword_set, excel_col, fill_color)
+                        print(f"Processing: {xlsx_file} (标橙 {marked} 个)")
+                        success += 1
+                    except Exception as e:
+                        print(f"  Error processing file {xlsx_file}: {e}")
+                        fail += 1
+    return success, fail
+
+
 def batch_mark_excel_cells(base_dir, excel_col, fill_color):
     """
     批量处理指定目录下的所有.xlsx文件，标记指定列的单元格颜色。
@@ -98,11 +223,11 @@ def batch_mark_excel_cells(base_dir, excel_col, fill_color):
     fail = 0
     
     for number_dir in base_path.iterdir():
-        if not number_dir.is_dir():
+        if not number_dir.is_dir() or number_dir.name.startswith("."):
             continue
         
         for category_dir in number_dir.iterdir():
-            if not category_dir.is_dir():
+            if not category_dir.is_dir() or category_dir.name.startswith("."):
                 continue
             
             for part_dir in category_dir.iterdir():
@@ -145,5 +270,5 @@ if __name__ == "__main__":
     excel_col = "F"  # 需要标记颜色的列名
     fill_color = "FF7F00"  # 橙色
     
-    success, fail = batch_mark_excel_cells(base_dir, excel_col, fill_color)          
+    success, fail = batch_mark_excel_cells_indexed(base_dir, excel_col, fill_color)
     print("\n" + "=" * 60)
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+渲染像素缓存（可选）
+
+把渲染好的页面（或分类所需的裁剪区域）保存为未压缩的 .npy 数组，之后用
+np.load(mmap_mode="r") 直接映射读取：不经过 PNG 的 zlib 编解码，也不复制数据，
+重复做分类实验时几乎没有 I/O 开销。
+
+每个条目两个文件（位于缓存目录，默认 files_debug/.cache/page_cache）：
+- <key>.npy：(高, 宽, 3) uint8 像素
+- <key>.json：{"offset": [x, y], "source": PDF 路径}；在 .npy 之后写入，作为条目完整的标记
+key = <PDF sha1>_<dpi>dpi_<区域>，区域为整页像素坐标 left-top-right-bottom，整页为 full。
+按内容哈希索引：PDF 改名或移动后仍然命中，内容变化后自动失效。缓存目录可以随时整体删除。
+条目登记到 artifact_store.py（数据集为 .cache 的上一级），命中时更新访问时间，
+由 clean_temp_images.py 按磁盘预算清理最久未用的条目。
+
+依赖：numpy
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+import artifact_store
+from file_ops import cache_owner, dataset_cache_dir
+
+
+# ======== 配置区域（按需修改）========
+BASE_DIR = Path("files_debug")
+CACHE_DIR_NAME = "page_cache"  # 位于数据集缓存目录（.cache）下
+# =====================================
+
+
+def default_cache_dir(base_dir=BASE_DIR) -> Path:
+    return dataset_cache_dir(base_dir) / CACHE_DIR_NAME
+
+
+def cache_key(sha1: str, dpi: int, region=None) -> str:
+    area = "full" if region is None else "-".join(str(int(v)) for v in region)
+    return f"{sha1}_{dpi}dpi_{area}"
+
+
+def load_page(cache_dir, key: str) -> tuple[np.ndarray, tuple[int, int]] | None:
+    """读取缓存条目：返回 (只读内存映射数组, 左上角在整页中的像素坐标)；没有缓存时返回 None"""
+    cache_dir = Path(cache_dir)
+    meta_path = cache_dir / f"{key}.json"
+    if not meta_path.exists():
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arr = np.load(cache_dir / f"{key}.npy", mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    artifact_store.touch(cache_dir / f"{key}.npy")
+    return arr, tuple(meta["offset"])
+
+
+def save_page(cache_dir, key: str, arr: np.ndarray, offset=(0, 0), source=None) -> None:
+    """写入缓存条目（先写临时文件再替换，多个进程同时写同一条目也不会读到半个文件）"""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    suffix = f".{os.getpid()}.tmp"
+    npy_path, meta_path = cache_dir / f"{key}.npy", cache_dir / f"{key}.json"
+    tmp_npy, tmp_meta = npy_path.with_name(npy_path.name + suffix), meta_path.with_name(meta_path.name + suffix)
+    with open(tmp_npy, "wb") as f:
+        np.save(f, np.ascontiguousarray(arr, dtype=np.uint8))
+    os.replace(tmp_npy, npy_path)
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump({"offset": [int(v) for v in offset], "source": str(source) if source else None}, f)
+    os.replace(tmp_meta, meta_path)
+    artifact_store.register(npy_path, cache_owner(cache_dir), "page_cache", [meta_path])
+
+
+def cached_render(render, pdf_path, sha1: str, dpi: int, region=None, cache_dir=None):
+    """
+    带缓存的渲染：命中时直接映射 .npy，否则调用 render(pdf_path, dpi, region) 并写入缓存。
+    render 返回 (数组, 偏移) 或 None（空 PDF，不缓存）；本函数返回值与 render 相同。
+    """
+    cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    key = cache_key(sha1, dpi, region)
+    cached = load_page(cache_dir, key)
+    if cached is not None:
+        return cached
+    rendered = render(pdf_path, dpi, region)
+    if rendered is not None:
+        arr, offset = rendered
+        try:
+            save_page(cache_dir, key, arr, offset, source=pdf_path)
+        except OSError as e:
+            print(f"  ⚠️ 无法写入渲染缓存 {cache_dir}: {e}")
+    return rendered
@@ -1,61 +1,154 @@
 """
-将指定目录下所有 PDF 的第一页导出为 PNG。
+将指定目录下所有 PDF 的第一页导出为图片（默认 PNG）。
 
-依赖：PyMuPDF (fitz)
-安装：pip install pymupdf
+依赖：PyMuPDF (fitz)、NumPy、Pillow
+安装：pip install pymupdf numpy pillow
 
 用法：
     直接运行脚本前，先在下方配置 BASE_INPUT_DIR / BASE_OUTPUT_DIR
+    python pdf_first_page_to_png.py --jobs 4   # 4 个进程并行渲染（默认 CPU 核数 - 1）
+    python pdf_first_page_to_png.py --format jpeg --quality 85   # 只用于人工浏览时可用有损格式
+
+输出格式见 image_codec.py：png（可设压缩级别）、jpeg / webp（有损）、raw（.npy）。
+自动识别（batch_process_images）需要无损格式（png 或 raw）才能与直接识别 PDF 的结果一致。
+导出的图片登记到 artifact_store.py，由 clean_temp_images.py 按磁盘预算清理。
 """
 
 from __future__ import annotations
 
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import fitz  # PyMuPDF
+import numpy as np
+
+import artifact_store
+from image_codec import encode_image, first_page_image_dir, output_path as image_output_path, remove_other_formats
+from pool_utils import default_jobs
+from selection_manifest import list_part_pdfs
+
+
+# ======== 配置区域（按需修改）========
+OUTPUT_DPI = 200
+OUTPUT_FORMAT = "png"  # "png" / "jpeg" / "webp" / "raw"
+PNG_COMPRESS_LEVEL = 1  # 0-9：1 编码最快（文件约为默认压缩的 2 倍），6/9 文件最小
+OUTPUT_QUALITY = 90  # jpeg / webp 的质量（1-100）
+# =====================================
 
 
-def export_first_page_to_png(pdf_path: Path, output_dir: Path, dpi: int = 200) -> Path:
-    """导出单个 PDF 的第一页为 PNG，返回输出文件路径。"""
+def export_first_page_to_png(
+    pdf_path: Path,
+    output_dir: Path,
+    dpi: int = OUTPUT_DPI,
+    fmt: str = OUTPUT_FORMAT,
+    quality: int = OUTPUT_QUALITY,
+    compress_level: int = PNG_COMPRESS_LEVEL,
+) -> Path:
+    """导出单个 PDF 的第一页为图片（格式见 image_codec.py），返回输出文件路径。"""
     output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / f"{pdf_path.stem}.png"
+    output_path = image_output_path(output_dir, pdf_path.stem, fmt)
 
     with fitz.open(pdf_path) as doc:
         if doc.page_count == 0:
             return output_path
         page = doc.load_page(0)
         mat = fitz.Matrix(dpi / 72, dpi / 72)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        pix.save(output_path.as_posix())
+        pix = page.get_pixmap(matrix=mat, alpha=False, colorspace=fitz.csRGB)
+        arr = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        encode_image(arr, output_path, fmt, quality, compress_level)
+    remove_other_formats(output_path)
 
     return output_path
 
 
-def batch_export_pdfs(base_dir: Path, dpi: int = 200) -> None:
+def _export_task(task: tuple) -> tuple[Path | None, str | None]:
+    """进程池任务：每个子进程自行打开/关闭 PDF（fitz 文档对象不能跨进程传递）"""
+    pdf_path, output_dir, dpi, fmt, quality, compress_level = task
+    try:
+        return export_first_page_to_png(pdf_path, output_dir, dpi, fmt, quality, compress_level), None
+    except Exception as e:
+        return None, str(e)
+
+
+def collect_export_tasks(
+    base_dir: Path,
+    dpi: int = OUTPUT_DPI,
+    fmt: str = OUTPUT_FORMAT,
+    quality: int = OUTPUT_QUALITY,
+    compress_level: int = PNG_COMPRESS_LEVEL,
+) -> list[tuple]:
+    """按 number/category/partxx 结构列出需要导出的 PDF（含筛选清单中的 PDF）：[(pdf, 输出目录, dpi, 格式参数...), ...]"""
+    tasks = []
     for number_dir in sorted(base_dir.iterdir()):
-        if not number_dir.is_dir():
+        if not number_dir.is_dir() or number_dir.name.startswith("."):
             continue
         for category_dir in sorted(number_dir.iterdir()):
-            if not category_dir.is_dir():
+            if not category_dir.is_dir() or category_dir.name.startswith("."):
                 continue
             # 遍历所有 partxx 目录
             for part_dir in sorted(category_dir.iterdir()):
                 if not part_dir.is_dir() or not part_dir.name.startswith("part"):
                     continue
                 # 构建 part_dir / number_category_partxx_img 目录路径
-                number = number_dir.name
-                category = category_dir.name
-                output_subdir = base_dir/number/category/part_dir.name / f"{number}_{category}_{part_dir.name}_img"
-                for pdf_file in sorted(part_dir.glob("*.pdf")):
-                    try:
-                        output_path = export_first_page_to_png(pdf_file, output_subdir, dpi)
-                        print(f"  ✅ Exported: {output_path}")
-                    except Exception as e:
-                        print(f"  ❌ Failed to export {pdf_file}: {e}")
+                output_subdir = first_page_image_dir(part_dir)
+                for pdf_file in list_part_pdfs(part_dir):
+                    tasks.append((pdf_file, output_subdir, dpi, fmt, quality, compress_level))
+    return tasks
 
 
-OUTPUT_DPI = 200
+def batch_export_pdfs(
+    base_dir: Path,
+    dpi: int = OUTPUT_DPI,
+    jobs: int = 1,
+    fmt: str = OUTPUT_FORMAT,
+    quality: int = OUTPUT_QUALITY,
+    compress_level: int = PNG_COMPRESS_LEVEL,
+) -> None:
+    """
+    批量导出首页图片。
+    jobs > 1 时使用进程池并行渲染；进度按文件顺序输出（与串行时一致）。
+    """
+    tasks = collect_export_tasks(base_dir, dpi, fmt, quality, compress_level)
+    total = len(tasks)
+    if jobs <= 1 or total <= 1:
+        results = map(_export_task, tasks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(jobs, total))
+        # 每批若干个文件，减少进程间通信开销；map 按提交顺序返回结果
+        chunksize = max(1, total // (jobs * 8))
+        results = executor.map(_export_task, tasks, chunksize=chunksize)
+    exported = []
+    try:
+        for idx, (task, (output_path, error)) in enumerate(zip(tasks, results), start=1):
+            pdf_file = task[0]
+            if error is None:
+                exported.append(output_path)
+                print(f"  [{idx}/{total}] ✅ Exported: {output_path}")
+            else:
+                print(f"  [{idx}/{total}] ❌ Failed to export {pdf_file}: {error}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        # 在主进程中一次性登记（子进程不写登记表）
+        artifact_store.register_many(exported, base_dir, "image")
+
 
 if __name__ == "__main__":
     BASE_DIR = "files_debug"
-    batch_export_pdfs(Path(BASE_DIR), dpi=OUTPUT_DPI)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="导出 PDF 首页为 PNG")
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="并行渲染进程数（默认 CPU 核数 - 1，1 为串行）")
+    parser.add_argument("--dpi", type=int, default=OUTPUT_DPI, help="渲染分辨率")
+    parser.add_argument("--format", default=OUTPUT_FORMAT, choices=["png", "jpeg", "webp", "raw"], help="输出格式")
+    parser.add_argument("--quality", type=int, default=OUTPUT_QUALITY, help="jpeg / webp 质量（1-100）")
+    parser.add_argument("--compress-level", type=int, default=PNG_COMPRESS_LEVEL, help="png 压缩级别（0-9）")
+    args = parser.parse_args()
+    batch_export_pdfs(
+        Path(BASE_DIR),
+        dpi=args.dpi,
+        jobs=args.jobs,
+        fmt=args.format,
+        quality=args.quality,
+        compress_level=args.compress_level,
+    )
@@ -0,0 +1,218 @@
+"""
+数据集 PDF 内容索引（SQLite）
+
+同一张图的 PDF 往往有多份：damage_plots 原件、part 目录中的副本、非常好目录、重新交付的压缩包解压目录……
+本模块为整个数据集维护一份按内容哈希的索引（数据集缓存目录 .cache/pdf_index.sqlite）：
+- files：每个路径（相对数据集根目录）的大小、修改时间、sha1；大小与修改时间未变时不重新读取内容
+- documents：每个不同的 PDF（sha1）的大小、页数、首页尺寸（点）
+
+下游按 sha1 去重：自动识别每个不同的 PDF 只渲染、分类一次，结果分发给所有内容相同的路径；
+渲染缓存（page_cache.py）与预览也按 sha1 索引，同一内容只渲染一次。
+
+直接运行本脚本会扫描整个数据集并输出重复统计。
+
+依赖：PyMuPDF（可选，用于页数与首页尺寸；未安装时这两项为空）
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from file_ops import dataset_cache_dir, default_io_jobs, file_hash, format_bytes
+
+try:
+    import fitz  # PyMuPDF
+except Exception:
+    fitz = None
+
+
+# ======== 配置区域（按需修改）========
+BASE_DIR = Path("files_debug")
+INDEX_NAME = "pdf_index.sqlite"  # 位于数据集缓存目录（.cache）下，WAL 等附属文件也在这里
+# =====================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    sha1 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    page_count INTEGER,
+    width REAL,
+    height REAL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    sha1 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_sha1 ON files (sha1);
+"""
+
+
+def index_path(base_dir) -> Path:
+    return dataset_cache_dir(base_dir) / INDEX_NAME
+
+
+def open_index(base_dir) -> sqlite3.Connection:
+    """打开（不存在时创建）数据集的索引"""
+    path = index_path(base_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _rel(base_dir: Path, path: Path) -> str:
+    return Path(os.path.relpath(path, base_dir)).as_posix()
+
+
+def pdf_metadata(path) -> dict:
+    """页数与首页尺寸（点）；未安装 PyMuPDF 或无法打开时为 None"""
+    meta = {"page_count": None, "width": None, "height": None}
+    if fitz is None or Path(path).suffix.lower() != ".pdf":
+        return meta
+    try:
+        with fitz.open(path) as doc:
+            meta["page_count"] = doc.page_count
+            if doc.page_count:
+                rect = doc.load_page(0).rect
+                meta["width"], meta["height"] = rect.width, rect.height
+    except Exception:
+        pass
+    return meta
+
+
+def index_files(conn: sqlite3.Connection, base_dir, paths, known: dict | None = None, jobs: int | None = None) -> dict[Path, dict]:
+    """
+    把文件加入索引，返回 {路径: {'size', 'mtime_ns', 'sha1'}}（无法读取的文件不在结果中，并输出警告）。
+    known: {路径: 签名}，索引中没有记录时用作备选（例如识别缓存或筛选清单中已有的签名）。
+    哈希与新文档的页面信息在线程池中计算，数据库只在当前线程写入。
+    """
+    base_dir = Path(base_dir)
+    paths = list(dict.fromkeys(Path(p) for p in paths))
+    rels = {path: _rel(base_dir, path) for path in paths}
+    rows = {}
+    for start in range(0, len(paths), 500):
+        chunk = [rels[p] for p in paths[start:start + 500]]
+        query = f"SELECT path, sha1, size, mtime_ns FROM files WHERE path IN ({','.join('?' * len(chunk))})"
+        for rel, sha1, size, mtime_ns in conn.execute(query, chunk):
+            rows[rel] = {"size": size, "mtime_ns": mtime_ns, "sha1": sha1}
+    known = known or {}
+
+    def signature(path):
+        try:
+            return path, file_hash(path, rows.get(rels[path]) or known.get(path)), None
+        except OSError as e:
+            return path, None, e
+
+    signatures = {}
+    jobs = jobs or default_io_jobs()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for path, sig, error in executor.map(signature, paths):
+            if error is not None:
+                print(f"  ❌ Failed to read {path}: {error}")
+                continue
+            signatures[path] = sig
+
+    changed = [(rels[p], s["sha1"], s["size"], s["mtime_ns"]) for p, s in signatures.items() if rows.get(rels[p]) != s]
+    conn.executemany("INSERT OR REPLACE INTO files (path, sha1, size, mtime_ns) VALUES (?, ?, ?, ?)", changed)
+
+    # 新出现的文档（每个 sha1 只读取一次页面信息）
+    first_paths = {}
+    for path, sig in signatures.items():
+        first_paths.setdefault(sig["sha1"], (path, sig["size"]))
+    existing = set()
+    hashes = list(first_paths)
+    for start in range(0, len(hashes), 500):
+        chunk = hashes[start:start + 500]
+        query = f"SELECT sha1 FROM documents WHERE sha1 IN ({','.join('?' * len(chunk))})"
+        existing.update(row[0] for row in conn.execute(query, chunk))
+    new_docs = [(sha1, path, size) for sha1, (path, size) in first_paths.items() if sha1 not in existing]
+    if new_docs:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            metas = list(executor.map(lambda item: pdf_metadata(item[1]), new_docs))
+        conn.executemany(
+            "INSERT OR REPLACE INTO documents (sha1, size, page_count, width, height) VALUES (?, ?, ?, ?, ?)",
+            [(sha1, size, m["page_count"], m["width"], m["height"]) for (sha1, _, size), m in zip(new_docs, metas)],
+        )
+    conn.commit()
+    return signatures
+
+
+def document(conn: sqlite3.Connection, sha1: str) -> dict | None:
+    """文档信息 {'sha1', 'size', 'page_count', 'width', 'height'}；不在索引中时返回 None"""
+    row = conn.execute("SELECT sha1, size, page_count, width, height FROM documents WHERE sha1 = ?", (sha1,)).fetchone()
+    if row is None:
+        return None
+    return dict(zip(("sha1", "size", "page_count", "width", "height"), row))
+
+
+def paths_for(conn: sqlite3.Connection, sha1: str) -> list[str]:
+    """内容为 sha1 的全部路径（相对数据集根目录）"""
+    return [row[0] for row in conn.execute("SELECT path FROM files WHERE sha1 = ? ORDER BY path", (sha1,))]
+
+
+def duplicate_groups(conn: sqlite3.Connection) -> list[tuple[str, int, list[str]]]:
+    """有多个路径的文档：[(sha1, 大小, [路径, ...]), ...]，按重复数从多到少"""
+    groups = {}
+    query = """
+        SELECT f.sha1, d.size, f.path FROM files f JOIN documents d ON d.sha1 = f.sha1
+        WHERE f.sha1 IN (SELECT sha1 FROM files GROUP BY sha1 HAVING COUNT(*) > 1)
+        ORDER BY f.path
+    """
+    for sha1, size, path in conn.execute(query):
+        groups.setdefault((sha1, size), []).append(path)
+    return sorted(((sha1, size, paths) for (sha1, size), paths in groups.items()), key=lambda g: (-len(g[2]), g[0]))
+
+
+def prune(conn: sqlite3.Connection, base_dir) -> int:
+    """删除已不存在的路径以及不再被任何路径引用的文档，返回删除的路径数"""
+    base_dir = Path(base_dir)
+    missing = [(rel,) for (rel,) in conn.execute("SELECT path FROM files") if not (base_dir / rel).is_file()]
+    conn.executemany("DELETE FROM files WHERE path = ?", missing)
+    conn.execute("DELETE FROM documents WHERE sha1 NOT IN (SELECT sha1 FROM files)")
+    conn.commit()
+    return len(missing)
+
+
+def scan_pdfs(base_dir) -> list[Path]:
+    """数据集中的全部 PDF（跳过隐藏目录，如 .cache）"""
+    base_dir = Path(base_dir)
+    pdfs = []
+    for root, dirs, files in os.walk(base_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        pdfs.extend(Path(root) / name for name in sorted(files) if name.lower().endswith(".pdf"))
+    return pdfs
+
+
+def main():
+    print("=" * 60)
+    print(f"🗂️ 建立 PDF 内容索引: {BASE_DIR}")
+    with open_index(BASE_DIR) as conn:
+        pdfs = scan_pdfs(BASE_DIR)
+        signatures = index_files(conn, BASE_DIR, pdfs)
+        removed = prune(conn, BASE_DIR)
+        unique = {sig["sha1"] for sig in signatures.values()}
+        print(f"📄 PDF {len(signatures)} 个，不同内容 {len(unique)} 个；移除失效记录 {removed} 条")
+        groups = duplicate_groups(conn)
+        inodes = set()
+        redundant = 0
+        for sha1, size, paths in groups:
+            for rel in paths:
+                st = (BASE_DIR / rel).stat()
+                if (st.st_dev, st.st_ino) not in inodes:
+                    inodes.add((st.st_dev, st.st_ino))
+                    redundant += size
+            redundant -= size
+        copies = sum(len(paths) - 1 for _, _, paths in groups)
+        print(f"🔁 重复副本 {copies} 个（{len(groups)} 组），非硬链接副本占用 {format_bytes(redundant)}")
+        for sha1, size, paths in groups[:10]:
+            print(f"  {sha1[:12]} × {len(paths)}: {paths[0]} …")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+PDF 首页预览（两个分类工具共用）
+
+render_preview(pdf_path, max_width, max_height) -> PIL.Image 或 None
+render_preview_jpeg(...) -> JPEG 字节或 None
+cached_preview_jpeg(...) -> 同上，带两级缓存（两个分类工具实际使用的接口）
+- 首页按 PREVIEW_DPI 渲染后等比缩放，不超过 max_width × max_height
+- 给出 part_dir 时先查找 pdf_first_page_to_png.py 已导出的首页图片（<number>_<category>_<part>_img/<stem>.*，
+  修改时间不早于 PDF），找到时只需缩放和编码，不打开 PDF
+- USE_PAGE_CACHE=True 时整页像素按 PDF 内容哈希缓存为 .npy（见 page_cache.py），
+  换窗口大小时直接内存映射读取，不再渲染；默认关闭：A4 页 144 DPI 约 6 MB/张未压缩，
+  重复查看已由预览 JPEG 缓存覆盖
+- 预览 JPEG 按“PDF 内容哈希 + 预览尺寸”缓存：内存中最多 MEMORY_CACHE_MB（LRU），
+  磁盘上保存在 PREVIEW_CACHE_DIR（登记到 artifact_store.py，按磁盘预算清理），
+  重启标注工具后看过的 PDF 直接读取，不再渲染
+
+依赖（可选）：PyMuPDF、Pillow、numpy；未安装时 HAVE_RENDER=False，工具不显示预览
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+try:
+    import fitz  # PyMuPDF
+    import numpy as np
+    from PIL import Image
+    HAVE_RENDER = True
+except Exception:
+    fitz = None
+    np = None
+    Image = None
+    HAVE_RENDER = False
+
+import artifact_store
+import page_cache
+from file_ops import cache_owner, file_hash
+from image_codec import find_image, first_page_image_dir, load_image
+
+
+# ======== 配置区域（按需修改）========
+PREVIEW_DPI = 144  # 2 倍缩放（72 DPI × 2）
+USE_PAGE_CACHE = False  # True: 整页像素缓存到 page_cache.default_cache_dir()（每页数 MB，只在经常换预览尺寸时有用）
+USE_EXPORTED_IMAGES = True  # 优先使用 pdf_first_page_to_png.py 已导出的首页图片
+MEMORY_CACHE_MB = 64  # 内存中预览 JPEG 的总大小上限（单张约 20-60 KB）
+PREVIEW_CACHE_DIR = Path("files_debug") / ".cache" / "preview_cache"  # None 时不使用磁盘缓存
+# =====================================
+
+_signatures: dict[str, dict] = {}  # 路径 -> 上次的文件签名（大小与修改时间未变时不重新计算哈希）
+_memory: OrderedDict[str, bytes] = OrderedDict()  # 缓存键 -> JPEG 字节，按最近使用排序
+_memory_bytes = 0
+_memory_lock = threading.Lock()  # 预取线程与界面线程共用
+
+
+def render_page(pdf_path, dpi: int = PREVIEW_DPI, region=None):
+    """渲染首页整页：返回 ((高, 宽, 3) uint8 数组, (0, 0))，空 PDF 返回 None（region 仅为与 page_cache 接口一致）"""
+    with fitz.open(pdf_path) as doc:
+        if doc.page_count < 1:
+            return None
+        pix = doc.load_page(0).get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72), alpha=False, colorspace=fitz.csRGB)
+        arr = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        return arr, (0, 0)
+
+
+def pdf_signature(pdf_path) -> dict:
+    """PDF 的文件签名 {'size', 'mtime_ns', 'sha1'}（进程内记住上次结果）"""
+    key = os.fspath(pdf_path)
+    signature = file_hash(Path(pdf_path), _signatures.get(key))
+    _signatures[key] = signature
+    return signature
+
+
+def page_pixels(pdf_path, dpi: int = PREVIEW_DPI):
+    """首页整页像素：开启缓存时为只读内存映射数组；空 PDF 返回 None"""
+    if not USE_PAGE_CACHE:
+        rendered = render_page(pdf_path, dpi)
+    else:
+        sha1 = pdf_signature(pdf_path)["sha1"]
+        rendered = page_cache.cached_render(render_page, pdf_path, sha1, dpi)
+    return None if rendered is None else rendered[0]
+
+
+def exported_image(pdf_path, part_dir):
+    """part 目录中已导出的首页图片（不早于 PDF 的修改时间）；没有时返回 None"""
+    if part_dir is None or not USE_EXPORTED_IMAGES:
+        return None
+    image = find_image(first_page_image_dir(part_dir), Path(pdf_path).stem, os.stat(pdf_path).st_mtime_ns)
+    if image is not None:
+        artifact_store.touch(image)
+    return image
+
+
+def render_preview(pdf_path, max_width: int, max_height: int, resample=None, part_dir=None):
+    """
+    首页预览图（等比缩小到 max_width × max_height 以内）；无法渲染或空 PDF 返回 None。
+    part_dir: PDF 所属的 part 目录（清单中的 PDF 位于 damage_plots，不能按所在目录推断）。
+    """
+    if not HAVE_RENDER or not os.path.exists(pdf_path):
+        return None
+    pixels = None
+    image = exported_image(pdf_path, part_dir)
+    if image is not None:
+        try:
+            pixels = load_image(image)
+        except Exception:
+            pixels = None  # 图片损坏或正在写入时改为渲染
+    if pixels is None:
+        pixels = page_pixels(pdf_path)
+    if pixels is None:
+        return None
+    img = Image.fromarray(np.asarray(pixels))
+    w, h = img.size
+    scale = min(max_width / w, max_height / h, 1.0)
+    if scale < 1.0:
+        img = img.resize((int(w * scale), int(h * scale)), resample if resample is not None else Image.LANCZOS)
+    return img
+
+
+def render_preview_jpeg(
+    pdf_path,
+    max_width: int,
+    max_height: int,
+    resample=None,
+    quality: int = 95,
+    part_dir=None,
+) -> bytes | None:
+    """render_preview 的 JPEG 编码结果（质量 95，本地运行优先清晰度）；无法渲染时返回 None"""
+    img = render_preview(pdf_path, max_width, max_height, resample, part_dir)
+    if img is None:
+        return None
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def _memory_get(key: str) -> bytes | None:
+    with _memory_lock:
+        data = _memory.get(key)
+        if data is not None:
+            _memory.move_to_end(key)
+        return data
+
+
+def _memory_put(key: str, data: bytes) -> None:
+    global _memory_bytes
+    limit = MEMORY_CACHE_MB * 1024 * 1024
+    with _memory_lock:
+        old = _memory.pop(key, None)
+        if old is not None:
+            _memory_bytes -= len(old)
+        _memory[key] = data
+        _memory_bytes += len(data)
+        while _memory_bytes > limit and len(_memory) > 1:
+            _, evicted = _memory.popitem(last=False)
+            _memory_bytes -= len(evicted)
+
+
+def preview_cache_key(sha1: str, max_width: int, max_height: int, resample=None, quality: int = 95) -> str:
+    method = "default" if resample is None else str(int(resample))
+    return f"{sha1}_{PREVIEW_DPI}dpi_{max_width}x{max_height}_r{method}_q{quality}"
+
+
+def cached_preview_jpeg(
+    pdf_path,
+    max_width: int,
+    max_height: int,
+    resample=None,
+    quality: int = 95,
+    part_dir=None,
+) -> bytes | None:
+    """
+    带两级缓存的 render_preview_jpeg：内存 LRU → 磁盘（PREVIEW_CACHE_DIR）→ 已导出的首页图片 → 渲染。
+    按 PDF 内容哈希索引，内容相同的多份 PDF 共用一份预览；PDF 内容变化后自动失效。
+    """
+    if not HAVE_RENDER or not os.path.exists(pdf_path):
+        return None
+    key = preview_cache_key(pdf_signature(pdf_path)["sha1"], max_width, max_height, resample, quality)
+    data = _memory_get(key)
+    if data is not None:
+        return data
+    disk_path = Path(PREVIEW_CACHE_DIR) / f"{key}.jpg" if PREVIEW_CACHE_DIR is not None else None
+    if disk_path is not None:
+        try:
+            data = disk_path.read_bytes()
+        except OSError:
+            data = None
+        if data is not None:
+            artifact_store.touch(disk_path)
+            _memory_put(key, data)
+            return data
+    data = render_preview_jpeg(pdf_path, max_width, max_height, resample, quality, part_dir)
+    if data is None:
+        return None
+    _memory_put(key, data)
+    if disk_path is not None:
+        try:
+            disk_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = disk_path.with_name(f"{disk_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, disk_path)
+            artifact_store.register(disk_path, cache_owner(disk_path.parent), "preview")
+        except OSError as e:
+            print(f"⚠️ 无法写入预览缓存 {disk_path}: {e}")
+    return data
@@ -0,0 +1,68 @@
+"""
+进程池批处理工具
+
+提供函数 `run_in_pool`：
+- 将互相独立的任务（如各个 `<number>_<category>_summary.xlsx`）分发到进程池并行执行
+- 结果严格按任务提交顺序逐个产出，输出顺序与完成先后无关
+- 每个任务附带执行耗时（秒）与异常信息，单个任务失败不影响其他任务
+- 任务中的 print / traceback 输出（stdout、stderr）被捕获并随结果返回，由调用方在该任务的标题下输出，
+  并行时各任务的日志不会互相穿插（串行执行时同样如此）
+
+使用示例：
+    from pool_utils import run_in_pool
+    for task, result, error, elapsed, output in run_in_pool(process_excel, [(path,) for path in files]):
+        print(f"处理文件: {task[0]} ({elapsed:.2f}s)")
+        print(output, end="")
+
+注意：func 必须是模块顶层函数（进程池需要按名称序列化），调用方脚本需放在
+`if __name__ == "__main__":` 下运行（Windows 下子进程会重新导入主模块）。
+"""
+
+import contextlib
+import io
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+
+def default_jobs():
+    """默认并行进程数：CPU 核数 - 1（至少 1）"""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def _timed_call(func, args):
+    """执行单个任务，返回 (结果, 异常信息, 耗时秒数, 捕获的输出)"""
+    start = time.perf_counter()
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf), contextlib.redirect_stderr(buf):
+        try:
+            result = func(*args)
+            error = None
+        except Exception as e:
+            traceback.print_exc()
+            result = None
+            error = f"{type(e).__name__}: {e}"
+    return result, error, time.perf_counter() - start, buf.getvalue()
+
+
+def run_in_pool(func, tasks, jobs=None):
+    """
+    并行执行 func(*task)。
+    参数：
+    - func: 模块顶层函数
+    - tasks: 参数元组列表
+    - jobs: 并行进程数（None 表示 `default_jobs()`；<= 1 时在当前进程串行执行）
+    逐个产出 (task, result, error, elapsed, output)，顺序与 tasks 一致；output 为该任务打印的全部内容。
+    前面的任务完成即产出，不必等全部任务结束。
+    """
+    tasks = list(tasks)
+    if jobs is None:
+        jobs = default_jobs()
+    if jobs <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield (task, *_timed_call(func, task))
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+            for task, result in zip(tasks, executor.map(_timed_call, [func] * len(tasks), tasks)):
+                yield (task, *result)
@@ -0,0 +1,81 @@
+"""
+PDF 预览预取
+
+标注时下一张图的渲染（打开 PDF、2 倍渲染、缩放、编码）放在后台线程中提前完成：
+每次显示当前 PDF 后，用 schedule() 提交接下来 N 个 PDF（可跨目录，由调用方给出列表），
+按下 1 / 2 切换到下一张时 get() 通常直接拿到已完成的结果。
+键可以是 PDF 路径，也可以是 render 需要的任意可哈希参数（如 (PDF 路径, part 目录)）。
+
+只保留最近一次 schedule() 列出的 PDF 与最近显示过的几张的结果，内存占用有上限；
+不在列表中的未开始任务会被取消。
+
+使用示例：
+    prefetcher = PreviewPrefetcher(lambda path: cached_preview_jpeg(path, 450, 400))
+    img_bytes = prefetcher.get(current_path)
+    prefetcher.schedule([current_path, *next_paths])
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+# ======== 配置区域（按需修改）========
+PREFETCH_WORKERS = 2  # 后台渲染线程数（单张约 10-20 ms，远快于人工判断）
+KEEP_RECENT = 3  # 额外保留最近显示过的几张（撤销/回看时不重新渲染）
+# =====================================
+
+
+class PreviewPrefetcher:
+    """render(key) -> 结果（如 JPEG 字节）或 None；同一个键只渲染一次，直到移出预取窗口"""
+
+    def __init__(self, render, workers: int = PREFETCH_WORKERS, keep_recent: int = KEEP_RECENT):
+        self._render = render
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preview-prefetch")
+        self._futures: dict[object, Future] = {}
+        self._recent: deque[object] = deque(maxlen=keep_recent)
+        self._lock = threading.Lock()
+        self.stats = {"ready": 0, "waited": 0, "missed": 0}
+
+    def get(self, pdf_path: str):
+        """返回预览结果：已预取完成时立即返回，正在渲染时等待其完成，未预取时在当前线程渲染"""
+        with self._lock:
+            future = self._futures.get(pdf_path)
+            if future is None:
+                future = self._futures[pdf_path] = Future()
+                owner = True
+            else:
+                owner = False
+            if pdf_path in self._recent:
+                self._recent.remove(pdf_path)
+            self._recent.append(pdf_path)
+        if owner:
+            self.stats["missed"] += 1
+            try:
+                future.set_result(self._render(pdf_path))
+            except Exception as e:
+                future.set_exception(e)
+        elif future.done():
+            self.stats["ready"] += 1
+        else:
+            self.stats["waited"] += 1
+        try:
+            return future.result()
+        except Exception:
+            return None
+
+    def schedule(self, pdf_paths) -> None:
+        """预取这些 PDF（按顺序提交）；不在列表中且不是最近显示过的结果被丢弃"""
+        wanted = list(dict.fromkeys(pdf_paths))
+        with self._lock:
+            keep = set(wanted) | set(self._recent)
+            for path in [p for p in self._futures if p not in keep]:
+                self._futures.pop(path).cancel()
+            for path in wanted:
+                if path not in self._futures:
+                    self._futures[path] = self._executor.submit(self._render, path)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -4,18 +4,21 @@ Excel处理脚本
 1. 读取表头为属的列的数据，将相同字符串对应的reads列值求和
 2. 保留相同字符串的第一行，reads列值改为原数据的求和
 3. 覆盖原文件
+4. 若存在“来源”列（create_excel_sum 写入的 number/category/part），合并为 'a;b' 形式
 """
 import os
 import sys
 from pathlib import Path
 import pandas as pd
 from openpyxl import load_workbook
+from pool_utils import run_in_pool
 def process_excel(file_path):
     '''
     处理xlsx文件
     1. 读取表头为属的列的数据，将相同字符串对应的reads列值求和
     2. 保留相同字符串的第一行，reads列值改为原数据的求和
     3.如果属列的原单元格有颜色则保留颜色信息
+    4.如果有“来源”列，合并同属各行的来源（去重，保持顺序，以 ';' 分隔）
     '''
     import openpyxl
     from openpyxl.styles import PatternFill
@@ -34,6 +37,7 @@ def process_excel(file_path):
 
         genus_col_idx = headers.index('属') + 1  # openpyxl是1-based
         reads_col_idx = headers.index('reads') + 1
+        prov_col_idx = headers.index('来源') + 1 if '来源' in headers else None
         print(f"  属列索引: {genus_col_idx}, reads列索引: {reads_col_idx}")
 
         # 读取所有数据，记录颜色
@@ -69,9 +73,14 @@ def process_excel(file_path):
             except (TypeError, ValueError):
                 reads = 0
             if genus not in genus_sum:
-                genus_sum[genus] = {'sum': reads, 'first_row': d['row'], 'color': d['color']}
+                genus_sum[genus] = {'sum': reads, 'first_row': d['row'], 'color': d['color'], 'provs': []}
             else:
                 genus_sum[genus]['sum'] += reads
+            if prov_col_idx:
+                # 已聚合过的行来源可能是 'a;b'，拆开后再合并
+                for prov in str(d['row'][prov_col_idx-1].value or '').split(';'):
+                    if prov and prov not in genus_sum[genus]['provs']:
+                        genus_sum[genus]['provs'].append(prov)
 
         print(f"  分组数量: {len(genus_sum)}")
 
@@ -85,6 +94,8 @@ def process_excel(file_path):
             row = [cell.value for cell in info['first_row']]
             row[genus_col_idx-1] = genus
             row[reads_col_idx-1] = info['sum']
+            if prov_col_idx:
+                row[prov_col_idx-1] = ';'.join(info['provs'])
             ws.append(row)
             write_count += 1
             # 设置属列颜色
@@ -103,30 +114,32 @@ def process_excel(file_path):
         import traceback
         traceback.print_exc()
         return False
-def batch_process_excel_in_directory(base_path, success=0, fail=0):
+def batch_process_excel_in_directory(base_path, success=0, fail=0, jobs=None):
     """
     批量处理指定目录下所有Excel文件
     base_path: 基础路径
+    jobs: 并行进程数（None 表示 CPU 核数 - 1，1 表示串行）；各汇总文件互相独立，结果按文件顺序输出
     """
+    xlsx_tasks = []
     # 遍历所有类别目录 (xxxx)
     for number_dir in sorted(base_path.iterdir()):
-        if not number_dir.is_dir():
+        if not number_dir.is_dir() or number_dir.name.startswith("."):
             continue
         # 查找所有xlsx文件
-        xlsx_files = list(number_dir.glob("*.xlsx")) 
-        for xlsx_file in xlsx_files:
-            print(f"\n{'=' * 60}")
-            print(f"处理文件: {xlsx_file.name}")
-            try:
-                if process_excel(xlsx_file):
-                    success += 1
-                else:
-                    fail += 1
-            except Exception as e:
-                print(f"  ❌ 未捕获的异常 {xlsx_file}: {e}")
-                import traceback
-                traceback.print_exc()
-                fail += 1
+        xlsx_files = sorted(number_dir.glob("*.xlsx"))
+        xlsx_tasks.extend((xlsx_file,) for xlsx_file in xlsx_files)
+
+    for (xlsx_file,), ok, error, elapsed, output in run_in_pool(process_excel, xlsx_tasks, jobs=jobs):
+        print(f"\n{'=' * 60}")
+        print(f"处理文件: {xlsx_file.name} ({elapsed:.2f}s)")
+        print(output, end="")
+        if error:
+            print(f"  ❌ 未捕获的异常 {xlsx_file}: {error}")
+            fail += 1
+        elif ok:
+            success += 1
+        else:
+            fail += 1
     return success, fail
 if __name__ == "__main__":
     print("=" * 60)
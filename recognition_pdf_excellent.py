@@ -2,23 +2,26 @@
 """PDF 批量分类工具 V3 — GUI 辅助分类（复制、撤销、重启、日志）。
 
 简要：加载目录后用数字键分类，支持预览与撤销。
-依赖：tkinter、shutil、datetime、pathlib；可选：pymupdf + pillow（预览）。
+依赖：tkinter、datetime、pathlib（复制/删除见 file_ops.py）；可选：pymupdf + pillow（预览）。
 使用：修改路径并运行脚本，按界面提示操作。
 """
 import tkinter as tk
 from tkinter import messagebox, scrolledtext
+import io
 import os
-import shutil
 import datetime
 from pathlib import Path
 
-# 可选依赖：PyMuPDF + Pillow（预览）
+from file_ops import bulk_delete, link_or_copy
+from selection_manifest import part_pdf_map, resolve_part_pdf
+
+# 可选依赖：PyMuPDF + Pillow（预览，见 pdf_preview.py）
+import pdf_preview
+from pdf_preview import cached_preview_jpeg
 try:
-    import fitz  # PyMuPDF
     from PIL import Image, ImageTk
-    HAVE_RENDER = True
+    HAVE_RENDER = pdf_preview.HAVE_RENDER
 except Exception:
-    fitz = None
     Image = None
     ImageTk = None
     HAVE_RENDER = False
@@ -29,6 +32,7 @@ class PDFClassifier:
         self.source_dir = None
         self.target_dir = None
         self.pdf_list = []
+        self.pdf_paths = {}  # 当前目录 {文件名: PDF 路径}，与 pdf_list 一起建立
         self.current_index = 0
         self.history = []  # 操作历史: (操作类型, 文件名, 源路径, 目标路径)
         self.global_history = []  # 全局历史: 记录所有操作包括跨目录 (操作类型, 文件名, 源路径, 目标路径, 当前source_dir, 当前target_dir)
@@ -103,15 +107,20 @@ class PDFClassifier:
         self.log_text.see(tk.END)  # 滚动到末尾
         self.log_text.config(state=tk.DISABLED)  # 恢复只读
 
+    def load_pdf_list(self):
+        """读取当前目录的PDF列表，同时建立 文件名→路径 映射（之后每次按键直接查表，不再读取筛选清单）"""
+        self.pdf_paths = part_pdf_map(self.source_dir)
+        self.pdf_list = sorted(self.pdf_paths)
+
     def move_to_target(self, filename):
         """复制到目标并返回目标路径（同名覆盖）。"""
-        source_path = os.path.join(self.source_dir, filename)
+        source_path = str(resolve_part_pdf(self.source_dir, filename, self.pdf_paths))
         target_path = os.path.join(self.target_dir, filename)
-        # 直接复制，若存在则覆盖
-        shutil.copy2(source_path, target_path)
+        # 直接复制，若存在则覆盖（同一磁盘上为硬链接）
+        link_or_copy(source_path, target_path)
         return target_path
 
-    def render_pdf_preview(self, pdf_path, max_width=560, max_height=240):
+    def render_pdf_preview(self, pdf_path, max_width=560, max_height=240, part_dir=None):
         """渲染并显示 PDF 首页（可选依赖）。"""
         if not HAVE_RENDER:
             self.update_log("⚠️ 无法渲染预览：未安装 pymupdf 或 Pillow")
@@ -122,20 +131,12 @@ class PDFClassifier:
             return
 
         try:
-            doc = fitz.open(pdf_path)
-            if doc.page_count < 1:
+            # 等比缩放；按内容哈希缓存（内存 LRU + 磁盘，见 pdf_preview.py），撤销回看与重启后不再渲染
+            data = cached_preview_jpeg(pdf_path, max_width, max_height, Image.LANCZOS, part_dir=part_dir)
+            if data is None:
                 self.image_label.config(image="")
                 return
-            page = doc.load_page(0)
-            mat = fitz.Matrix(2, 2)
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            # 等比缩放
-            w, h = img.size
-            scale = min(max_width / w, max_height / h, 1.0)
-            if scale < 1.0:
-                img = img.resize((int(w * scale), int(h * scale)), Image.LANCZOS)
-            self.image_tk = ImageTk.PhotoImage(img)
+            self.image_tk = ImageTk.PhotoImage(Image.open(io.BytesIO(data)))
             self.image_label.config(image=self.image_tk)
         except Exception as e:
             self.update_log(f"❌ 预览渲染失败: {e}")
@@ -167,7 +168,7 @@ class PDFClassifier:
             self.target_dir = ctx_target
             
             # 重新加载该目录的PDF列表并恢复到完成时的状态
-            self.pdf_list = [f for f in os.listdir(self.source_dir) if f.lower().endswith(".pdf")]
+            self.load_pdf_list()
             self.current_index = len(self.pdf_list)  # 设为完成状态
             self.history = []  # 清空本地历史，因为现在从全局历史恢复
             
@@ -216,7 +217,7 @@ class PDFClassifier:
         if key == "1" and self.current_index < len(self.pdf_list):
             # 归类
             tar_path = self.move_to_target(current_pdf)
-            src_full_path = os.path.join(self.source_dir, current_pdf)
+            src_full_path = str(resolve_part_pdf(self.source_dir, current_pdf, self.pdf_paths))
             self.history.append(("copy", current_pdf, src_full_path, tar_path))
             self.global_history.append(("copy", current_pdf, src_full_path, tar_path, self.source_dir, self.target_dir))
             self.update_log(f"✅ 复制完成 → {current_pdf} → {self.target_dir}")
@@ -262,7 +263,7 @@ class PDFClassifier:
             os.makedirs(self.target_dir)
 
         # 列出PDF文件
-        self.pdf_list = [f for f in os.listdir(self.source_dir) if f.lower().endswith(".pdf")]
+        self.load_pdf_list()
         self.current_index = 0
         self.history = []
 
@@ -295,7 +296,7 @@ class PDFClassifier:
         self.global_history = [h for h in self.global_history if not (h[4] == self.source_dir and h[5] == self.target_dir)]
         
         # 重新读取当前源目录下的 PDF 列表并从头开始
-        self.pdf_list = [f for f in os.listdir(self.source_dir) if f.lower().endswith(".pdf")]
+        self.load_pdf_list()
         self.current_index = 0
         self.history = []
         self.current_label.config(text=self.get_current_pdf_text())
@@ -332,15 +333,14 @@ class PDFClassifier:
         if not os.path.exists(target_dir):
             return
 
-        for fname in os.listdir(target_dir):
-            if not fname.lower().endswith('.pdf'):
-                continue
-            fpath = os.path.join(target_dir, fname)
-            try:
-                os.remove(fpath)
-                self.update_log(f"🗑️ 删除目标文件 {fname} 从 {target_dir}")
-            except Exception as e:
-                self.update_log(f"❌ 删除文件 {fname} 时出错: {e}")
+        def report(path, error):
+            if error is None:
+                self.update_log(f"🗑️ 删除目标文件 {path.name} 从 {target_dir}")
+            else:
+                self.update_log(f"❌ 删除文件 {path.name} 时出错: {error}")
+
+        pdfs = [Path(target_dir) / fname for fname in os.listdir(target_dir) if fname.lower().endswith('.pdf')]
+        bulk_delete(pdfs, on_done=report)
 
     def on_directory_finished(self):
         """当前目录处理完成，切换到下一个任务或结束程序"""
@@ -362,17 +362,17 @@ class PDFClassifier:
             self.image_label.config(image="")
             return
         current_pdf = self.pdf_list[self.current_index]
-        pdf_path = os.path.join(self.source_dir, current_pdf)
-        self.render_pdf_preview(pdf_path)
+        pdf_path = str(resolve_part_pdf(self.source_dir, current_pdf, self.pdf_paths))
+        self.render_pdf_preview(pdf_path, part_dir=self.source_dir)
 
 if __name__ == "__main__":
     base_path = Path("files_debug")
     tasks = []
     for number_dir in sorted(base_path.iterdir()):
-        if not number_dir.is_dir():
+        if not number_dir.is_dir() or number_dir.name.startswith("."):
             continue
         for category_dir in sorted(number_dir.iterdir()):
-            if not category_dir.is_dir():
+            if not category_dir.is_dir() or category_dir.name.startswith("."):
                 continue
             # 遍历所有 partxx 目录
             for part_dir in sorted(category_dir.iterdir()):
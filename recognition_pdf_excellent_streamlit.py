@@ -1,27 +1,30 @@
 import streamlit as st
 import os
-import shutil
 import datetime
 from pathlib import Path
 from PIL import Image
-import io
 import json
 import streamlit.components.v1 as components
 
-# 可选依赖：PyMuPDF（预览）
-try:
-    import fitz  # PyMuPDF
-    HAVE_RENDER = True
-except Exception:
-    fitz = None
-    HAVE_RENDER = False
+import history_journal
+from file_ops import bulk_delete, link_or_copy
+from selection_manifest import list_part_pdfs, part_pdf_map, resolve_part_pdf
+
+# 可选依赖：PyMuPDF（预览，见 pdf_preview.py）
+from pdf_preview import HAVE_RENDER, cached_preview_jpeg
+from preview_prefetch import PreviewPrefetcher
 
 # 页面配置
 st.set_page_config(page_title="PDF批量分类工具", page_icon="📄", layout="wide")
 
-# 历史记录文件路径
+# 历史记录文件路径（快照；逐次操作追加到同名 .jsonl，见 history_journal.py）
 HISTORY_FILE = Path(".history.json")
 
+# 预览尺寸与预取数量（当前PDF之后提前渲染的张数，可跨目录）
+PREVIEW_MAX_WIDTH = 450
+PREVIEW_MAX_HEIGHT = 400
+PREFETCH_AHEAD = 5
+
 # 全局快捷键 JavaScript 组件
 def keyboard_listener():
     """JavaScript 全局快捷键监听器"""
@@ -57,7 +60,7 @@ def add_log(message):
     st.session_state.log_messages.append(f"{timestamp} {message}")
 
 def save_history():
-    """保存历史记录到文件"""
+    """保存完整快照（目录切换、撤销、重开等低频操作）；逐次的归类 / 跳过见 record_action"""
     try:
         history_data = {
             "timestamp": datetime.datetime.now().isoformat(),
@@ -71,21 +74,42 @@ def save_history():
             "source_dir": st.session_state.source_dir,
             "target_dir": st.session_state.target_dir,
             "current_index": st.session_state.current_index,
-            "pdf_list": st.session_state.pdf_list
+            "pdf_list": st.session_state.pdf_list,
+            "journal_seq": st.session_state.journal_seq
         }
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history_data, f, ensure_ascii=False, indent=2)
+        history_journal.write_snapshot(history_data, HISTORY_FILE)
+        st.session_state.journal_pending = 0
+    except Exception as e:
+        add_log(f"❌ 保存历史记录失败: {e}")
+
+def record_action(record, message):
+    """记录一次归类 / 跳过并前进到下一个PDF：只在操作日志末尾追加一行，累计 COMPACT_EVERY 条后写一次快照"""
+    st.session_state.global_history.append(record)
+    st.session_state.processed_pdfs += 1
+    st.session_state.current_index += 1
+    add_log(message)
+    st.session_state.journal_seq += 1
+    st.session_state.journal_pending += 1
+    if st.session_state.journal_pending >= history_journal.COMPACT_EVERY:
+        save_history()
+        return
+    try:
+        history_journal.append_action({
+            "seq": st.session_state.journal_seq,
+            "record": record,
+            "log": st.session_state.log_messages[-1],
+            "current_index": st.session_state.current_index,
+            "processed_pdfs": st.session_state.processed_pdfs
+        }, HISTORY_FILE)
     except Exception as e:
         add_log(f"❌ 保存历史记录失败: {e}")
 
 def load_history():
-    """从文件加载历史记录"""
-    if not HISTORY_FILE.exists():
-        return False
-    
+    """从文件加载历史记录（快照 + 重放操作日志）"""
     try:
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-            history_data = json.load(f)
+        history_data = history_journal.load_history(HISTORY_FILE)
+        if history_data is None:
+            return False
         
         st.session_state.global_history = [tuple(h) for h in history_data.get("global_history", [])]
         st.session_state.directory_stack = [tuple(d) for d in history_data.get("directory_stack", [])]
@@ -98,8 +122,11 @@ def load_history():
         st.session_state.target_dir = history_data.get("target_dir", None)
         st.session_state.current_index = history_data.get("current_index", 0)
         st.session_state.pdf_list = history_data.get("pdf_list", [])
+        st.session_state.journal_seq = history_data.get("journal_seq", 0)
         
         add_log("✅ 已恢复之前的历史记录")
+        # 合并为新快照（同时去掉上次中断时可能残留的半行日志）
+        save_history()
         return True
     except Exception as e:
         add_log(f"❌ 加载历史记录失败: {e}")
@@ -108,8 +135,8 @@ def load_history():
 def clear_history():
     """清空历史记录文件"""
     try:
-        if HISTORY_FILE.exists():
-            HISTORY_FILE.unlink()
+        history_journal.clear_history(HISTORY_FILE)
+        st.session_state.journal_pending = 0
         st.session_state.global_history = []
         st.session_state.directory_stack = []
         st.session_state.processed_pdfs = 0
@@ -126,14 +153,16 @@ def restore_from_record(record_index):
     
     # 获取要恢复的记录之后的所有操作并删除对应文件
     records_to_remove = st.session_state.global_history[record_index + 1:]
-    for record in records_to_remove:
-        action, filename, src_path, tar_path, source_dir, target_dir = record
-        if action == "copy" and tar_path and os.path.exists(tar_path):
-            try:
-                os.remove(tar_path)
-                add_log(f"🗑️ 删除文件 → {filename}")
-            except Exception as e:
-                add_log(f"❌ 删除失败 {filename}: {e}")
+    copied = [Path(record[3]) for record in records_to_remove
+              if record[0] == "copy" and record[3] and os.path.exists(record[3])]
+
+    def report(path, error):
+        if error is None:
+            add_log(f"🗑️ 删除文件 → {path.name}")
+        else:
+            add_log(f"❌ 删除失败 {path.name}: {error}")
+
+    bulk_delete(copied, on_done=report)
     
     # 截断历史记录到指定位置
     st.session_state.global_history = st.session_state.global_history[:record_index + 1]
@@ -158,10 +187,7 @@ def restore_from_record(record_index):
 
     # 重新加载当前目录的PDF列表
     if st.session_state.source_dir and os.path.exists(st.session_state.source_dir):
-        st.session_state.pdf_list = [
-            f for f in os.listdir(st.session_state.source_dir)
-            if f.lower().endswith(".pdf")
-        ]
+        load_pdf_list()
         # 根据已处理的PDF数量调整current_index
         current_dir_history = [
             h for h in st.session_state.global_history
@@ -192,15 +218,31 @@ if "source_dir" not in st.session_state:
     st.session_state.confirm_restart_previous = False
     st.session_state.confirm_restart_all = False
     st.session_state.confirm_clear_history = False
+    st.session_state.journal_seq = 0
+    st.session_state.journal_pending = 0
     
     # 尝试加载历史记录
     load_history()
 
+def load_pdf_list():
+    """读取当前目录的PDF列表，同时建立 文件名→路径 映射（之后每次点击直接查表，不再读取筛选清单）"""
+    pdf_map = part_pdf_map(st.session_state.source_dir)
+    st.session_state.pdf_paths = (st.session_state.source_dir, pdf_map)
+    st.session_state.pdf_list = sorted(pdf_map)
+
+def current_pdf_path(filename):
+    """当前目录中文件名对应的PDF路径（映射不属于当前目录时重新建立，如从历史记录恢复后）"""
+    cached = st.session_state.get("pdf_paths")
+    if cached is None or cached[0] != st.session_state.source_dir:
+        cached = st.session_state.pdf_paths = (st.session_state.source_dir, part_pdf_map(st.session_state.source_dir))
+    return resolve_part_pdf(st.session_state.source_dir, filename, cached[1])
+
 def move_to_target(filename):
     """复制到目标并返回目标路径"""
-    source_path = os.path.join(st.session_state.source_dir, filename)
+    source_path = str(current_pdf_path(filename))
     target_path = os.path.join(st.session_state.target_dir, filename)
-    shutil.copy2(source_path, target_path)
+    # 同一磁盘上为硬链接（只写目录项），否则完整复制
+    link_or_copy(source_path, target_path)
     return target_path
 
 def render_sidebar():
@@ -278,37 +320,37 @@ def render_sidebar():
 # 立即渲染侧边栏
 render_sidebar()
 
-@st.cache_data(show_spinner=False)
-def render_pdf_preview_cached(pdf_path, max_width=500, max_height=300):
-    """缓存版本的PDF预览渲染（返回bytes以提高缓存效率）"""
+def render_pdf_preview_bytes(item):
+    """PDF预览渲染（item 为 (PDF路径, part目录)，返回JPEG bytes）；在后台预取线程中调用，不使用任何 st.* 接口"""
+    pdf_path, part_dir = item
     if not HAVE_RENDER or not os.path.exists(pdf_path):
         return None
 
     try:
-        doc = fitz.open(pdf_path)
-        if doc.page_count < 1:
-            doc.close()
-            return None
-        page = doc.load_page(0)
-        # 1.5x缩放：优先速度，兼顾清晰度（本地运行）
-        mat = fitz.Matrix(2, 2)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        doc.close()
-        
-        # 等比缩放
-        w, h = img.size
-        scale = min(max_width / w, max_height / h, 1.0)
-        if scale < 1.0:
-            img = img.resize((int(w * scale), int(h * scale)), Image.BILINEAR)
-        
-        # 转换为bytes返回（缓存bytes比Image对象更高效）
-        buf = io.BytesIO()
-        img.save(buf, format='JPEG', quality=95)  # 质量95（本地运行优先清晰度）
-        return buf.getvalue()
+        # 优先缩放已导出的首页图片，否则 2x 渲染；按内容哈希缓存（内存 LRU + 磁盘），重启后看过的PDF不再渲染
+        return cached_preview_jpeg(pdf_path, PREVIEW_MAX_WIDTH, PREVIEW_MAX_HEIGHT, Image.BILINEAR, part_dir=part_dir)
     except Exception as e:
         return None
 
+@st.cache_resource
+def get_prefetcher():
+    """后台预取线程池（整个 Streamlit 进程共用一个，页面刷新后仍保留已渲染的结果）"""
+    return PreviewPrefetcher(render_pdf_preview_bytes)
+
+def _upcoming_previews(count):
+    """当前PDF之后的 count 个 (PDF路径, part目录)：先取当前目录剩余的，不够时继续取任务队列中后续目录的"""
+    items = []
+    source_dir = st.session_state.source_dir
+    if source_dir:
+        names = st.session_state.pdf_list[st.session_state.current_index + 1:][:count]
+        if names:
+            items += [(str(current_pdf_path(name)), source_dir) for name in names]
+    for source, _ in st.session_state.task_queue:
+        if len(items) >= count:
+            break
+        items += [(str(p), source) for p in list_part_pdfs(source)[:count - len(items)]]
+    return items
+
 @st.fragment
 def pdf_viewer_fragment():
     """PDF查看和操作的fragment（局部刷新，不影响整页）"""
@@ -318,6 +360,7 @@ def pdf_viewer_fragment():
             if st.session_state.task_queue:
                 next_source, next_target = st.session_state.task_queue.pop(0)
                 load_directory(next_source, next_target)
+                save_history()
         return
     
     current_pdf = st.session_state.pdf_list[st.session_state.current_index]
@@ -330,8 +373,12 @@ def pdf_viewer_fragment():
     col_preview, col_actions = st.columns([2, 1])
     
     with col_preview:
-        pdf_path = os.path.join(st.session_state.source_dir, current_pdf)
-        img_bytes = render_pdf_preview_cached(pdf_path, max_width=450, max_height=400)
+        pdf_path = str(current_pdf_path(current_pdf))
+        prefetcher = get_prefetcher()
+        current = (pdf_path, st.session_state.source_dir)
+        img_bytes = prefetcher.get(current)
+        # 当前这张显示的同时，后台渲染接下来的几张
+        prefetcher.schedule([current, *_upcoming_previews(PREFETCH_AHEAD)])
         if img_bytes:
             st.image(img_bytes, use_container_width=True)
         else:
@@ -343,23 +390,21 @@ def pdf_viewer_fragment():
         if st.button("✅ 归类到好 (1)", use_container_width=True, key="btn_copy", type="primary"):
             current_pdf = st.session_state.pdf_list[st.session_state.current_index]
             tar_path = move_to_target(current_pdf)
-            src_full_path = os.path.join(st.session_state.source_dir, current_pdf)
-            st.session_state.global_history.append(("copy", current_pdf, src_full_path, tar_path, st.session_state.source_dir, st.session_state.target_dir))
-            st.session_state.processed_pdfs += 1
-            add_log(f"✅ 复制完成 → {current_pdf}")
-            save_history()
-            st.session_state.current_index += 1
+            src_full_path = str(current_pdf_path(current_pdf))
+            record_action(
+                ("copy", current_pdf, src_full_path, tar_path, st.session_state.source_dir, st.session_state.target_dir),
+                f"✅ 复制完成 → {current_pdf}",
+            )
             if st.session_state.current_index >= len(st.session_state.pdf_list):
                 handle_directory_finished()
             st.rerun()
             
         if st.button("➡️ 跳过 (2)", use_container_width=True, key="btn_skip"):
             current_pdf = st.session_state.pdf_list[st.session_state.current_index]
-            st.session_state.global_history.append(("skip", current_pdf, "", "", st.session_state.source_dir, st.session_state.target_dir))
-            st.session_state.processed_pdfs += 1
-            add_log(f"➡️ 已跳过 → {current_pdf}")
-            save_history()
-            st.session_state.current_index += 1
+            record_action(
+                ("skip", current_pdf, "", "", st.session_state.source_dir, st.session_state.target_dir),
+                f"➡️ 已跳过 → {current_pdf}",
+            )
             if st.session_state.current_index >= len(st.session_state.pdf_list):
                 handle_directory_finished()
             st.rerun()
@@ -412,12 +457,10 @@ def pdf_viewer_fragment():
 def _delete_pdfs_in_directory(directory):
     """删除指定目录中的所有PDF文件"""
     if os.path.exists(directory):
-        for fname in os.listdir(directory):
-            if fname.lower().endswith('.pdf'):
-                try:
-                    os.remove(os.path.join(directory, fname))
-                except Exception as e:
-                    add_log(f"❌ 删除文件失败: {e}")
+        pdfs = [Path(directory) / fname for fname in os.listdir(directory) if fname.lower().endswith('.pdf')]
+        stats = bulk_delete(pdfs)
+        for _, error in stats["errors"]:
+            add_log(f"❌ 删除文件失败: {error}")
 
 def restart_previous_directory():
     """重新开始上一个目录"""
@@ -447,7 +490,7 @@ def restart_previous_directory():
     # 切换到上一个目录并重新开始
     st.session_state.source_dir = prev_source
     st.session_state.target_dir = prev_target
-    st.session_state.pdf_list = sorted([f for f in os.listdir(prev_source) if f.lower().endswith(".pdf")])
+    load_pdf_list()
     st.session_state.current_index = 0
     
     add_log(f"⬅️ 重新开始上一目录: {os.path.basename(prev_source)}")
@@ -476,10 +519,7 @@ def restart_current_directory():
     ]
     
     # 重置状态
-    st.session_state.pdf_list = [
-        f for f in os.listdir(st.session_state.source_dir) 
-        if f.lower().endswith(".pdf")
-    ]
+    load_pdf_list()
     st.session_state.current_index = 0
     add_log(f"🔄 已重新开始当前目录：{st.session_state.source_dir}")
     save_history()
@@ -515,10 +555,7 @@ def load_directory(source_dir, target_dir):
     if not os.path.exists(st.session_state.target_dir):
         os.makedirs(st.session_state.target_dir)
     
-    st.session_state.pdf_list = [
-        f for f in os.listdir(st.session_state.source_dir) 
-        if f.lower().endswith(".pdf")
-    ]
+    load_pdf_list()
     st.session_state.current_index = 0
     
     # 检查目录是否为空，如果为空则自动跳过
@@ -543,21 +580,21 @@ def handle_directory_finished():
     """目录处理完成"""
     st.session_state.directory_stack.append((st.session_state.source_dir, st.session_state.target_dir))
     add_log(f"✅ 目录处理完成：{st.session_state.source_dir}\n")
-    save_history()
     
     if st.session_state.task_queue:
         next_source, next_target = st.session_state.task_queue.pop(0)
         load_directory(next_source, next_target)
     else:
         add_log("🎉 所有任务处理完成！")
-        save_history()
+    # 快照必须在切换目录之后写入：之后的操作日志按新目录的状态重放
+    save_history()
 
 def _count_pdfs_in_tasks(tasks):
     """计算任务列表中的总PDF数"""
     total = 0
     for source, target in tasks:
         if os.path.exists(source):
-            pdfs = [f for f in os.listdir(source) if f.lower().endswith('.pdf')]
+            pdfs = [p.name for p in list_part_pdfs(source)]
             total += len(pdfs)
     return total
 
@@ -580,10 +617,10 @@ with col_load:
         base_path = Path("files_debug")
         tasks = []
         for number_dir in sorted(base_path.iterdir()):
-            if not number_dir.is_dir():
+            if not number_dir.is_dir() or number_dir.name.startswith("."):
                 continue
             for category_dir in sorted(number_dir.iterdir()):
-                if not category_dir.is_dir():
+                if not category_dir.is_dir() or category_dir.name.startswith("."):
                     continue
                 for part_dir in sorted(category_dir.iterdir()):
                     if not part_dir.is_dir() or not part_dir.name.startswith("part"):
@@ -0,0 +1,184 @@
+"""
+PDF 筛选清单
+
+attract_pdf_good.py 默认不再把选中的 damage_plots/*.pdf 复制进 part 目录，而是写一份清单
+part_dir/.selection.json（PDF 相对路径 + 文件签名）。下游脚本（首页转 PNG、自动识别、两个分类工具）
+通过 `list_part_pdfs` / `resolve_part_pdf` 使用“虚拟文件列表”：
+- 清单中的 PDF（仍在 damage_plots 中，原地读取）
+- part 目录中实际存在的 PDF（手动放入或已导出的副本；同名时优先）
+没有清单的目录与以前一样只列出目录中的 PDF。
+解析后的清单按文件修改时间缓存在进程内；需要按文件名多次查找时用 part_pdf_map 一次建好映射。
+
+需要实体文件时（交付或用其他工具浏览），直接运行本脚本把所有清单导出到各自的 part 目录
+（同一磁盘上为硬链接，见 file_ops.py）。
+
+清单格式：
+    {"version": 1, "reference": 参考表格, "files": [{"name", "path"(相对 part 目录), "size", "mtime_ns", "sha1"}, ...]}
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from file_ops import LINK_MODE, bulk_copy, default_io_jobs, file_hash, format_stats
+
+
+# ======== 配置区域（按需修改）========
+BASE_DIR = Path("files_debug")
+MANIFEST_NAME = ".selection.json"  # 位于每个 part 目录下
+# =====================================
+
+_manifest_cache: dict[str, tuple[tuple[int, int], dict[str, tuple[Path, dict]]]] = {}
+
+
+def manifest_path(part_dir) -> Path:
+    return Path(part_dir) / MANIFEST_NAME
+
+
+def load_manifest(part_dir) -> dict | None:
+    """读取 part 目录的清单；没有清单或无法解析时返回 None"""
+    path = manifest_path(part_dir)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"  ⚠️ 无法读取清单 {path}: {e}")
+        return None
+
+
+def _signature_fields(signature: dict) -> dict:
+    return {"size": signature["size"], "mtime_ns": signature["mtime_ns"], "sha1": signature["sha1"]}
+
+
+def write_manifest(part_dir, pdfs, reference=None, jobs: int | None = None) -> dict:
+    """
+    为 part 目录写入筛选清单（先写临时文件再替换）。
+    哈希在线程池中计算；与上次清单相比大小和修改时间都未变的 PDF 沿用上次的哈希，不再读取内容。
+    """
+    part_dir = Path(part_dir)
+    previous = load_manifest(part_dir) or {}
+    known = {entry["path"]: entry for entry in previous.get("files", [])}
+    pdfs = sorted({Path(p) for p in pdfs}, key=lambda p: p.name)
+    rel_paths = [Path(os.path.relpath(p, part_dir)).as_posix() for p in pdfs]
+
+    def signature(item):
+        pdf, rel = item
+        return {"name": pdf.name, "path": rel, **_signature_fields(file_hash(pdf, known.get(rel)))}
+
+    with ThreadPoolExecutor(max_workers=jobs or default_io_jobs()) as executor:
+        files = list(executor.map(signature, zip(pdfs, rel_paths)))
+    manifest = {
+        "version": 1,
+        "reference": str(reference) if reference is not None else None,
+        "files": files,
+    }
+    path = manifest_path(part_dir)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+    return manifest
+
+
+def _manifest_files(part_dir: Path) -> dict[str, tuple[Path, dict]]:
+    """{文件名: (PDF 路径, 清单记录)}；清单的修改时间与大小未变时不重新解析（调用方不要修改返回值）"""
+    path = manifest_path(part_dir)
+    try:
+        st = path.stat()
+    except OSError:
+        return {}
+    key = os.path.abspath(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _manifest_cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    manifest = load_manifest(part_dir)
+    files = {}
+    if manifest:
+        files = {entry["name"]: (part_dir / entry["path"], entry) for entry in manifest.get("files", [])}
+    _manifest_cache[key] = (stamp, files)
+    return files
+
+
+def part_pdf_map(part_dir) -> dict[str, Path]:
+    """
+    {文件名: PDF 路径}：清单中仍存在的 PDF + 目录中实际存在的 PDF（同名时取后者）。
+    按文件名反复查找时（分类工具的每次点击、按图片找 PDF）先建好映射，再传给 resolve_part_pdf。
+    """
+    part_dir = Path(part_dir)
+    pdfs = {name: path for name, (path, _) in _manifest_files(part_dir).items() if path.is_file()}
+    if part_dir.is_dir():
+        with os.scandir(part_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(".pdf"):
+                    pdfs[entry.name] = Path(entry.path)
+    return pdfs
+
+
+def list_part_pdfs(part_dir) -> list[Path]:
+    """part 目录的 PDF 列表（按文件名排序），来源同 part_pdf_map"""
+    pdfs = part_pdf_map(part_dir)
+    return [pdfs[name] for name in sorted(pdfs)]
+
+
+def resolve_part_pdf(part_dir, name: str, pdf_map: dict[str, Path] | None = None) -> Path:
+    """
+    按文件名找到 part 目录中的 PDF：目录中实际存在的文件优先，其次是清单记录的路径。
+    都找不到时返回 part_dir / name（不存在，交给调用方按原有逻辑处理）。
+    pdf_map: part_pdf_map 的结果；给出时直接查表，不访问文件系统。
+    """
+    part_dir = Path(part_dir)
+    direct = part_dir / name
+    if pdf_map is not None:
+        return pdf_map.get(name, direct)
+    if direct.exists():
+        return direct
+    found = _manifest_files(part_dir).get(name)
+    return found[0] if found else direct
+
+
+def known_signatures(part_dir) -> dict[Path, dict]:
+    """清单中记录的文件签名 {PDF 路径: {'size', 'mtime_ns', 'sha1'}}，供下游跳过重复的哈希计算"""
+    return {path: _signature_fields(entry) for path, entry in _manifest_files(Path(part_dir)).values()}
+
+
+def materialize_part(part_dir, mode: str = LINK_MODE) -> dict:
+    """把清单中的 PDF 导出到 part 目录（同名覆盖；已是同一文件时跳过），返回 bulk_copy 的统计"""
+    part_dir = Path(part_dir)
+    pairs = [(path, part_dir / name) for name, (path, _) in _manifest_files(part_dir).items()
+             if path.is_file() and path.parent != part_dir]
+
+    def report(src, dst, method, error):
+        if error is None:
+            print(f"  Copied: {src.name}")
+        else:
+            print(f"  Error copying {src.name}: {error}")
+
+    return bulk_copy(pairs, mode=mode, on_done=report)
+
+
+def iter_manifest_parts(base_dir):
+    """数据集中所有带清单的 part 目录（number/category/partxx）"""
+    return sorted(p.parent for p in Path(base_dir).glob(f"*/*/part*/{MANIFEST_NAME}"))
+
+
+def main():
+    print("=" * 60)
+    print(f"📤 导出筛选清单中的PDF: {BASE_DIR}")
+    parts = iter_manifest_parts(BASE_DIR)
+    if not parts:
+        print("ℹ️ 没有找到筛选清单（请先运行 attract_pdf_good.py）")
+        return
+    for part_dir in parts:
+        print(f"\n📁 {part_dir}")
+        stats = materialize_part(part_dir)
+        print(f"  {format_stats(stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ import openpyxl
 import os
 from pathlib import Path
 from openpyxl.styles import PatternFill, Font, Alignment, Border
+from pool_utils import run_in_pool
 def sort_excel_color(file_path, target_col):
     """
     按指定列的单元格颜色排序Excel文件
@@ -124,30 +125,32 @@ def sort_excel_color(file_path, target_col):
     print(f"  ✅ 文件排序完成并保存")
     return True
 
-def batch_sort_color_in_directory(base_path, target_col, success=0, fail=0):
+def batch_sort_color_in_directory(base_path, target_col, success=0, fail=0, jobs=None):
     """
     批量按指定目录下所有Excel文件中的某一列的单元格颜色排序
     base_path: 基础路径
     target_col: 需要排序颜色的列名
+    jobs: 并行进程数（None 表示 CPU 核数 - 1，1 表示串行）；各汇总文件互相独立，结果按文件顺序输出
     """
+    xlsx_tasks = []
     # 遍历所有类别目录 (xxxx)
     for number_dir in sorted(base_path.iterdir()):
-        if not number_dir.is_dir():
+        if not number_dir.is_dir() or number_dir.name.startswith("."):
             continue
         
         # 查找所有xlsx文件
-        xlsx_files = list(number_dir.glob("*.xlsx")) 
-        for xlsx_file in xlsx_files:
-            print(f"\n{'=' * 60}")
-            print(f"{number_dir.name}/{xlsx_file.name}")
-            try:
-                if sort_excel_color(xlsx_file, target_col):
-                    success += 1
-            except Exception as e:
-                print(f"  ❌ 处理失败: {e}")
-                import traceback
-                traceback.print_exc()
-                fail += 1
+        xlsx_files = sorted(number_dir.glob("*.xlsx"))
+        xlsx_tasks.extend((xlsx_file, target_col) for xlsx_file in xlsx_files)
+
+    for (xlsx_file, _), ok, error, elapsed, output in run_in_pool(sort_excel_color, xlsx_tasks, jobs=jobs):
+        print(f"\n{'=' * 60}")
+        print(f"{xlsx_file.parent.name}/{xlsx_file.name} ({elapsed:.2f}s)")
+        print(output, end="")
+        if error:
+            print(f"  ❌ 处理失败: {error}")
+            fail += 1
+        elif ok:
+            success += 1
     return success, fail
 if __name__ == "__main__":
     print("=" * 60)
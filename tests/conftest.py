@@ -0,0 +1,8 @@
+"""测试共用：把仓库根目录加入 sys.path（脚本均为顶层模块）"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
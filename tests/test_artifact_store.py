@@ -0,0 +1,71 @@
+"""artifact_store：多线程登记（预览预取线程写入的缓存必须全部登记，才能按预算清理）"""
+
+import sqlite3
+from collections import OrderedDict
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("PIL")
+
+import artifact_store
+import pdf_preview
+from preview_prefetch import PreviewPrefetcher
+
+
+def _make_pdfs(directory, count):
+    paths = []
+    for i in range(count):
+        doc = fitz.open()
+        page = doc.new_page(width=200, height=300)
+        page.draw_rect(fitz.Rect(20, 20 + i * 10, 120, 60 + i * 10), color=(0, 0, 1), fill=(1, 0, 0))
+        path = directory / f"p{i}.pdf"
+        doc.save(path)
+        doc.close()
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def isolated_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "REGISTRY_PATH", tmp_path / "registry.sqlite")
+    monkeypatch.setattr(pdf_preview, "PREVIEW_CACHE_DIR", tmp_path / "dataset" / ".cache" / "preview_cache")
+    monkeypatch.setattr(pdf_preview, "_memory", OrderedDict())
+    monkeypatch.setattr(pdf_preview, "_memory_bytes", 0)
+    monkeypatch.setattr(pdf_preview, "USE_PAGE_CACHE", False)
+    return tmp_path
+
+
+def _registered(registry, kind):
+    with sqlite3.connect(registry) as conn:
+        return {path for (path,) in conn.execute("SELECT path FROM artifacts WHERE kind = ?", (kind,))}
+
+
+def test_prefetched_previews_are_all_registered(isolated_store):
+    pdfs = [str(p) for p in _make_pdfs(isolated_store, 6)]
+    prefetcher = PreviewPrefetcher(lambda path: pdf_preview.cached_preview_jpeg(path, 100, 100), workers=2)
+    try:
+        prefetcher.schedule(pdfs)
+        results = [prefetcher.get(path) for path in pdfs]
+    finally:
+        prefetcher.shutdown()
+    assert all(results)
+
+    written = {artifact_store._key(p) for p in pdf_preview.PREVIEW_CACHE_DIR.glob("*.jpg")}
+    assert len(written) == len(pdfs)
+    assert _registered(isolated_store / "registry.sqlite", "preview") == written
+    with sqlite3.connect(isolated_store / "registry.sqlite") as conn:
+        datasets = {d for (d,) in conn.execute("SELECT DISTINCT dataset FROM artifacts")}
+    assert datasets == {artifact_store._key(isolated_store / "dataset")}
+
+
+def test_connection_is_per_thread(isolated_store):
+    import threading
+
+    main_conn = artifact_store._connection()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(artifact_store._connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not main_conn
+    assert artifact_store._connection() is main_conn
@@ -0,0 +1,127 @@
+"""create_excel_sum：流式汇总与逐个追加一致；增量更新与整体重建一致"""
+
+import os
+import shutil
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import PatternFill
+
+from create_excel_sum import (
+    DETAIL_SHEET,
+    MANIFEST_NAME,
+    append_xlsx_to_summary,
+    incremental_update_summaries,
+    stream_xlsx_to_summary,
+)
+from process_sum_excel_sum import process_excel
+
+HEADER = ["样本", "属", "reads", "备注"]
+CHECK_COL = "D"  # 备注列为红色的行不进入汇总
+RED = "FFFF0000"
+ORANGE = "FFFF7F00"
+YELLOW = "FFFFFF00"
+
+# part -> [(属, reads, 属列颜色, 备注列是否红色)]
+PARTS = {
+    "part00": [("G0", 1, None, False), ("G1", 2, ORANGE, False), ("G2", 3, None, True), ("G0", 4, None, False)],
+    "part01": [("G1", 5, None, False), ("G3", 6, YELLOW, False), ("G4", 7, None, False)],
+    "part02": [("G4", 8, ORANGE, False), ("G0", 9, None, False), ("G5", 10, None, True)],
+}
+
+
+def _write_table(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb = Workbook()
+    ws = wb.active
+    ws.append(HEADER)
+    for r_idx, (genus, reads, genus_fill, red) in enumerate(rows, start=2):
+        ws.append(["S1", genus, reads, "x"])
+        if genus_fill:
+            ws.cell(row=r_idx, column=2).fill = PatternFill(fill_type="solid", fgColor=genus_fill)
+        if red:
+            ws.cell(row=r_idx, column=4).fill = PatternFill(fill_type="solid", fgColor=RED)
+    wb.save(path)
+
+
+def _table_path(base, part):
+    return base / "S1" / "Bacteria" / part / "species_taxonomy_table" / f"S1.Bacteria.{part}.species_taxonomy_table.xlsx"
+
+
+def _make_tree(base, parts=PARTS):
+    for part, rows in parts.items():
+        _write_table(_table_path(base, part), rows)
+    # 遍历时应跳过的缓存目录与文件
+    (base / ".cache" / "page_cache").mkdir(parents=True)
+    (base / "S1" / "Bacteria" / "notes.txt").write_text("x")
+    return base
+
+
+def _fill_rgb(cell):
+    fill = cell.fill
+    if fill is None or fill.fill_type is None:
+        return None
+    rgb = fill.fgColor.rgb
+    return rgb[-6:] if isinstance(rgb, str) and rgb[-6:] != "000000" else None
+
+
+def _cells(path, sheet=None):
+    wb = load_workbook(path)
+    ws = wb[sheet] if sheet else wb.worksheets[0]
+    return [[(c.value, _fill_rgb(c)) for c in row] for row in ws.iter_rows()]
+
+
+def _by_genus(path):
+    """聚合后的主工作表：{属: (整行的值, 属列颜色)}"""
+    rows = _cells(path)
+    genus_idx = [v for v, _ in rows[0]].index("属")
+    return {row[genus_idx][0]: ([v for v, _ in row], row[genus_idx][1]) for row in rows[1:]}
+
+
+def test_stream_matches_append(tmp_path):
+    _make_tree(tmp_path)
+    sources = [_table_path(tmp_path, part) for part in PARTS]
+
+    appended = tmp_path / "appended.xlsx"
+    for src in sources:
+        append_xlsx_to_summary(src, appended, CHECK_COL)
+    streamed = tmp_path / "streamed.xlsx"
+    rows = stream_xlsx_to_summary(sources, streamed, CHECK_COL)
+
+    expected = _cells(appended)
+    assert rows == 8
+    assert len(expected) == 1 + 8
+    assert _cells(streamed) == expected
+    assert ("G1", "FF7F00") in expected[2]
+
+
+def test_incremental_update_matches_full_rebuild(tmp_path):
+    base = _make_tree(tmp_path / "incremental")
+    summary = base / "S1" / "S1_Bacteria_summary.xlsx"
+    incremental_update_summaries(base, CHECK_COL, jobs=1)
+    process_excel(summary)
+    # 缓存目录不是样本目录，不应写入清单
+    assert not (base / ".cache" / MANIFEST_NAME).exists()
+    assert (base / "S1" / MANIFEST_NAME).exists()
+
+    # 改动一个 part：改 reads、删一行、新增属、标红一行、换属列颜色
+    changed = [("G1", 50, YELLOW, False), ("G6", 11, ORANGE, False), ("G4", 7, None, True)]
+    table = _table_path(base, "part01")
+    _write_table(table, changed)
+    st = table.stat()
+    os.utime(table, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    incremental_update_summaries(base, CHECK_COL, jobs=1)
+
+    full = tmp_path / "full"
+    shutil.copytree(base, full)
+    (full / "S1" / MANIFEST_NAME).unlink()
+    (full / "S1" / "S1_Bacteria_summary.xlsx").unlink()
+    incremental_update_summaries(full, CHECK_COL, jobs=1)
+    process_excel(full / "S1" / "S1_Bacteria_summary.xlsx")
+
+    rebuilt = full / "S1" / "S1_Bacteria_summary.xlsx"
+    assert _cells(summary, DETAIL_SHEET) == _cells(rebuilt, DETAIL_SHEET)
+    # 增量更新时新出现的属追加在末尾，行顺序可能不同，按属比较
+    assert _by_genus(summary) == _by_genus(rebuilt)
+    assert _by_genus(summary)["G1"] == (["S1", "G1", 52.0, "x", "S1/Bacteria/part00;S1/Bacteria/part01"], "FF7F00")
+    assert "G6" in _by_genus(summary)
+
@@ -0,0 +1,62 @@
+"""pool_utils.run_in_pool：结果顺序、异常传递、每个任务的输出捕获（串行与并行）"""
+
+import sys
+import time
+
+import pytest
+
+from pool_utils import run_in_pool
+
+
+def _slow_square(x, delay):
+    time.sleep(delay)
+    return x * x
+
+
+def _fail_on_odd(x):
+    print(f"checking {x}")
+    if x % 2:
+        raise ValueError(f"odd {x}")
+    return x
+
+
+def _chatty(x):
+    for i in range(3):
+        print(f"task {x} line {i}")
+        time.sleep(0.01)
+    print(f"task {x} warning", file=sys.stderr)
+    return x
+
+
+def test_results_follow_task_order():
+    # 前面的任务更慢：完成顺序与提交顺序相反，产出顺序仍与 tasks 一致
+    tasks = [(i, 0.2 - i * 0.05) for i in range(4)]
+    results = list(run_in_pool(_slow_square, tasks, jobs=4))
+    assert [r[0] for r in results] == tasks
+    assert [r[1] for r in results] == [0, 1, 4, 9]
+    assert all(r[2] is None and r[3] > 0 for r in results)
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_errors_are_returned_per_task(jobs):
+    results = list(run_in_pool(_fail_on_odd, [(i,) for i in range(4)], jobs=jobs))
+    assert [(task, result, error) for task, result, error, _, _ in results] == [
+        ((0,), 0, None),
+        ((1,), None, "ValueError: odd 1"),
+        ((2,), 2, None),
+        ((3,), None, "ValueError: odd 3"),
+    ]
+    output = results[1][4]
+    assert output.startswith("checking 1\n")
+    assert "Traceback" in output and "ValueError: odd 1" in output
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_output_is_captured_per_task(jobs, capsys):
+    results = list(run_in_pool(_chatty, [(i,) for i in range(3)], jobs=jobs))
+    for task, result, error, _, output in results:
+        x = task[0]
+        assert result == x and error is None
+        assert output == "".join(f"task {x} line {i}\n" for i in range(3)) + f"task {x} warning\n"
+    captured = capsys.readouterr()
+    assert captured.out == "" and captured.err == ""
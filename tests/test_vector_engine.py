@@ -0,0 +1,40 @@
+"""矢量引擎与栅格引擎的一致性（细于 1 个设备像素的描边）"""
+
+import random
+import contextlib
+import io
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+import Recognition_PDF_automatically as recog
+
+S = 72 / recog.RENDER_DPI  # 网格参数是 RENDER_DPI 下的像素坐标
+
+
+def _thin_stroke_pdf(path, seed):
+    """与默认网格版面一致的图：坐标轴 + 在若干列上画细线（0 / 0.1 / 0.3 pt）"""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    page = doc.new_page(width=540, height=260)
+    for ox in (193.5, 840):
+        page.draw_line(fitz.Point((ox - 3) * S, 88 * S), fitz.Point((ox - 3) * S, 571 * S), color=(0, 0, 0), width=0.8)
+        page.draw_line(fitz.Point((ox - 3) * S, 571 * S), fitz.Point((ox + 560) * S, 571 * S), color=(0, 0, 0), width=0.8)
+        for c in rng.sample(range(25), rng.randint(1, 8)):
+            x = ox + c * 23.15 + rng.uniform(-1.5, 1.5)
+            color = rng.choice([(1, 0, 0), (0.9, 0.6, 0.6), (0.5, 0.5, 1)])
+            page.draw_line(fitz.Point(x * S, 440 * S), fitz.Point(x * S, 568 * S), color=color, width=rng.choice([0, 0.1, 0.3]))
+    doc.save(path)
+    doc.close()
+
+
+def test_thin_strokes_match_raster(tmp_path):
+    part = tmp_path / "1_1_thin" / "Bacteria" / "part00"
+    part.mkdir(parents=True)
+    for i in range(12):
+        _thin_stroke_pdf(part / f"thin{i}.pdf", i)
+    with contextlib.redirect_stdout(io.StringIO()):
+        mismatches = recog.compare_engines(tmp_path)
+    assert mismatches == []
+    assert recog.classify_pdf_vector(part / "thin0.pdf")["engine"] == "raster(fallback)"
@@ -135,7 +135,7 @@ def translate_excel_file(excel_path: Path, mapping: dict):
 def main():
     current_dir = Path("files_debug")
     for number_dir in sorted(current_dir.iterdir()):
-        if not number_dir.is_dir():
+        if not number_dir.is_dir() or number_dir.name.startswith("."):
             continue
 
         print(f"📂 当前目录: {number_dir}")
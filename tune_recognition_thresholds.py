@@ -0,0 +1,226 @@
+"""
+识别阈值调优工具
+
+功能：
+- 读取 Recognition_PDF_automatically.py 输出的特征表（recognition_scores.parquet / .csv），
+  其中保存了每个 PDF 的每列最暗值与矩形直方图，可在任意阈值下重新判定，无需重新渲染
+- 读取 recognition_pdf_excellent_streamlit.py 的人工记录（.history.json 快照 + .history.jsonl 操作日志）：
+  “归类”(copy) 为正样本，“跳过”(skip) 为负样本；按 PDF 文件名关联（文件名含 样本.类别.part.属，唯一）
+- 向量化扫描 白色阈值 / 直接判好的有色列数 / 区间下限 / 矩形无色比例上限，
+  输出当前参数与最佳 F1 参数的 精确率、召回率、混淆矩阵，以及排名前列的参数组合（CSV）
+
+判定规则（与识别脚本一致）：
+    有色列数 >= MIN_COLORED  或  BAND_MIN <= 有色列数 <= MIN_COLORED - 1 且 矩形无色比例 <= RECT_MAX
+
+依赖：numpy、pandas（读取 Parquet 需要 pyarrow）
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import Recognition_PDF_automatically as recog
+from history_journal import load_history
+
+
+# ======== 配置区域（按需修改）========
+BASE_DIR = Path("files_debug")
+HISTORY_FILE = Path(".history.json")  # PDF 分类工具的历史记录（位于运行目录）
+WHITE_THRESHOLDS = range(200, 256)  # 白色判定阈值扫描范围
+MIN_COLORED_RANGE = range(2, 11)  # 有色列数 >= 该值直接判为非常好
+BAND_MIN_RANGE = range(1, 10)  # 区间下限（须小于 MIN_COLORED）
+RECT_MAX_VALUES = np.round(np.arange(80.0, 100.01, 0.1), 2)  # 矩形无色比例上限（%）
+TOP_N = 200  # 写入 CSV 的参数组合数量
+SWEEP_NAME = "recognition_threshold_sweep.csv"  # 位于 BASE_DIR 下
+# =====================================
+
+
+def load_labels(history_path: Path = HISTORY_FILE) -> dict[str, int]:
+    """
+    从分类工具历史记录读取人工标签：{PDF 文件名: 1(copy) / 0(skip)}。
+    同一文件多次操作时以最后一次为准（撤销的操作已从历史中移除）。
+    """
+    history = load_history(history_path)
+    if history is None:
+        return {}
+    labels = {}
+    for record in history.get("global_history", []):
+        action, filename = record[0], record[1]
+        if action == "copy":
+            labels[filename] = 1
+        elif action == "skip":
+            labels[filename] = 0
+    return labels
+
+
+def _feature_matrices(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    从特征表取出：
+    - col_mins: (N, 列数) 两个网格所有列的最暗值
+    - hist: (N, 256) 矩形直方图（缺失时全 0）
+    - has_hist: (N,) 是否有直方图（矢量引擎在 3-5 区间外不渲染矩形）
+    """
+    col_names = [c for c in df.columns if c.startswith("grid1_c")]
+    if recog.GRID2_ENABLE:
+        col_names += [c for c in df.columns if c.startswith("grid2_c")]
+    col_mins = df[col_names].to_numpy(dtype=np.int16)
+    hist = np.zeros((len(df), 256), dtype=np.int64)
+    for i, raw in enumerate(df["rect_hist"].fillna("{}")):
+        for level, count in json.loads(raw).items():
+            hist[i, int(level)] = count
+    return col_mins, hist, hist.sum(axis=1) > 0
+
+
+def colorless_percentages(hist: np.ndarray, white_thresholds) -> np.ndarray:
+    """(N, 阈值个数) 各阈值下的矩形无色比例（与识别脚本相同，保留两位小数；无直方图为 NaN）"""
+    # 后缀和：>= 阈值的像素数
+    at_least = hist[:, ::-1].cumsum(axis=1)[:, ::-1]
+    totals = hist.sum(axis=1, keepdims=True)
+    thresholds = np.asarray(list(white_thresholds))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = at_least[:, thresholds] / totals * 100
+    return np.round(pct, 2)
+
+
+def colored_counts(col_mins: np.ndarray, white_thresholds) -> np.ndarray:
+    """(N, 阈值个数) 各阈值下的有色列数：列最暗值 < 阈值"""
+    thresholds = np.asarray(list(white_thresholds))
+    return (col_mins[:, :, None] < thresholds[None, None, :]).sum(axis=1)
+
+
+def _metrics(tp, fp, fn, tn):
+    precision = np.divide(tp, tp + fp, out=np.zeros_like(tp, dtype=float), where=(tp + fp) > 0)
+    recall = np.divide(tp, tp + fn, out=np.zeros_like(tp, dtype=float), where=(tp + fn) > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall,
+                   out=np.zeros_like(precision), where=(precision + recall) > 0)
+    accuracy = (tp + tn) / (tp + fp + fn + tn)
+    return precision, recall, f1, accuracy
+
+
+def sweep(total: np.ndarray, pct: np.ndarray, y: np.ndarray, white_thresholds) -> pd.DataFrame:
+    """
+    对所有参数组合计算混淆矩阵。
+    对每个 (白色阈值, 直接判好列数, 区间下限)，区间内样本的矩形无色比例排序后用 searchsorted
+    一次求出所有 RECT_MAX 的结果，整体只需数千次向量运算。
+    """
+    y = y.astype(bool)
+    n_pos, n_neg = int(y.sum()), int((~y).sum())
+    rect_max = RECT_MAX_VALUES
+    frames = []
+    for t_idx, white in enumerate(white_thresholds):
+        tot, p = total[:, t_idx], pct[:, t_idx]
+        for min_colored in MIN_COLORED_RANGE:
+            direct = tot >= min_colored
+            tp_direct, fp_direct = int((direct & y).sum()), int((direct & ~y).sum())
+            for band_min in BAND_MIN_RANGE:
+                if band_min >= min_colored:
+                    break
+                band = (tot >= band_min) & (tot < min_colored) & ~np.isnan(p)
+                pos_sorted = np.sort(p[band & y])
+                neg_sorted = np.sort(p[band & ~y])
+                tp = tp_direct + np.searchsorted(pos_sorted, rect_max, side="right")
+                fp = fp_direct + np.searchsorted(neg_sorted, rect_max, side="right")
+                frames.append(pd.DataFrame({
+                    "white_threshold": white,
+                    "min_colored": min_colored,
+                    "band_min": band_min,
+                    "rect_max": rect_max,
+                    "tp": tp,
+                    "fp": fp,
+                    "fn": n_pos - tp,
+                    "tn": n_neg - fp,
+                }))
+    result = pd.concat(frames, ignore_index=True)
+    precision, recall, f1, accuracy = _metrics(
+        result["tp"].to_numpy(), result["fp"].to_numpy(), result["fn"].to_numpy(), result["tn"].to_numpy()
+    )
+    result["precision"], result["recall"], result["f1"], result["accuracy"] = precision, recall, f1, accuracy
+    return result
+
+
+def _print_operating_point(title: str, row) -> None:
+    print(f"\n{title}")
+    print(f"  白色阈值 {int(row.white_threshold)}，有色列数 >= {int(row.min_colored)}，"
+          f"区间 [{int(row.band_min)}, {int(row.min_colored) - 1}] 且矩形无色 <= {row.rect_max}%")
+    print(f"  精确率 {row.precision:.3f}  召回率 {row.recall:.3f}  F1 {row.f1:.3f}  准确率 {row.accuracy:.3f}")
+    print("  混淆矩阵（行：人工，列：自动）")
+    print("              判好    判否")
+    print(f"    人工归类  {int(row.tp):>5}  {int(row.fn):>5}")
+    print(f"    人工跳过  {int(row.fp):>5}  {int(row.tn):>5}")
+
+
+def tune(base_dir: Path = BASE_DIR, history_path: Path = HISTORY_FILE) -> pd.DataFrame | None:
+    """关联特征与人工标签并扫描阈值，返回全部参数组合的结果（按 F1 降序）"""
+    start = time.perf_counter()
+    scores = recog.load_score_table(base_dir)
+    labels = load_labels(history_path)
+    if not labels:
+        print(f"⚠️ 没有人工标签: {history_path}")
+        return None
+    scores = scores.assign(filename=scores["pdf"].map(lambda p: Path(p).name))
+    scores = scores.drop_duplicates("filename", keep="last")
+    labeled = scores[scores["filename"].isin(labels)].reset_index(drop=True)
+    y = labeled["filename"].map(labels).to_numpy()
+    print(f"特征表 {len(scores)} 个 PDF，人工标签 {len(labels)} 个，关联成功 {len(labeled)} 个"
+          f"（归类 {int(y.sum())}，跳过 {int(len(y) - y.sum())}）")
+    if len(labeled) == 0:
+        return None
+
+    col_mins, hist, has_hist = _feature_matrices(labeled)
+    if not has_hist.all():
+        print(f"⚠️ {int((~has_hist).sum())} 个 PDF 缺少矩形直方图（矢量引擎），落入区间时按“判否”处理")
+    thresholds = list(WHITE_THRESHOLDS)
+    if recog.WHITE_THRESHOLD not in thresholds:
+        thresholds.append(recog.WHITE_THRESHOLD)
+    total = colored_counts(col_mins, thresholds)
+    pct = colorless_percentages(hist, thresholds)
+    pct[~has_hist] = np.nan
+    result = sweep(total, pct, y, thresholds)
+
+    # 当前参数（RECT_MAX 取扫描网格上的同一值，区间上限固定为 MIN_COLORED - 1）
+    current = result[
+        (result["white_threshold"] == recog.WHITE_THRESHOLD)
+        & (result["min_colored"] == recog.EXCELLENT_MIN_COLORED)
+        & (result["band_min"] == recog.BAND_MIN_COLORED)
+        & np.isclose(result["rect_max"], recog.RECT_COLORLESS_MAX)
+    ]
+    # 同分时优先改动参数个数最少的组合（与当前配置最接近）
+    result["changed"] = (
+        (result["white_threshold"] != recog.WHITE_THRESHOLD).astype(int)
+        + (result["min_colored"] != recog.EXCELLENT_MIN_COLORED)
+        + (result["band_min"] != recog.BAND_MIN_COLORED)
+        + ~np.isclose(result["rect_max"], recog.RECT_COLORLESS_MAX)
+    )
+    result = result.sort_values(["f1", "precision", "accuracy", "changed"],
+                                ascending=[False, False, False, True], ignore_index=True)
+    elapsed = time.perf_counter() - start
+    print(f"扫描 {len(result)} 个参数组合，用时 {elapsed:.2f} 秒")
+
+    if recog.BAND_MAX_COLORED != recog.EXCELLENT_MIN_COLORED - 1:
+        print("⚠️ 当前配置的区间上限不等于“直接判好列数 - 1”，下面的当前参数结果仅供参考")
+    if len(current):
+        _print_operating_point("📌 当前参数", current.iloc[0])
+    _print_operating_point("🏆 最佳 F1", result.iloc[0])
+
+    sweep_path = Path(base_dir) / SWEEP_NAME
+    result.head(TOP_N).to_csv(sweep_path, index=False, encoding="utf-8-sig")
+    print(f"\n前 {TOP_N} 个参数组合已写入: {sweep_path}")
+    return result
+
+
+def main():
+    print("=" * 60)
+    print(f"🎯 识别阈值调优: {BASE_DIR}（标签: {HISTORY_FILE}）")
+    try:
+        tune(BASE_DIR, HISTORY_FILE)
+    except FileNotFoundError as e:
+        print(f"⚠️ {e}")
+
+
+if __name__ == "__main__":
+    main()